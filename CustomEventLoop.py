@@ -0,0 +1,749 @@
+import asyncio
+import collections
+import concurrent.futures
+import functools
+import math
+import selectors
+import socket
+import sys
+import threading
+import time
+import warnings
+from ExecutorMetrics import ExecutorMetrics
+from SocketServer import SocketServer
+from HandlePool import HandlePool
+from Scheduler import ScheduleTask
+from SocketTransport import SetResultUnlessCancelled, SocketTransport
+from TimerMetrics import TimerMetrics
+from TimerQueue import TimerQueue
+
+# The CustomEventLoop from test-006.py (timers and call_soon) with the pending
+# timers kept in a heap instead of a list that is rescanned on every tick.
+# When nothing is ready the loop blocks on a selector until the next timer
+# expires (or another thread wakes it up) instead of spinning on the CPU.
+# The same selector wait is used for socket I/O (add_reader/add_writer).
+# Any object with the TimerQueue interface (for example a TimingWheel) can be
+# passed in to store the timers, and any ready queue with the deque interface
+# (for example one of the Scheduler.py policies) to order the ready handles.
+# create_task also takes the priority, fair share weight and deadline (absolute
+# loop.time(), inherited by child tasks) of the task.
+# With eagerTasks the first step of a task created while the loop is running
+# runs inside create_task, so a coroutine that never suspends is done before
+# create_task returns without scheduling anything.  With poolHandles the
+# handles that have run are recycled through a HandlePool (only on CPython
+# before 3.14 with the GIL).
+# Blocking calls are offloaded with run_in_executor (to a ThreadPoolExecutor
+# created on first use unless another executor is passed in) and their results
+# are handed back through call_soon_threadsafe, which wakes up the selector
+# once for each batch of handles that other threads add.
+# With a timerSlack (seconds, overridden per call with call_at/call_later's
+# slack) each timer may fire up to that much later so that timers due within
+# the same slack window fire together on one wakeup.
+class CustomEventLoop(asyncio.AbstractEventLoop):
+	handleTypes = (asyncio.Handle, asyncio.TimerHandle)
+
+	def __init__(
+		self,
+		timers=None,
+		ready=None,
+		eagerTasks=False,
+		poolHandles=False,
+		timerSlack=0
+	):
+		super().__init__()
+		if eagerTasks and sys.version_info < (3, 12):
+			raise RuntimeError("Eager tasks need Python 3.12 or later")
+		# HandlePool relies on exact reference counts
+		if poolHandles and (sys.version_info >= (3, 14) or not getattr(sys, '_is_gil_enabled', lambda: True)()):
+			raise RuntimeError("Pooled handles need a CPython before 3.14 with the GIL")
+		self.eagerTasks = eagerTasks
+		self.handlePool = HandlePool(self.handleTypes) if poolHandles else None
+		self.timers = TimerQueue() if timers is None else timers
+		self.timerSlack = timerSlack
+		self.timerMetrics = TimerMetrics()
+		self.ready = collections.deque() if ready is None else ready
+		# Called after every batch if the ready queue has it (see Scheduler.py)
+		self.finishBatch = getattr(self.ready, 'FinishBatch', None)
+		# Whether every top-level task needs a fair share group of its own
+		self.isGroupingTasks = getattr(self.ready, 'isGroupingTasks', False)
+		self.isRunning = False
+		self.isClosed = False
+		self.clockResolution = time.get_clock_info('monotonic').resolution
+		self.selector = selectors.DefaultSelector()
+		# Self-pipe used to interrupt the selector from other threads.  The
+		# registered data is None to tell it apart from other file objects.
+		self.wakeupReader, self.wakeupWriter = socket.socketpair()
+		self.wakeupReader.setblocking(False)
+		self.wakeupWriter.setblocking(False)
+		self.selector.register(self.wakeupReader, selectors.EVENT_READ, None)
+		# Handles from other threads (any number of producers, the loop is the
+		# only consumer).  deque.append/popleft are atomic, so producers never
+		# take a lock, and only the first handle after the loop last drained the
+		# queue writes to the self-pipe.
+		self.inbound = collections.deque()
+		self.isWakeupPending = False
+		self.wakeupCount = 0
+		self.defaultExecutor = None
+		self.isExecutorShutdown = False
+		self.executorMetrics = ExecutorMetrics()
+
+	def stop(self):
+		self.isRunning = False
+
+	def run_until_complete(self, future):
+		if not asyncio.isfuture(future):
+			future = asyncio.ensure_future(future, loop=self)
+		future.add_done_callback(lambda future: future.get_loop().stop())
+		self.run_forever()
+		return future.result()
+
+	def create_task(
+		self,
+		coro,
+		*,
+		name=None,
+		context=None,
+		priority=None,
+		weight=None,
+		deadline=None
+	):
+		if self.isGroupingTasks or priority is not None or weight is not None or deadline is not None:
+			context = ScheduleTask(context, priority, weight, deadline)
+		if self.eagerTasks:
+			return asyncio.Task(
+				coro,
+				loop=self,
+				name=name,
+				context=context,
+				eager_start=True
+			)
+		return asyncio.Task(
+			coro,
+			loop=self,
+			name=name,
+			context=context
+		)
+
+	def run_forever(self):
+		asyncio._set_running_loop(self)
+		self.isRunning = True
+		while self.isRunning:
+			self.run_once()
+		asyncio._set_running_loop(None)
+
+	def is_running(self):
+		return self.isRunning
+
+	def is_closed(self):
+		return self.isClosed
+
+	def time(self):
+		return time.monotonic()
+
+	def GetWhen(self, delay):
+		return time.monotonic() + delay
+
+	def GetNow(self):
+		return self.GetWhen(self.clockResolution)
+
+	# Seconds until the next timer expires, 0 if there is already work to do or
+	# None if there is nothing to wait for.
+	def GetTimeout(self):
+		if self.ready or self.inbound or not self.isRunning:
+			return 0
+		when = self.timers.GetNextWhen()
+		if when is None:
+			return None
+		return max(0, when - time.monotonic())
+
+	# Block until an event is ready or the timeout elapses
+	def Wait(self, timeout):
+		return self.selector.select(timeout)
+
+	# Reader/writer handles for the ready file objects are queued up to run with
+	# the rest of the ready handles.
+	def ProcessEvents(self, events):
+		for key, mask in events:
+			if key.data is None:
+				self.ReadWakeup()
+				continue
+			reader, writer = key.data
+			if mask & selectors.EVENT_READ and reader is not None:
+				if reader._cancelled:
+					self.remove_reader(key.fd)
+				else:
+					self.ready.append(reader)
+			if mask & selectors.EVENT_WRITE and writer is not None:
+				if writer._cancelled:
+					self.remove_writer(key.fd)
+				else:
+					self.ready.append(writer)
+
+	def ReadWakeup(self):
+		try:
+			while self.wakeupReader.recv(4096):
+				pass
+		except (BlockingIOError, InterruptedError):
+			pass
+
+	# Interrupt the Wait (safe to call from any thread)
+	def Wakeup(self):
+		try:
+			self.wakeupWriter.send(b'\0')
+		except OSError:
+			# The pipe is full (already woken up) or the loop is closed
+			pass
+
+	"""
+	Ready handles run first and then the newly elapsed timers (in the order
+	they expire).  Only the expired timers are popped from the timer heap so
+	the cost of a tick does not depend on the number of pending timers.  The
+	number of handles to run is snapshot up front so that anything scheduled
+	by these callbacks runs on the next tick (after checking for I/O again).
+	"""
+	def run_once(self):
+		timeout = self.GetTimeout()
+		# Skip polling the selector while busy if only the self-pipe is registered
+		if timeout != 0 or len(self.selector.get_map()) > 1:
+			self.ProcessEvents(self.Wait(timeout))
+		ready = self.ready
+		if self.inbound or self.isWakeupPending:
+			self.DrainInbound(ready)
+		now = self.GetNow()
+		firedCount = self.timers.PopExpired(now, ready)
+		if firedCount:
+			self.timerMetrics.RecordFired(firedCount, now)
+		handlePool = self.handlePool
+		if handlePool is None:
+			for _ in range(len(ready)):
+				handle = ready.popleft()
+				if not handle._cancelled:
+					handle._run()
+		else:
+			for _ in range(len(ready)):
+				handle = ready.popleft()
+				if not handle._cancelled:
+					handle._run()
+				handlePool.Release(handle)
+		if self.finishBatch is not None:
+			self.finishBatch()
+
+	def close(self):
+		if self.isClosed:
+			return
+		self.isClosed = True
+		if self.defaultExecutor is not None:
+			self.defaultExecutor.shutdown(wait=False)
+			self.defaultExecutor = None
+		self.selector.unregister(self.wakeupReader)
+		self.selector.close()
+		self.wakeupReader.close()
+		self.wakeupWriter.close()
+
+	def get_debug(self):
+		return False
+
+	# Add a "ready" callback to the end of the "ready" queue
+	def call_soon(self, callback, *args, context=None):
+		if self.handlePool is None:
+			handle = asyncio.Handle(callback, args, loop=self, context=context)
+		else:
+			handle = self.CreateHandle(asyncio.Handle, callback, args, self, context)
+		self.ready.append(handle)
+		return handle
+
+	# A handle from the pool (or a new one without a pool) initialized with args
+	def CreateHandle(self, handleType, *args):
+		if self.handlePool is None:
+			return handleType(*args)
+		handle = self.handlePool.Acquire(handleType)
+		handle.__init__(*args)
+		return handle
+
+	def call_soon_threadsafe(self, callback, *args, context=None):
+		if self.isClosed:
+			raise RuntimeError("Event loop is closed")
+		handle = asyncio.Handle(callback, args, loop=self, context=context)
+		self.inbound.append(handle)
+		if not self.isWakeupPending:
+			self.isWakeupPending = True
+			self.wakeupCount += 1
+			self.Wakeup()
+		return handle
+
+	"""
+	Moves the handles added by other threads to the ready queue in one batch.
+	The wakeup flag is cleared first: a producer that appends after that sends
+	a new wakeup, one that appended before has its handle drained here.
+	"""
+	def DrainInbound(self, ready):
+		self.isWakeupPending = False
+		inbound = self.inbound
+		for _ in range(len(inbound)):
+			ready.append(inbound.popleft())
+
+	# slack is only passed on when it is given so that call_at overrides with
+	# the plain asyncio signature keep working
+	def call_later(self, delay, callback, *args, context=None, slack=None):
+		when = self.GetWhen(delay)
+		if slack is None:
+			return self.call_at(when, callback, *args, context=context)
+		return self.call_at(when, callback, *args, context=context, slack=slack)
+
+	"""
+	Rounds when up to the next multiple of the slack (the loop's timerSlack
+	unless slack is given), so every timer due within the same slack window
+	gets the same when and they all fire on one wakeup.  Aligning on a fixed
+	grid instead of on the earliest pending timer means a timer is never
+	late by more than its own slack.
+	"""
+	def ApplySlack(self, when, slack):
+		if slack is None:
+			slack = self.timerSlack
+		if not slack:
+			return when
+		slackWhen = math.ceil(when / slack) * slack
+		self.timerMetrics.RecordSlack(when, slackWhen)
+		return slackWhen
+
+	def call_at(self, when, callback, *args, context=None, slack=None):
+		when = self.ApplySlack(when, slack)
+		if self.handlePool is None:
+			timer = asyncio.TimerHandle(when, callback, args, loop=self, context=context)
+		else:
+			timer = self.CreateHandle(asyncio.TimerHandle, when, callback, args, self, context)
+		self.timers.Push(timer)
+		return timer
+
+	# The selector data for each file object is a (reader, writer) pair of
+	# handles.
+	def AddHandler(self, fd, event, handle):
+		try:
+			key = self.selector.get_key(fd)
+		except KeyError:
+			data = (handle, None) if event == selectors.EVENT_READ else (None, handle)
+			self.selector.register(fd, event, data)
+			return
+		reader, writer = key.data
+		if event == selectors.EVENT_READ:
+			previous, data = reader, (handle, writer)
+		else:
+			previous, data = writer, (reader, handle)
+		self.selector.modify(fd, key.events | event, data)
+		if previous is not None:
+			previous.cancel()
+
+	def RemoveHandler(self, fd, event):
+		if self.isClosed:
+			return False
+		try:
+			key = self.selector.get_key(fd)
+		except KeyError:
+			return False
+		reader, writer = key.data
+		if event == selectors.EVENT_READ:
+			previous, data = reader, (None, writer)
+		else:
+			previous, data = writer, (reader, None)
+		events = key.events & ~event
+		if not events:
+			self.selector.unregister(fd)
+		else:
+			self.selector.modify(fd, events, data)
+		if previous is None:
+			return False
+		previous.cancel()
+		return True
+
+	def add_reader(self, fd, callback, *args):
+		self.AddHandler(fd, selectors.EVENT_READ, asyncio.Handle(callback, args, self))
+
+	def remove_reader(self, fd):
+		return self.RemoveHandler(fd, selectors.EVENT_READ)
+
+	def add_writer(self, fd, callback, *args):
+		self.AddHandler(fd, selectors.EVENT_WRITE, asyncio.Handle(callback, args, self))
+
+	def remove_writer(self, fd):
+		return self.RemoveHandler(fd, selectors.EVENT_WRITE)
+
+	"""
+	The sock_* coroutines try the non-blocking call first and only wait on the
+	selector if it would block.  The reader/writer is removed once the future
+	is done (including when it is cancelled).
+	"""
+	async def WaitSocket(self, sock, event, callback, *args):
+		fd = sock.fileno()
+		future = self.create_future()
+		if event == selectors.EVENT_READ:
+			self.add_reader(fd, callback, future, *args)
+			future.add_done_callback(lambda future: self.remove_reader(fd))
+		else:
+			self.add_writer(fd, callback, future, *args)
+			future.add_done_callback(lambda future: self.remove_writer(fd))
+		return await future
+
+	def SocketCall(self, future, method, *args):
+		if future.done():
+			return
+		try:
+			result = method(*args)
+		except (BlockingIOError, InterruptedError):
+			return
+		except (SystemExit, KeyboardInterrupt):
+			raise
+		except BaseException as exception:
+			future.set_exception(exception)
+		else:
+			future.set_result(result)
+
+	async def sock_recv(self, sock, nbytes):
+		try:
+			return sock.recv(nbytes)
+		except (BlockingIOError, InterruptedError):
+			pass
+		return await self.WaitSocket(sock, selectors.EVENT_READ, self.SocketCall, sock.recv, nbytes)
+
+	async def sock_recv_into(self, sock, buf):
+		try:
+			return sock.recv_into(buf)
+		except (BlockingIOError, InterruptedError):
+			pass
+		return await self.WaitSocket(sock, selectors.EVENT_READ, self.SocketCall, sock.recv_into, buf)
+
+	async def sock_accept(self, sock):
+		try:
+			conn, address = sock.accept()
+		except (BlockingIOError, InterruptedError):
+			conn, address = await self.WaitSocket(sock, selectors.EVENT_READ, self.SocketCall, sock.accept)
+		conn.setblocking(False)
+		return conn, address
+
+	async def sock_sendall(self, sock, data):
+		try:
+			sent = sock.send(data)
+		except (BlockingIOError, InterruptedError):
+			sent = 0
+		if sent == len(data):
+			return
+		view = memoryview(data)
+		progress = [sent]
+		await self.WaitSocket(sock, selectors.EVENT_WRITE, self.SocketSendAll, sock, view, progress)
+
+	def SocketSendAll(self, future, sock, view, progress):
+		if future.done():
+			return
+		start = progress[0]
+		try:
+			sent = sock.send(view[start:])
+		except (BlockingIOError, InterruptedError):
+			return
+		except (SystemExit, KeyboardInterrupt):
+			raise
+		except BaseException as exception:
+			future.set_exception(exception)
+			return
+		progress[0] = start + sent
+		if progress[0] == len(view):
+			future.set_result(None)
+
+	async def sock_connect(self, sock, address):
+		try:
+			sock.connect(address)
+			return
+		except (BlockingIOError, InterruptedError):
+			pass
+		await self.WaitSocket(sock, selectors.EVENT_WRITE, self.SocketConnected, sock, address)
+
+	def SocketConnected(self, future, sock, address):
+		if future.done():
+			return
+		error = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+		if error != 0:
+			future.set_exception(OSError(error, f"Connect call failed {address}"))
+		else:
+			future.set_result(None)
+
+	# Name resolution blocks, so it runs in the default executor
+	async def getaddrinfo(self, host, port, *, family=0, type=0, proto=0, flags=0):
+		return await self.run_in_executor(
+			None,
+			socket.getaddrinfo,
+			host,
+			port,
+			family,
+			type,
+			proto,
+			flags
+		)
+
+	async def getnameinfo(self, sockaddr, flags=0):
+		return await self.run_in_executor(None, socket.getnameinfo, sockaddr, flags)
+
+	async def CreateTransport(self, sock, protocolFactory):
+		protocol = protocolFactory()
+		waiter = self.create_future()
+		transport = SocketTransport(self, sock, protocol, waiter)
+		try:
+			await waiter
+		except BaseException:
+			transport.close()
+			raise
+		return transport, protocol
+
+	async def create_connection(
+		self,
+		protocol_factory,
+		host=None,
+		port=None,
+		*,
+		ssl=None,
+		family=0,
+		proto=0,
+		flags=0,
+		sock=None,
+		local_addr=None,
+		server_hostname=None,
+		**kwargs
+	):
+		if ssl:
+			raise NotImplementedError("SSL is not supported by CustomEventLoop")
+		if sock is not None:
+			sock.setblocking(False)
+			return await self.CreateTransport(sock, protocol_factory)
+		infos = await self.getaddrinfo(
+			host,
+			port,
+			family=family,
+			type=socket.SOCK_STREAM,
+			proto=proto,
+			flags=flags
+		)
+		if not infos:
+			raise OSError(f"getaddrinfo({host!r}) returned empty list")
+		exceptions = []
+		for family, type, proto, _, address in infos:
+			sock = socket.socket(family, type, proto)
+			try:
+				sock.setblocking(False)
+				if local_addr is not None:
+					sock.bind(local_addr)
+				await self.sock_connect(sock, address)
+				break
+			except OSError as exception:
+				exceptions.append(exception)
+				sock.close()
+				sock = None
+			except BaseException:
+				sock.close()
+				raise
+		if sock is None:
+			if len(exceptions) == 1:
+				raise exceptions[0]
+			raise OSError(f"Multiple exceptions: {', '.join(str(e) for e in exceptions)}")
+		return await self.CreateTransport(sock, protocol_factory)
+
+	async def create_server(
+		self,
+		protocol_factory,
+		host=None,
+		port=None,
+		*,
+		family=socket.AF_UNSPEC,
+		flags=socket.AI_PASSIVE,
+		sock=None,
+		backlog=100,
+		ssl=None,
+		reuse_address=None,
+		reuse_port=None,
+		start_serving=True,
+		**kwargs
+	):
+		if ssl:
+			raise NotImplementedError("SSL is not supported by CustomEventLoop")
+		if sock is not None:
+			sockets = [sock]
+		else:
+			if host == '':
+				host = None
+			infos = await self.getaddrinfo(
+				host,
+				port,
+				family=family,
+				type=socket.SOCK_STREAM,
+				flags=flags
+			)
+			sockets = []
+			try:
+				for family, type, proto, _, address in infos:
+					sock = socket.socket(family, type, proto)
+					sockets.append(sock)
+					if reuse_address is not False:
+						sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+					if reuse_port:
+						sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+					if family == socket.AF_INET6:
+						sock.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_V6ONLY, 1)
+					sock.bind(address)
+			except BaseException:
+				for sock in sockets:
+					sock.close()
+				raise
+		for sock in sockets:
+			sock.setblocking(False)
+		server = SocketServer(self, sockets, protocol_factory, backlog)
+		if start_serving:
+			server.StartServing()
+		return server
+
+	def call_exception_handler(self, context):
+		print(context)
+
+	def create_future(self):
+		return asyncio.Future(loop=self)
+
+	async def shutdown_asyncgens(self):
+		pass
+
+	def set_default_executor(self, executor):
+		if not isinstance(executor, concurrent.futures.ThreadPoolExecutor):
+			raise TypeError("executor must be ThreadPoolExecutor")
+		self.defaultExecutor = executor
+
+	def GetDefaultExecutor(self):
+		if self.isExecutorShutdown:
+			raise RuntimeError("Executor shutdown has been called")
+		if self.defaultExecutor is None:
+			self.defaultExecutor = concurrent.futures.ThreadPoolExecutor(
+				thread_name_prefix="CustomEventLoop"
+			)
+		return self.defaultExecutor
+
+	"""
+	The executor calls back into the loop from the worker thread when the call
+	is done, so the loop sleeps in the selector instead of polling.  Thread
+	pool calls are wrapped to note when they start and finish for the
+	executor metrics.  Cancelling the returned future cancels the call if it
+	has not started yet.
+	"""
+	def run_in_executor(self, executor, func, *args):
+		if self.isClosed:
+			raise RuntimeError("Event loop is closed")
+		if executor is None:
+			executor = self.GetDefaultExecutor()
+		future = self.create_future()
+		submittedAt = time.perf_counter_ns()
+		if isinstance(executor, concurrent.futures.ThreadPoolExecutor):
+			timing = [None, None]
+			call = executor.submit(RunTimed, timing, func, args)
+		else:
+			timing = None
+			call = executor.submit(func, *args)
+		self.executorMetrics.Submit()
+		call.add_done_callback(functools.partial(
+			self.ExecutorCallFinished,
+			future,
+			submittedAt,
+			timing
+		))
+		future.add_done_callback(lambda future: future.cancelled() and call.cancel())
+		return future
+
+	# Runs on the thread that finished the call.  The loop may have been closed
+	# meanwhile (even between a check and the call_soon_threadsafe), and then
+	# nothing is waiting for the result any more.
+	def ExecutorCallFinished(self, future, submittedAt, timing, call):
+		try:
+			self.call_soon_threadsafe(self.ExecutorCallDone, future, call, submittedAt, timing)
+		except RuntimeError:
+			pass
+
+	def ExecutorCallDone(self, future, call, submittedAt, timing):
+		startedAt, runFinishedAt = (None, None) if timing is None else timing
+		self.RecordExecutorCall(future, submittedAt, startedAt, runFinishedAt)
+		if future.done():
+			return
+		if call.cancelled():
+			future.cancel()
+			return
+		exception = call.exception()
+		if exception is None:
+			future.set_result(call.result())
+		else:
+			future.set_exception(exception)
+
+	def RecordExecutorCall(self, future, submittedAt, startedAt, runFinishedAt):
+		self.executorMetrics.Finish(
+			submittedAt,
+			startedAt,
+			runFinishedAt,
+			time.perf_counter_ns()
+		)
+
+	# Called by the EdfScheduler for a step that starts after its deadline
+	def RecordDeadlineMiss(self, handle, latenessNs, isShed):
+		pass
+
+	"""
+	Waits for the default executor's threads in another thread so that the
+	loop keeps running.  After timeout seconds the calls that are still queued
+	are cancelled and the running ones are left to finish in the background
+	(a thread cannot be interrupted) so that the shutdown is bounded.
+	"""
+	async def shutdown_default_executor(self, timeout=None):
+		self.isExecutorShutdown = True
+		executor = self.defaultExecutor
+		if executor is None:
+			return
+		done = self.create_future()
+		thread = threading.Thread(
+			target=self.ShutdownExecutor,
+			args=(executor, done),
+			name="CustomEventLoop shutdown",
+			daemon=True
+		)
+		thread.start()
+		try:
+			async with asyncio.timeout(timeout):
+				await done
+		except TimeoutError:
+			executor.shutdown(wait=False, cancel_futures=True)
+			warnings.warn(
+				f"The executor did not finish joining its threads within {timeout} seconds.",
+				RuntimeWarning,
+				stacklevel=2
+			)
+			return
+		thread.join()
+
+	def ShutdownExecutor(self, executor, done):
+		executor.shutdown(wait=True)
+		try:
+			self.call_soon_threadsafe(lambda: done.done() or done.set_result(None))
+		except RuntimeError:
+			# The loop was closed without waiting
+			pass
+
+	# Both the timer heap and the timing wheel only count a cancelled timer
+	# here and drop it later (when it is popped, cascaded or compacted away)
+	def _timer_handle_cancelled(self, handle):
+		self.timers.Cancel(handle)
+
+# asyncio.sleep with a slack for this one timer (asyncio.sleep always gets the
+# loop's timerSlack)
+async def SleepAsync(delay, result=None, *, slack=None):
+	loop = asyncio.get_running_loop()
+	future = loop.create_future()
+	timer = loop.call_later(delay, SetResultUnlessCancelled, future, result, slack=slack)
+	try:
+		return await future
+	finally:
+		timer.cancel()
+
+# Runs a thread pool call and notes when it started and finished
+def RunTimed(timing, func, args):
+	timing[0] = time.perf_counter_ns()
+	try:
+		return func(*args)
+	finally:
+		timing[1] = time.perf_counter_ns()
@@ -0,0 +1,45 @@
+from LogHistogram import LogHistogram
+
+"""
+Counts and times the calls that the loop hands to executors with
+run_in_executor.  The queue depth is the number of calls submitted that have
+not come back to the loop yet (queued or running).  Thread pool calls note
+when they start and finish in the worker thread, so their queue wait
+(submitted to started) and run time are known.  Process pool calls can only
+be timed as a whole.  The latency of every call is the time from the submit
+to the result being back on the loop thread.  Everything is updated on the
+loop thread.
+"""
+class ExecutorMetrics:
+	def __init__(self, significantBits=8):
+		self.submittedCount = 0
+		self.finishedCount = 0
+		self.maxQueueDepth = 0
+		self.queueWait = LogHistogram(significantBits)
+		self.runDuration = LogHistogram(significantBits)
+		self.latency = LogHistogram(significantBits)
+
+	def Submit(self):
+		self.submittedCount += 1
+		queueDepth = self.submittedCount - self.finishedCount
+		if queueDepth > self.maxQueueDepth:
+			self.maxQueueDepth = queueDepth
+
+	# startedAt and runFinishedAt are None if the call was not timed in the
+	# worker (a process pool or a call cancelled before it started)
+	def Finish(self, submittedAt, startedAt, runFinishedAt, finishedAt):
+		self.finishedCount += 1
+		if startedAt is not None:
+			self.queueWait.Record(startedAt - submittedAt)
+			self.runDuration.Record(runFinishedAt - startedAt)
+		self.latency.Record(finishedAt - submittedAt)
+
+	def GetQueueDepth(self):
+		return self.submittedCount - self.finishedCount
+
+	def Print(self):
+		print(f"executor calls={self.submittedCount}, queue depth={self.GetQueueDepth()}, " \
+			f"max queue depth={self.maxQueueDepth}")
+		self.queueWait.Print("executor queue wait")
+		self.runDuration.Print("executor run time")
+		self.latency.Print("executor latency")
@@ -0,0 +1,55 @@
+import sys
+
+"""
+Bounded free lists of handle objects for the loop to reuse instead of
+allocating a new Handle/TimerHandle (or StepHandle) for every call_soon and
+call_at.  A handle is only taken back after it has run (or was popped
+cancelled) and when nothing but the loop still references it: user code
+that keeps the handle returned by call_soon/call_later (asyncio.sleep keeps
+its timer, add_reader handles live in the selector) holds an extra reference,
+so those handles are never recycled while they can still be seen.  Recycled
+handles drop their callback, arguments and context so that they do not keep
+anything alive while they sit in the free list.
+
+The reference count check relies on sys.getrefcount being exact, as it is on
+CPython up to 3.13 with the GIL, so CustomEventLoop refuses poolHandles
+anywhere else.
+"""
+class HandlePool:
+	# The run_once local, the Release argument and the getrefcount argument
+	ownedReferenceCount = 3
+
+	def __init__(self, handleTypes, capacity=1024):
+		self.capacity = capacity
+		# Handle type: list of free handles
+		self.freeHandles = {handleType: [] for handleType in handleTypes}
+		self.allocatedCount = 0
+		self.reusedCount = 0
+		self.recycledCount = 0
+		self.referencedCount = 0
+
+	# A handle to __init__ (a new one if the free list is empty)
+	def Acquire(self, handleType):
+		free = self.freeHandles[handleType]
+		if free:
+			self.reusedCount += 1
+			return free.pop()
+		self.allocatedCount += 1
+		return handleType.__new__(handleType)
+
+	def Release(self, handle):
+		free = self.freeHandles.get(type(handle))
+		if free is None or len(free) >= self.capacity:
+			return
+		if sys.getrefcount(handle) > self.ownedReferenceCount:
+			self.referencedCount += 1
+			return
+		handle._callback = None
+		handle._args = None
+		handle._context = None
+		free.append(handle)
+		self.recycledCount += 1
+
+	def Print(self):
+		print(f"handles allocated={self.allocatedCount}, reused={self.reusedCount}, " \
+			f"recycled={self.recycledCount}, still referenced={self.referencedCount}")
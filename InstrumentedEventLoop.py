@@ -0,0 +1,312 @@
+import asyncio
+import contextvars
+import sys
+import time
+from CustomEventLoop import CustomEventLoop
+from MetricsRecorder import MetricsRecorder
+from SlowStep import SlowStep, GetHandleTask
+
+# The id of the task whose context a callback runs in.  create_task sets it in
+# the task's own context, so every callback scheduled with (or from) that
+# context is billed to the task without any lookup.
+taskIdVar = contextvars.ContextVar('taskId')
+# The id of tasks that the sampler skipped
+unsampledTaskId = -1
+
+# Each step handle remembers the task it was scheduled for and times its own
+# _run.  The step of a task that finishes it also finishes the task's metrics,
+# so no done callback has to be scheduled for that.
+class StepMixin:
+	__slots__ = ()
+
+	def _run(self):
+		loop = self._loop
+		startedAt = time.perf_counter_ns()
+		super()._run()
+		finishedAt = time.perf_counter_ns()
+		loop.RecordStep(
+			self.taskId,
+			self.stepId,
+			self.createdAt,
+			startedAt,
+			finishedAt
+		)
+		task = GetHandleTask(self)
+		if finishedAt - startedAt > loop.slowStepNs:
+			loop.ReportSlowStep(
+				self.taskId,
+				self.stepId,
+				startedAt,
+				finishedAt,
+				task
+			)
+		if task is not None and task.done():
+			loop.TaskDone(task)
+
+class StepHandle(StepMixin, asyncio.Handle):
+	__slots__ = ('taskId', 'stepId', 'createdAt')
+
+	def __init__(self, taskId, stepId, callback, args, loop, context):
+		self.taskId = taskId
+		self.stepId = stepId
+		self.createdAt = time.perf_counter_ns()
+		super().__init__(callback, args, loop, context=context)
+
+class StepTimerHandle(StepMixin, asyncio.TimerHandle):
+	__slots__ = ('taskId', 'stepId', 'createdAt')
+
+	def __init__(self, taskId, stepId, when, callback, args, loop, context):
+		self.taskId = taskId
+		self.stepId = stepId
+		self.createdAt = time.perf_counter_ns()
+		super().__init__(when, callback, args, loop, context=context)
+
+"""
+The test-009.py task/step/idle instrumentation on top of the CustomEventLoop.
+Every call_soon/call_at is billed to the task whose context it is scheduled
+in and becomes a step of that task.  Callbacks that do not belong to any task
+(scheduled from other threads, plain futures or library code outside a task)
+are billed to the overhead task created with the loop.  Idle time is the time spent
+blocked waiting on the selector.  The metrics can be kept in a
+RingMetricsRecorder instead to bound the memory used.
+
+Steps that run for longer than slowStepThreshold seconds are passed to
+slowStepHandler as a SlowStep (which prints them by default).  Live per-task
+aggregates are kept if a TaskStatistics is passed in and queue delay/step/idle
+histograms if a LoopHistograms is.  The time a task waits for its
+run_in_executor calls is added to its TaskStatistics aggregate, and so are
+the deadline misses of an EdfScheduler (with their lateness in the
+LoopHistograms).
+
+With a sampler (Sampler.py) only the sampled tasks are recorded.  The other
+tasks get no task id and their callbacks are plain Handles, so they cost no
+more than on the CustomEventLoop.  taskCount and callbackCount stay exact
+either way.
+"""
+class InstrumentedEventLoop(CustomEventLoop):
+	handleTypes = CustomEventLoop.handleTypes + (StepHandle, StepTimerHandle)
+
+	def __init__(
+		self,
+		timers=None,
+		metrics=None,
+		slowStepThreshold=None,
+		slowStepHandler=SlowStep.Print,
+		statistics=None,
+		histograms=None,
+		sampler=None,
+		ready=None,
+		eagerTasks=False,
+		poolHandles=False,
+		timerSlack=0
+	):
+		super().__init__(timers, ready, eagerTasks, poolHandles, timerSlack)
+		self.metrics = MetricsRecorder() if metrics is None else metrics
+		self.statistics = statistics
+		self.histograms = histograms
+		self.sampler = sampler
+		self.taskCount = 0
+		self.sampledTaskCount = 0
+		self.callbackCount = 0
+		self.sampledCallbackCount = 0
+		self.slowStepHandler = slowStepHandler
+		self.SetSlowStepThreshold(slowStepThreshold)
+		self.overheadTaskId = self.CreateTaskId(None)
+		# Running task: taskId
+		self.taskIds = {}
+		# Pending run_in_executor future: taskId
+		self.executorCalls = {}
+
+	def create_task(
+		self,
+		coro,
+		*,
+		name=None,
+		context=None,
+		priority=None,
+		weight=None,
+		deadline=None
+	):
+		self.taskCount += 1
+		if self.sampler is None or self.sampler.IsSampled():
+			self.sampledTaskCount += 1
+			parentTaskId = taskIdVar.get(None)
+			if parentTaskId == unsampledTaskId:
+				parentTaskId = None
+			taskId = self.CreateTaskId(parentTaskId)
+		else:
+			taskId = unsampledTaskId
+		# A context passed in is used as is, like asyncio does, so the caller
+		# sees the task's context variable changes.  Tasks that share a context
+		# are billed to the one created last.
+		if context is None:
+			context = contextvars.copy_context()
+		if context.get(taskIdVar, None) != taskId:
+			context.run(taskIdVar.set, taskId)
+		if taskId == unsampledTaskId or not self.eagerTasks or not self.isRunning:
+			task = super().create_task(
+				coro,
+				name=name,
+				context=context,
+				priority=priority,
+				weight=weight,
+				deadline=deadline
+			)
+		else:
+			task = self.CreateEagerTask(taskId, coro, name, context, priority, weight, deadline)
+		if taskId != unsampledTaskId:
+			self.taskIds[task] = taskId
+			# An eager task can be done already
+			if task.done():
+				self.TaskDone(task)
+		return task
+
+	# The eager first step runs inside create_task and is recorded as a step
+	# of the new task (it is also part of the creating step's duration)
+	def CreateEagerTask(self, taskId, coro, name, context, priority, weight, deadline):
+		stepId = self.metrics.CreateStep(taskId)
+		startedAt = time.perf_counter_ns()
+		task = super().create_task(
+			coro,
+			name=name,
+			context=context,
+			priority=priority,
+			weight=weight,
+			deadline=deadline
+		)
+		finishedAt = time.perf_counter_ns()
+		self.RecordStep(taskId, stepId, startedAt, startedAt, finishedAt)
+		if finishedAt - startedAt > self.slowStepNs:
+			self.ReportSlowStep(taskId, stepId, startedAt, finishedAt, task)
+		return task
+
+	def close(self):
+		super().close()
+		self.metrics.Close()
+
+	# None disables the detector
+	def SetSlowStepThreshold(self, threshold):
+		if threshold is None:
+			self.slowStepNs = sys.maxsize
+		else:
+			self.slowStepNs = int(threshold * 1e9)
+
+	def RecordStep(self, taskId, stepId, createdAt, startedAt, finishedAt):
+		self.metrics.RecordStep(taskId, stepId, createdAt, startedAt, finishedAt)
+		if self.statistics is not None:
+			self.statistics.RecordStep(taskId, createdAt, startedAt, finishedAt)
+		if self.histograms is not None:
+			self.histograms.RecordStep(createdAt, startedAt, finishedAt)
+
+	def ReportSlowStep(self, taskId, stepId, startedAt, finishedAt, task):
+		try:
+			self.slowStepHandler(SlowStep(
+				taskId,
+				stepId,
+				startedAt,
+				finishedAt,
+				task
+			))
+		except Exception as exception:
+			self.call_exception_handler({
+				'message': "Slow step handler failed",
+				'exception': exception
+			})
+
+	def CreateTaskId(self, parentTaskId):
+		createdAt = time.perf_counter_ns()
+		taskId = self.metrics.CreateTask(parentTaskId, createdAt)
+		if self.statistics is not None:
+			self.statistics.CreateTask(taskId, parentTaskId, createdAt)
+		return taskId
+
+	# Called from the step that finished the task.  Other handles that are
+	# bound to a finished task are ignored.
+	def TaskDone(self, task):
+		taskId = self.taskIds.pop(task, None)
+		if taskId is None:
+			return
+		finishedAt = time.perf_counter_ns()
+		self.metrics.FinishTask(taskId, finishedAt)
+		if self.statistics is not None:
+			self.statistics.FinishTask(taskId, finishedAt)
+
+	def run_in_executor(self, executor, func, *args):
+		future = super().run_in_executor(executor, func, *args)
+		if self.statistics is not None:
+			taskId = self.GetTaskId(None)
+			if taskId != unsampledTaskId:
+				self.executorCalls[future] = taskId
+		return future
+
+	def RecordExecutorCall(self, future, submittedAt, startedAt, runFinishedAt):
+		super().RecordExecutorCall(future, submittedAt, startedAt, runFinishedAt)
+		taskId = self.executorCalls.pop(future, None)
+		if taskId is not None:
+			self.statistics.RecordExecutorCall(taskId, time.perf_counter_ns() - submittedAt)
+
+	def RecordDeadlineMiss(self, handle, latenessNs, isShed):
+		if self.statistics is not None:
+			taskId = self.GetTaskId(handle._context)
+			if taskId != unsampledTaskId:
+				self.statistics.RecordDeadlineMiss(taskId, isShed)
+		if self.histograms is not None:
+			self.histograms.RecordDeadlineMiss(latenessNs)
+
+	def GetTaskId(self, context):
+		if context is None:
+			return taskIdVar.get(self.overheadTaskId)
+		return context.get(taskIdVar, self.overheadTaskId)
+
+	# Idle time is also when partial export batches are handed off
+	def Wait(self, timeout):
+		if timeout == 0:
+			return super().Wait(timeout)
+		self.metrics.Flush()
+		startedAt = time.perf_counter_ns()
+		events = super().Wait(timeout)
+		finishedAt = time.perf_counter_ns()
+		self.metrics.RecordIdle(startedAt, finishedAt)
+		if self.histograms is not None:
+			self.histograms.RecordIdle(startedAt, finishedAt)
+		return events
+
+	def call_soon(self, callback, *args, context=None):
+		self.callbackCount += 1
+		taskId = self.GetTaskId(context)
+		if taskId == unsampledTaskId:
+			handle = self.CreateHandle(asyncio.Handle, callback, args, self, context)
+			self.ready.append(handle)
+			return handle
+		self.sampledCallbackCount += 1
+		handle = self.CreateHandle(
+			StepHandle,
+			taskId,
+			self.metrics.CreateStep(taskId),
+			callback,
+			args,
+			self,
+			context
+		)
+		self.ready.append(handle)
+		return handle
+
+	def call_at(self, when, callback, *args, context=None, slack=None):
+		self.callbackCount += 1
+		taskId = self.GetTaskId(context)
+		if taskId == unsampledTaskId:
+			return super().call_at(when, callback, *args, context=context, slack=slack)
+		self.sampledCallbackCount += 1
+		when = self.ApplySlack(when, slack)
+		timer = self.CreateHandle(
+			StepTimerHandle,
+			taskId,
+			self.metrics.CreateStep(taskId),
+			when,
+			callback,
+			args,
+			self,
+			context
+		)
+		self.timers.Push(timer)
+		return timer
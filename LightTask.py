@@ -0,0 +1,120 @@
+import asyncio
+import contextvars
+
+"""
+A lightweight task for the CustomEventLoop that drives its coroutine with
+send/throw itself instead of going through asyncio.Task.__step.  The task is
+its own ready handle (it has the _cancelled/_run the loop uses), so a bare
+yield (SuspendAlways) puts the task straight back on the ready queue without
+allocating a Handle or going through call_soon.  Yielded asyncio Futures are
+waited on with a done callback like asyncio.Task does, and the task is itself
+a Future, so it can be awaited, gathered and cancelled like any other.
+
+Each step runs as the loop's current task and cancel() counts the requests
+that uncancel() takes back, so asyncio.timeout, wait_for and TaskGroup work
+inside it like inside an asyncio.Task.
+"""
+class LightTask(asyncio.Future):
+	# Never cancelled as a handle, cancel() goes through the coroutine instead
+	_cancelled = False
+	# Whether the steps are registered with asyncio.current_task()
+	isCurrentTask = True
+
+	def __init__(self, coro, *, loop=None, context=None):
+		super().__init__(loop=loop)
+		self.coro = coro
+		# Named like the Handle attributes that the ready queue policies read
+		self._context = contextvars.copy_context() if context is None else context
+		self._callback = self.Step
+		self.waiter = None
+		self.mustCancel = False
+		self.cancelMessage = None
+		self.cancelRequests = 0
+		self._loop.ready.append(self)
+
+	def get_coro(self):
+		return self.coro
+
+	def cancel(self, msg=None):
+		if self.done():
+			return False
+		self.cancelRequests += 1
+		if self.waiter is not None and self.waiter.cancel(msg=msg):
+			return True
+		self.mustCancel = True
+		self.cancelMessage = msg
+		return True
+
+	def cancelling(self):
+		return self.cancelRequests
+
+	def uncancel(self):
+		if self.cancelRequests > 0:
+			self.cancelRequests -= 1
+			if self.cancelRequests == 0:
+				self.mustCancel = False
+		return self.cancelRequests
+
+	# Called by the loop when the task is popped off the ready queue
+	def _run(self):
+		self._context.run(self.Step, None)
+
+	# Done callback of the awaited future (already runs in the task's context)
+	def Wakeup(self, future):
+		self.waiter = None
+		self.Step(None)
+
+	def Step(self, exception):
+		if not self.isCurrentTask:
+			self.RunStep(exception)
+			return
+		loop = self._loop
+		asyncio.tasks._enter_task(loop, self)
+		try:
+			self.RunStep(exception)
+		finally:
+			asyncio.tasks._leave_task(loop, self)
+
+	def RunStep(self, exception):
+		if self.mustCancel:
+			self.mustCancel = False
+			exception = asyncio.CancelledError(self.cancelMessage)
+		coro = self.coro
+		while True:
+			try:
+				if exception is None:
+					yielded = coro.send(None)
+				else:
+					yielded = coro.throw(exception)
+			except StopIteration as stop:
+				super().set_result(stop.value)
+				return
+			except asyncio.CancelledError:
+				super().cancel()
+				return
+			except (KeyboardInterrupt, SystemExit) as error:
+				super().set_exception(error)
+				raise
+			except BaseException as error:
+				super().set_exception(error)
+				return
+			if yielded is None:
+				self._loop.ready.append(self)
+				return
+			if getattr(yielded, '_asyncio_future_blocking', None) is not None:
+				if yielded is self:
+					exception = RuntimeError("Task cannot await on itself")
+					continue
+				yielded._asyncio_future_blocking = False
+				self.waiter = yielded
+				yielded.add_done_callback(self.Wakeup, context=self._context)
+				if self.mustCancel and yielded.cancel(msg=self.cancelMessage):
+					self.mustCancel = False
+				return
+			exception = RuntimeError(f"LightTask got bad yield: {yielded!r}")
+
+	def set_result(self, result):
+		raise RuntimeError("LightTask does not support set_result")
+
+	def set_exception(self, exception):
+		raise RuntimeError("LightTask does not support set_exception")
@@ -0,0 +1,144 @@
+import math
+from array import array
+from PerformanceTimer import FormatDurationNs
+
+"""
+An HDR style histogram of non-negative integers (nanoseconds here).  Values
+below 2^significantBits get a bucket each; above that every power of two is
+split into 2^(significantBits - 1) equal buckets, so a bucket is never wider
+than 2^-(significantBits - 1) of its values (under 1% with the default 8
+bits).  The counts live in one array('q') sized for any int64 value, so
+recording is O(1) and the memory never grows.
+"""
+class LogHistogram:
+	def __init__(self, significantBits=8):
+		self.significantBits = significantBits
+		self.halfBucketCount = 1 << (significantBits - 1)
+		bucketCount = (65 - significantBits) * self.halfBucketCount
+		self.counts = array('q', bytes(8 * bucketCount))
+		self.count = 0
+		self.total = 0
+		self.min = None
+		self.max = None
+
+	def Record(self, value):
+		if value < 0:
+			value = 0
+		shift = value.bit_length() - self.significantBits
+		if shift > 0:
+			self.counts[shift * self.halfBucketCount + (value >> shift)] += 1
+		else:
+			self.counts[value] += 1
+		self.count += 1
+		self.total += value
+		if self.max is None or value > self.max:
+			self.max = value
+		if self.min is None or value < self.min:
+			self.min = value
+
+	# The highest value that falls into the bucket
+	def GetBucketLimit(self, index):
+		shift = index // self.halfBucketCount - 1
+		if shift <= 0:
+			return index
+		mantissa = index - shift * self.halfBucketCount
+		return ((mantissa + 1) << shift) - 1
+
+	# The value that percentile% of the recorded values are at or below (to
+	# within the bucket precision)
+	def GetPercentile(self, percentile):
+		if not self.count:
+			return 0
+		target = max(1, math.ceil(self.count * percentile / 100))
+		seen = 0
+		for index, count in enumerate(self.counts):
+			seen += count
+			if seen >= target:
+				return min(self.GetBucketLimit(index), self.max)
+		return self.max
+
+	def GetMean(self):
+		return self.total / self.count if self.count else 0
+
+	def Merge(self, other):
+		if other.significantBits != self.significantBits:
+			raise ValueError("Cannot merge histograms with different precision")
+		counts = self.counts
+		for index, count in enumerate(other.counts):
+			if count:
+				counts[index] += count
+		self.count += other.count
+		self.total += other.total
+		if other.max is not None and (self.max is None or other.max > self.max):
+			self.max = other.max
+		if other.min is not None and (self.min is None or other.min < self.min):
+			self.min = other.min
+
+	def Reset(self):
+		self.counts = array('q', bytes(8 * len(self.counts)))
+		self.count = 0
+		self.total = 0
+		self.min = None
+		self.max = None
+
+	def GetMemoryBytes(self):
+		return self.counts.buffer_info()[1] * self.counts.itemsize
+
+	def Print(self, name):
+		if not self.count:
+			print(f"{name}: no values")
+			return
+		print(f"{name}: count={self.count}, " \
+			f"mean={FormatDurationNs(int(self.GetMean()))}, " \
+			f"p50={FormatDurationNs(self.GetPercentile(50))}, " \
+			f"p99={FormatDurationNs(self.GetPercentile(99))}, " \
+			f"p99.9={FormatDurationNs(self.GetPercentile(99.9))}, " \
+			f"max={FormatDurationNs(self.max)}")
+
+"""
+The queue delay (createdAt to startedAt), step duration and idle duration
+histograms of one loop, and the lateness of the steps that missed their
+deadline.  Histograms from several loops can be merged into one.
+"""
+class LoopHistograms:
+	def __init__(self, significantBits=8):
+		self.queueDelay = LogHistogram(significantBits)
+		self.stepDuration = LogHistogram(significantBits)
+		self.idleDuration = LogHistogram(significantBits)
+		# How late the steps that missed their deadline started (EdfScheduler)
+		self.deadlineLateness = LogHistogram(significantBits)
+
+	def RecordStep(self, createdAt, startedAt, finishedAt):
+		self.queueDelay.Record(startedAt - createdAt)
+		self.stepDuration.Record(finishedAt - startedAt)
+
+	def RecordIdle(self, startedAt, finishedAt):
+		self.idleDuration.Record(finishedAt - startedAt)
+
+	def RecordDeadlineMiss(self, latenessNs):
+		self.deadlineLateness.Record(latenessNs)
+
+	def Merge(self, other):
+		self.queueDelay.Merge(other.queueDelay)
+		self.stepDuration.Merge(other.stepDuration)
+		self.idleDuration.Merge(other.idleDuration)
+		self.deadlineLateness.Merge(other.deadlineLateness)
+
+	def Reset(self):
+		self.queueDelay.Reset()
+		self.stepDuration.Reset()
+		self.idleDuration.Reset()
+		self.deadlineLateness.Reset()
+
+	def GetMemoryBytes(self):
+		return self.queueDelay.GetMemoryBytes() \
+			+ self.stepDuration.GetMemoryBytes() \
+			+ self.idleDuration.GetMemoryBytes() \
+			+ self.deadlineLateness.GetMemoryBytes()
+
+	def Print(self):
+		self.queueDelay.Print("queue delay")
+		self.stepDuration.Print("step duration")
+		self.idleDuration.Print("idle duration")
+		if self.deadlineLateness.count:
+			self.deadlineLateness.Print("deadline lateness")
@@ -0,0 +1,238 @@
+import concurrent.futures
+import multiprocessing
+import multiprocessing.connection
+import os
+import threading
+from LogHistogram import LoopHistograms
+from LoopWorker import (
+	CreateWorkerLoop,
+	GetWorkerMetricsAsync,
+	ProcessLoopWorker,
+	ThreadLoopWorker
+)
+from PerformanceTimer import FormatDurationNs
+
+# Each call goes to the next worker in turn
+class RoundRobinDistribution:
+	def __init__(self):
+		self.nextIndex = 0
+
+	def Choose(self, workers, key):
+		worker = workers[self.nextIndex % len(workers)]
+		self.nextIndex += 1
+		return worker
+
+"""
+Each call goes to the worker with the fewest calls in flight, and of those to
+the one whose loop reported the shortest ready queue with its last result
+(the loop with the least runnable work waiting).
+"""
+class LeastLoadedDistribution:
+	def Choose(self, workers, key):
+		return min(workers, key=GetWorkerLoad)
+
+def GetWorkerLoad(worker):
+	return (worker.inFlightCount, worker.queueLength)
+
+# Calls with the same key always go to the same worker (so per-key state can
+# stay in that worker's loop).  Calls without a key are passed on to inner.
+class KeyAffinityDistribution:
+	def __init__(self, inner=None):
+		self.inner = RoundRobinDistribution() if inner is None else inner
+
+	def Choose(self, workers, key):
+		if key is None:
+			return self.inner.Choose(workers, key)
+		return workers[hash(key) % len(workers)]
+
+# The metrics of every worker and their histograms merged into one
+class RuntimeMetrics:
+	def __init__(self, workerMetrics):
+		self.workerMetrics = workerMetrics
+		self.histograms = None
+		for metrics in workerMetrics:
+			if metrics.histograms is None:
+				continue
+			if self.histograms is None:
+				self.histograms = LoopHistograms(metrics.histograms.queueDelay.significantBits)
+			self.histograms.Merge(metrics.histograms)
+
+	def GetCompletedCount(self):
+		return sum(metrics.completedCount for metrics in self.workerMetrics)
+
+	def GetFailedCount(self):
+		return sum(metrics.failedCount for metrics in self.workerMetrics)
+
+	def Print(self):
+		for metrics in self.workerMetrics:
+			text = f"worker={metrics.workerId}: completed={metrics.completedCount}, " \
+				f"failed={metrics.failedCount}"
+			if metrics.histograms is not None:
+				text += f", busy={FormatDurationNs(metrics.histograms.stepDuration.total)}, " \
+					f"idle={FormatDurationNs(metrics.histograms.idleDuration.total)}"
+			print(text)
+		print(f"completed={self.GetCompletedCount()}, failed={self.GetFailedCount()}")
+		if self.histograms is not None:
+			self.histograms.Print()
+
+"""
+Runs workerCount shared-nothing event loops, each in its own process (one
+core each) or thread (sharing the GIL, for I/O bound work), and hands out
+submitted coroutine factories to them with the distribution policy.  Submit
+returns a concurrent.futures.Future for the coroutine's result (use
+asyncio.wrap_future to await it from another loop).  Nothing is shared
+between the workers: each coroutine runs entirely on the loop it was sent
+to, and GetMetrics collects a snapshot from every worker.
+
+A worker process that dies without stopping (killed, crashed or exited)
+fails the calls it had in flight with a RuntimeError and no more calls are
+sent to it.
+"""
+class LoopRuntime:
+	def __init__(
+		self,
+		workerCount=None,
+		useProcesses=True,
+		distribution=None,
+		loopFactory=CreateWorkerLoop
+	):
+		workerCount = workerCount or os.cpu_count() or 1
+		self.distribution = RoundRobinDistribution() if distribution is None else distribution
+		self.lock = threading.Lock()
+		# callId: (future, worker)
+		self.calls = {}
+		self.nextCallId = 0
+		self.isClosed = False
+		self.useProcesses = useProcesses
+		if useProcesses:
+			context = multiprocessing.get_context()
+			self.workers = [
+				ProcessLoopWorker(workerId, loopFactory, context)
+				for workerId in range(workerCount)
+			]
+		else:
+			self.workers = [
+				ThreadLoopWorker(workerId, loopFactory, self.ResultReceived)
+				for workerId in range(workerCount)
+			]
+		# The workers that calls are distributed to (the ones still alive)
+		self.liveWorkers = list(self.workers)
+		for worker in self.workers:
+			worker.Start()
+		# The results of worker processes are read on a thread of their own
+		if useProcesses:
+			self.collector = threading.Thread(
+				target=self.CollectResults,
+				name="LoopRuntime results",
+				daemon=True
+			)
+			self.collector.start()
+
+	def Submit(self, factory, *args, key=None):
+		with self.lock:
+			if not self.liveWorkers:
+				raise RuntimeError("Every worker of the runtime has died")
+			worker = self.distribution.Choose(self.liveWorkers, key)
+		return self.SubmitToWorker(worker, factory, args)
+
+	def SubmitToWorker(self, worker, factory, args):
+		future = concurrent.futures.Future()
+		with self.lock:
+			if self.isClosed:
+				raise RuntimeError("The runtime is closed")
+			if worker not in self.liveWorkers:
+				raise RuntimeError(f"Worker {worker.workerId} has died")
+			callId = self.nextCallId
+			self.nextCallId += 1
+			self.calls[callId] = (future, worker)
+			worker.inFlightCount += 1
+			# The call is queued on the worker's loop until its next result
+			# reports the actual queue length
+			worker.queueLength += 1
+		worker.Submit(callId, factory, args)
+		return future
+
+	# Runs factory(*args) for every args in argsList and waits for the results
+	def Map(self, factory, argsList, keys=None):
+		if keys is None:
+			futures = [self.Submit(factory, *args) for args in argsList]
+		else:
+			futures = [self.Submit(factory, *args, key=key) for args, key in zip(argsList, keys)]
+		return [future.result() for future in futures]
+
+	def ResultReceived(self, workerId, callId, isError, value, queueLength):
+		with self.lock:
+			future, worker = self.calls.pop(callId)
+			worker.inFlightCount -= 1
+			worker.queueLength = queueLength
+		if isError:
+			future.set_exception(value)
+		else:
+			future.set_result(value)
+
+	"""
+	Reads the results of every worker process until all of them have stopped.
+	A process that exits (its pipe is closed or its sentinel is set) before
+	sending its stop message has died: the results it sent before are still
+	read and then WorkerDied fails the rest.
+	"""
+	def CollectResults(self):
+		running = {worker.results: worker for worker in self.workers}
+		sentinels = {worker.process.sentinel: worker for worker in self.workers}
+		while running:
+			for ready in multiprocessing.connection.wait([*running, *sentinels]):
+				if ready in running:
+					self.ReadResults(running[ready], running, sentinels)
+				elif ready in sentinels:
+					worker = sentinels.pop(ready)
+					if worker.results in running:
+						self.ReadResults(worker, running, sentinels)
+					# Without an end of file if another process still has the pipe
+					if worker.results in running:
+						del running[worker.results]
+						self.WorkerDied(worker)
+
+	def ReadResults(self, worker, running, sentinels):
+		while worker.results.poll():
+			try:
+				workerId, callId, isError, value, queueLength = worker.results.recv()
+			except EOFError:
+				callId = None
+				self.WorkerDied(worker)
+			if callId is None:
+				del running[worker.results]
+				sentinels.pop(worker.process.sentinel, None)
+				return
+			self.ResultReceived(workerId, callId, isError, value, queueLength)
+
+	def WorkerDied(self, worker):
+		# The pipe can be closed a moment before the process has exited
+		worker.process.join()
+		message = f"Worker {worker.workerId} died with exit code {worker.process.exitcode}"
+		with self.lock:
+			if worker in self.liveWorkers:
+				self.liveWorkers.remove(worker)
+			callIds = [callId for callId, (_, callWorker) in self.calls.items() if callWorker is worker]
+			futures = [self.calls.pop(callId)[0] for callId in callIds]
+			worker.inFlightCount = 0
+		for future in futures:
+			future.set_exception(RuntimeError(message))
+
+	def GetMetrics(self):
+		with self.lock:
+			workers = list(self.liveWorkers)
+		futures = [self.SubmitToWorker(worker, GetWorkerMetricsAsync, ()) for worker in workers]
+		return RuntimeMetrics([future.result() for future in futures])
+
+	# Waits for the submitted coroutines to finish and stops the workers
+	def Close(self):
+		with self.lock:
+			if self.isClosed:
+				return
+			self.isClosed = True
+		for worker in self.workers:
+			worker.Stop()
+		for worker in self.workers:
+			worker.Join()
+		if self.useProcesses:
+			self.collector.join()
@@ -0,0 +1,196 @@
+import asyncio
+import functools
+import threading
+from InstrumentedEventLoop import InstrumentedEventLoop
+from LogHistogram import LoopHistograms
+from MetricsRecorder import RingMetricsRecorder
+
+# The WorkerLoop running on the current thread
+current = threading.local()
+
+# Workers record into fixed-size rings and keep histograms that can be merged
+def CreateWorkerLoop():
+	return InstrumentedEventLoop(
+		metrics=RingMetricsRecorder(capacity=4096),
+		histograms=LoopHistograms()
+	)
+
+"""
+The part of a worker that runs on its own thread (in the runtime's process or
+in a worker process): one event loop that runs every coroutine submitted to
+it until it is stopped.  Submit can be called from any thread.  Each result
+is passed to reportResult(workerId, callId, isError, value, queueLength)
+from the loop thread, where queueLength is the loop's ready queue length at
+that point (how far behind the loop is running).  Stop lets the submitted
+coroutines finish first.
+"""
+class WorkerLoop:
+	def __init__(self, workerId, loopFactory, reportResult):
+		self.workerId = workerId
+		self.loopFactory = loopFactory
+		self.reportResult = reportResult
+		self.loop = None
+		self.isStarted = threading.Event()
+		self.stopping = None
+		self.tasks = set()
+		self.completedCount = 0
+		self.failedCount = 0
+
+	def Run(self):
+		current.worker = self
+		loop = self.loopFactory()
+		self.loop = loop
+		asyncio.run(self.MainAsync(), loop_factory=lambda: loop)
+
+	async def MainAsync(self):
+		self.stopping = self.loop.create_future()
+		self.isStarted.set()
+		await self.stopping
+		while self.tasks:
+			await asyncio.wait(self.tasks)
+
+	def Submit(self, callId, factory, args):
+		self.isStarted.wait()
+		self.loop.call_soon_threadsafe(self.StartTask, callId, factory, args)
+
+	def Stop(self):
+		self.isStarted.wait()
+		self.loop.call_soon_threadsafe(
+			lambda: self.stopping.done() or self.stopping.set_result(None)
+		)
+
+	def StartTask(self, callId, factory, args):
+		try:
+			task = self.loop.create_task(factory(*args))
+		except Exception as exception:
+			self.failedCount += 1
+			self.ReportResult(callId, True, exception)
+			return
+		self.tasks.add(task)
+		task.add_done_callback(functools.partial(self.TaskDone, callId))
+
+	def TaskDone(self, callId, task):
+		self.tasks.discard(task)
+		if task.cancelled():
+			self.failedCount += 1
+			self.ReportResult(callId, True, asyncio.CancelledError())
+		elif task.exception() is not None:
+			self.failedCount += 1
+			self.ReportResult(callId, True, task.exception())
+		else:
+			self.completedCount += 1
+			self.ReportResult(callId, False, task.result())
+
+	def ReportResult(self, callId, isError, value):
+		self.reportResult(self.workerId, callId, isError, value, len(self.loop.ready))
+
+"""
+A copy of one worker's counters and loop histograms (None if its loop does
+not keep any), taken on the worker's loop thread.
+"""
+class WorkerMetrics:
+	def __init__(self, workerId, completedCount, failedCount, histograms):
+		self.workerId = workerId
+		self.completedCount = completedCount
+		self.failedCount = failedCount
+		self.histograms = histograms
+
+async def GetWorkerMetricsAsync():
+	worker = current.worker
+	histograms = getattr(worker.loop, 'histograms', None)
+	if histograms is not None:
+		copy = LoopHistograms(histograms.queueDelay.significantBits)
+		copy.Merge(histograms)
+		histograms = copy
+	return WorkerMetrics(
+		worker.workerId,
+		worker.completedCount,
+		worker.failedCount,
+		histograms
+	)
+
+# A worker thread in the runtime's process (the loops share the GIL)
+class ThreadLoopWorker:
+	def __init__(self, workerId, loopFactory, reportResult):
+		self.workerId = workerId
+		self.workerLoop = WorkerLoop(workerId, loopFactory, reportResult)
+		self.thread = threading.Thread(
+			target=self.workerLoop.Run,
+			name=f"LoopWorker {workerId}",
+			daemon=True
+		)
+		# Updated by the runtime under its lock
+		self.inFlightCount = 0
+		self.queueLength = 0
+
+	def Start(self):
+		self.thread.start()
+
+	def Submit(self, callId, factory, args):
+		self.workerLoop.Submit(callId, factory, args)
+
+	def Stop(self):
+		self.workerLoop.Stop()
+
+	def Join(self):
+		self.thread.join()
+
+"""
+A worker process.  Calls are sent to it through its own inbox and it sends
+its results back through its own pipe (results), followed by a callId of
+None once it has stopped.  The coroutine factories, their arguments and
+their results must be picklable (and importable by the worker when
+processes are spawned instead of forked).
+"""
+class ProcessLoopWorker:
+	def __init__(self, workerId, loopFactory, context):
+		self.workerId = workerId
+		self.inbox = context.SimpleQueue()
+		self.results, self.outbox = context.Pipe(duplex=False)
+		self.process = context.Process(
+			target=RunProcessWorker,
+			args=(workerId, loopFactory, self.inbox, self.outbox),
+			name=f"LoopWorker {workerId}",
+			daemon=True
+		)
+		self.inFlightCount = 0
+		self.queueLength = 0
+
+	def Start(self):
+		self.process.start()
+		# Only the worker writes to the pipe, so reading it fails once the
+		# worker is gone
+		self.outbox.close()
+
+	def Submit(self, callId, factory, args):
+		self.inbox.put((callId, factory, args))
+
+	def Stop(self):
+		self.inbox.put(None)
+
+	def Join(self):
+		self.process.join()
+
+def RunProcessWorker(workerId, loopFactory, inbox, outbox):
+	def ReportResult(workerId, callId, isError, value, queueLength):
+		try:
+			outbox.send((workerId, callId, isError, value, queueLength))
+		except Exception as exception:
+			error = RuntimeError(f"The result could not be sent back: {exception!r}")
+			outbox.send((workerId, callId, True, error, queueLength))
+
+	workerLoop = WorkerLoop(workerId, loopFactory, ReportResult)
+	reader = threading.Thread(
+		target=ReadInbox,
+		args=(workerLoop, inbox),
+		name="LoopWorker inbox",
+		daemon=True
+	)
+	reader.start()
+	workerLoop.Run()
+	outbox.send((workerId, None, False, None, 0))
+
+def ReadInbox(workerLoop, inbox):
+	while (message := inbox.get()) is not None:
+		workerLoop.Submit(*message)
+	workerLoop.Stop()
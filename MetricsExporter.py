@@ -0,0 +1,162 @@
+import abc
+import json
+import queue
+import sys
+import threading
+from array import array
+
+"""
+Streams finished task/step/idle records to a file while the loop runs.  The
+loop thread only appends six integers per record to the current batch (an
+array('q')).  Full batches, and the partial batch whenever the loop is about
+to go idle, are handed to a writer thread that formats and writes them, so
+file I/O never happens inside run_once.  The file is opened when the
+exporter is created, so a bad path fails right away.  If writing fails the
+writer thread keeps taking the batches off the queue and counts their
+records as dropped (droppedCount), and Close raises the error.
+
+Every record is (kind, a, b, c, d, e):
+	task: taskRecord, taskId, parentTaskId, createdAt, finishedAt, 0
+	step: stepRecord, taskId, stepId, createdAt, startedAt, finishedAt
+	idle: idleRecord, startedAt, finishedAt, 0, 0, 0
+"""
+class MetricsExporter(abc.ABC):
+	taskRecord = 0
+	stepRecord = 1
+	idleRecord = 2
+	fieldCount = 6
+
+	def __init__(self, path, batchSize=4096):
+		self.path = path
+		self.file = open(path, 'wb')
+		self.batchLength = batchSize * self.fieldCount
+		self.batch = array('q')
+		self.batches = queue.SimpleQueue()
+		self.exportedCount = 0
+		# Only updated by the writer thread
+		self.droppedCount = 0
+		self.error = None
+		self.isClosed = False
+		self.writer = threading.Thread(
+			target=self.WriteBatches,
+			name="MetricsExporter",
+			daemon=True
+		)
+		self.writer.start()
+
+	def ExportTask(self, taskId, parentTaskId, createdAt, finishedAt):
+		batch = self.batch
+		batch.append(self.taskRecord)
+		batch.append(taskId)
+		batch.append(parentTaskId)
+		batch.append(createdAt)
+		batch.append(finishedAt)
+		batch.append(0)
+		if len(batch) >= self.batchLength:
+			self.Flush()
+
+	def ExportStep(self, taskId, stepId, createdAt, startedAt, finishedAt):
+		batch = self.batch
+		batch.append(self.stepRecord)
+		batch.append(taskId)
+		batch.append(stepId)
+		batch.append(createdAt)
+		batch.append(startedAt)
+		batch.append(finishedAt)
+		if len(batch) >= self.batchLength:
+			self.Flush()
+
+	def ExportIdle(self, startedAt, finishedAt):
+		batch = self.batch
+		batch.append(self.idleRecord)
+		batch.append(startedAt)
+		batch.append(finishedAt)
+		batch.append(0)
+		batch.append(0)
+		batch.append(0)
+		if len(batch) >= self.batchLength:
+			self.Flush()
+
+	# Hand the current batch to the writer thread
+	def Flush(self):
+		if not self.batch:
+			return
+		self.exportedCount += len(self.batch) // self.fieldCount
+		self.batches.put(self.batch)
+		self.batch = array('q')
+
+	# Flush and wait for the writer thread to finish writing everything
+	def Close(self):
+		if self.isClosed:
+			return
+		self.isClosed = True
+		self.Flush()
+		self.batches.put(None)
+		self.writer.join()
+		if self.error is not None:
+			raise self.error
+
+	def WriteBatches(self):
+		batch = array('q')
+		with self.file as file:
+			try:
+				self.WriteHeader(file)
+				while (batch := self.batches.get()) is not None:
+					self.WriteBatch(file, batch)
+					file.flush()
+				return
+			except Exception as exception:
+				self.error = exception
+		# The batch that failed and every batch after it
+		self.droppedCount += len(batch) // self.fieldCount
+		while (batch := self.batches.get()) is not None:
+			self.droppedCount += len(batch) // self.fieldCount
+
+	def WriteHeader(self, file):
+		pass
+
+	@abc.abstractmethod
+	def WriteBatch(self, file, batch):
+		pass
+
+# One JSON object per line
+class NdjsonMetricsExporter(MetricsExporter):
+	def WriteBatch(self, file, batch):
+		lines = []
+		for index in range(0, len(batch), self.fieldCount):
+			record = GetRecordDict(*batch[index:index + self.fieldCount])
+			lines.append(json.dumps(record, separators=(',', ':')))
+		lines.append('')
+		file.write('\n'.join(lines).encode())
+
+def GetRecordDict(kind, a, b, c, d, e):
+	if kind == MetricsExporter.stepRecord:
+		return {
+			'type': 'step',
+			'taskId': a,
+			'stepId': b,
+			'createdAt': c,
+			'startedAt': d,
+			'finishedAt': e
+		}
+	if kind == MetricsExporter.taskRecord:
+		return {
+			'type': 'task',
+			'taskId': a,
+			'parentTaskId': None if b < 0 else b,
+			'createdAt': c,
+			'finishedAt': d
+		}
+	return {'type': 'idle', 'startedAt': a, 'finishedAt': b}
+
+# Fixed-width records of six little/big endian int64 values (48 bytes) after
+# an 8 byte magic and a byte order marker.
+class BinaryMetricsExporter(MetricsExporter):
+	magic = b'LOOPMET1'
+
+	def WriteHeader(self, file):
+		file.write(self.magic)
+		file.write(b'L' if sys.byteorder == 'little' else b'B')
+
+	def WriteBatch(self, file, batch):
+		file.write(batch.tobytes())
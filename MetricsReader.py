@@ -0,0 +1,78 @@
+import json
+import sys
+from array import array
+from MetricsExporter import BinaryMetricsExporter, MetricsExporter, GetRecordDict
+from MetricsRecorder import MetricsSnapshot
+
+"""
+Replays a file written by the BinaryMetricsExporter.  ReadRecords streams the
+(kind, a, b, c, d, e) records without loading the whole file and LoadSnapshot
+rebuilds a MetricsSnapshot (for the usual Print output).  A partial record at
+the end of the file (the process died mid-write) is ignored.
+"""
+usage = "python MetricsReader.py metrics.bin [--ndjson | --summary]"
+
+def ReadRecords(path, batchSize=4096):
+	fieldCount = MetricsExporter.fieldCount
+	recordSize = fieldCount * 8
+	with open(path, 'rb') as file:
+		magic = file.read(len(BinaryMetricsExporter.magic))
+		if magic != BinaryMetricsExporter.magic:
+			raise ValueError(f"{path} is not a binary metrics file")
+		byteOrder = 'little' if file.read(1) == b'L' else 'big'
+		while chunk := file.read(recordSize * batchSize):
+			records = array('q')
+			records.frombytes(chunk[:len(chunk) - len(chunk) % recordSize])
+			if byteOrder != sys.byteorder:
+				records.byteswap()
+			for index in range(0, len(records), fieldCount):
+				yield tuple(records[index:index + fieldCount])
+
+def LoadSnapshot(path):
+	columns = [array('q') for _ in range(11)]
+	taskColumns, stepColumns, idleColumns = columns[0:4], columns[4:9], columns[9:11]
+	for kind, a, b, c, d, e in ReadRecords(path):
+		if kind == MetricsExporter.stepRecord:
+			values = (a, b, c, d, e)
+			target = stepColumns
+		elif kind == MetricsExporter.taskRecord:
+			values = (a, b, c, d)
+			target = taskColumns
+		else:
+			values = (a, b)
+			target = idleColumns
+		for column, value in zip(target, values):
+			column.append(value)
+	return MetricsSnapshot(*columns)
+
+def PrintSummary(path):
+	counts = [0, 0, 0]
+	stepNs = 0
+	for kind, a, b, c, d, e in ReadRecords(path):
+		counts[kind] += 1
+		if kind == MetricsExporter.stepRecord:
+			stepNs += e - d
+	print(f"tasks={counts[MetricsExporter.taskRecord]}, " \
+		f"steps={counts[MetricsExporter.stepRecord]}, " \
+		f"idles={counts[MetricsExporter.idleRecord]}, " \
+		f"step time={stepNs}ns")
+
+def PrintNdjson(path):
+	for record in ReadRecords(path):
+		print(json.dumps(GetRecordDict(*record), separators=(',', ':')))
+
+def Main(args):
+	if not args:
+		print(usage)
+		return 1
+	path = args[0]
+	if '--summary' in args:
+		PrintSummary(path)
+	elif '--ndjson' in args:
+		PrintNdjson(path)
+	else:
+		LoadSnapshot(path).Print()
+	return 0
+
+if __name__ == '__main__':
+	sys.exit(Main(sys.argv[1:]))
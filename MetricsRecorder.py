@@ -0,0 +1,455 @@
+from array import array
+from MetricsExporter import MetricsExporter
+
+"""
+Task, step and idle metrics stored in columns of 64 bit integers (one
+array('q') per field) instead of one Python object per record.  Appending a
+step is five integer appends into arrays that grow as needed, so millions of
+steps do not create millions of objects for the garbage collector to track.
+
+Task ids are handed out densely from 0 so the task columns are indexed by the
+task id.  Steps are appended when they finish (the in-flight values live on
+the step handle).  A parent id of -1 means the task has no parent and a
+finished time of -1 means the task is still running.
+
+Finished records are also passed to the exporter (if there is one) to be
+streamed to a file.  Snapshot copies the columns into a MetricsSnapshot whose
+TaskMetrics/StepMetrics/IdleMetrics views have the same fields and Print
+output as the test-009.py objects.
+"""
+class MetricsRecorder:
+	def __init__(self, exporter=None):
+		self.exporter = exporter
+		self.taskParentIds = array('q')
+		self.taskCreatedAt = array('q')
+		self.taskFinishedAt = array('q')
+		self.taskNextStepIds = array('q')
+		self.stepTaskIds = array('q')
+		self.stepIds = array('q')
+		self.stepCreatedAt = array('q')
+		self.stepStartedAt = array('q')
+		self.stepFinishedAt = array('q')
+		self.idleStartedAt = array('q')
+		self.idleFinishedAt = array('q')
+
+	def CreateTask(self, parentTaskId, createdAt):
+		taskId = len(self.taskCreatedAt)
+		self.taskParentIds.append(-1 if parentTaskId is None else parentTaskId)
+		self.taskCreatedAt.append(createdAt)
+		self.taskFinishedAt.append(-1)
+		self.taskNextStepIds.append(0)
+		return taskId
+
+	def FinishTask(self, taskId, finishedAt):
+		self.taskFinishedAt[taskId] = finishedAt
+		if self.exporter is not None:
+			self.exporter.ExportTask(
+				taskId,
+				self.taskParentIds[taskId],
+				self.taskCreatedAt[taskId],
+				finishedAt
+			)
+
+	def CreateStep(self, taskId):
+		stepId = self.taskNextStepIds[taskId]
+		self.taskNextStepIds[taskId] = stepId + 1
+		return stepId
+
+	def RecordStep(self, taskId, stepId, createdAt, startedAt, finishedAt):
+		self.stepTaskIds.append(taskId)
+		self.stepIds.append(stepId)
+		self.stepCreatedAt.append(createdAt)
+		self.stepStartedAt.append(startedAt)
+		self.stepFinishedAt.append(finishedAt)
+		if self.exporter is not None:
+			self.exporter.ExportStep(taskId, stepId, createdAt, startedAt, finishedAt)
+
+	def RecordIdle(self, startedAt, finishedAt):
+		self.idleStartedAt.append(startedAt)
+		self.idleFinishedAt.append(finishedAt)
+		if self.exporter is not None:
+			self.exporter.ExportIdle(startedAt, finishedAt)
+
+	def Flush(self):
+		if self.exporter is not None:
+			self.exporter.Flush()
+
+	def Close(self):
+		if self.exporter is not None:
+			self.exporter.Close()
+
+	def GetTaskCount(self):
+		return len(self.taskCreatedAt)
+
+	def GetStepCount(self):
+		return len(self.stepIds)
+
+	def GetIdleCount(self):
+		return len(self.idleStartedAt)
+
+	def GetMemoryBytes(self):
+		return GetColumnBytes(self)
+
+	def Snapshot(self):
+		return MetricsSnapshot(
+			array('q', range(self.GetTaskCount())),
+			self.taskParentIds[:],
+			self.taskCreatedAt[:],
+			self.taskFinishedAt[:],
+			self.stepTaskIds[:],
+			self.stepIds[:],
+			self.stepCreatedAt[:],
+			self.stepStartedAt[:],
+			self.stepFinishedAt[:],
+			self.idleStartedAt[:],
+			self.idleFinishedAt[:]
+		)
+
+	def Print(self):
+		self.Snapshot().Print()
+
+"""
+The same columns in fixed-capacity ring buffers for loops that run for days.
+Once a ring is full the oldest record is overwritten and counted as dropped.
+Tasks only enter the task ring when they finish: running tasks are pinned in
+a dict (so their parent/created values are never evicted) and the memory used
+stays flat no matter how many tasks and steps have run.
+
+Task ids still increase forever but are no longer column indexes.  A step
+scheduled for a task after it has already finished gets a step id of -1.
+"""
+class RingMetricsRecorder:
+	def __init__(
+		self,
+		capacity=65536,
+		taskCapacity=None,
+		idleCapacity=None,
+		exporter=None
+	):
+		self.exporter = exporter
+		self.tasks = RingColumns(
+			taskCapacity or capacity,
+			'taskIds',
+			'taskParentIds',
+			'taskCreatedAt',
+			'taskFinishedAt'
+		)
+		self.steps = RingColumns(
+			capacity,
+			'stepTaskIds',
+			'stepIds',
+			'stepCreatedAt',
+			'stepStartedAt',
+			'stepFinishedAt'
+		)
+		self.idles = RingColumns(
+			idleCapacity or capacity,
+			'idleStartedAt',
+			'idleFinishedAt'
+		)
+		self.nextTaskId = 0
+		# taskId: [parentTaskId, createdAt, nextStepId]
+		self.activeTasks = {}
+
+	@property
+	def droppedTasks(self):
+		return self.tasks.GetDropped()
+
+	@property
+	def droppedSteps(self):
+		return self.steps.GetDropped()
+
+	@property
+	def droppedIdles(self):
+		return self.idles.GetDropped()
+
+	def CreateTask(self, parentTaskId, createdAt):
+		taskId = self.nextTaskId
+		self.nextTaskId += 1
+		self.activeTasks[taskId] = [
+			-1 if parentTaskId is None else parentTaskId,
+			createdAt,
+			0
+		]
+		return taskId
+
+	def FinishTask(self, taskId, finishedAt):
+		parentTaskId, createdAt, _ = self.activeTasks.pop(taskId)
+		self.tasks.Append(taskId, parentTaskId, createdAt, finishedAt)
+		if self.exporter is not None:
+			self.exporter.ExportTask(taskId, parentTaskId, createdAt, finishedAt)
+
+	def CreateStep(self, taskId):
+		task = self.activeTasks.get(taskId)
+		if task is None:
+			return -1
+		stepId = task[2]
+		task[2] = stepId + 1
+		return stepId
+
+	def RecordStep(self, taskId, stepId, createdAt, startedAt, finishedAt):
+		self.steps.Append(taskId, stepId, createdAt, startedAt, finishedAt)
+		if self.exporter is not None:
+			self.exporter.ExportStep(taskId, stepId, createdAt, startedAt, finishedAt)
+
+	def RecordIdle(self, startedAt, finishedAt):
+		self.idles.Append(startedAt, finishedAt)
+		if self.exporter is not None:
+			self.exporter.ExportIdle(startedAt, finishedAt)
+
+	def Flush(self):
+		if self.exporter is not None:
+			self.exporter.Flush()
+
+	def Close(self):
+		if self.exporter is not None:
+			self.exporter.Close()
+
+	def GetTaskCount(self):
+		return self.nextTaskId
+
+	def GetStepCount(self):
+		return self.steps.count
+
+	def GetIdleCount(self):
+		return self.idles.count
+
+	def GetMemoryBytes(self):
+		return GetColumnBytes(self.tasks) + \
+			GetColumnBytes(self.steps) + \
+			GetColumnBytes(self.idles)
+
+	# The retained window (oldest first) followed by the running tasks.  This
+	# only copies the columns so it can be called from a running loop.
+	def Snapshot(self):
+		taskIds, taskParentIds, taskCreatedAt, taskFinishedAt = self.tasks.GetWindow()
+		for taskId, (parentTaskId, createdAt, _) in self.activeTasks.items():
+			taskIds.append(taskId)
+			taskParentIds.append(parentTaskId)
+			taskCreatedAt.append(createdAt)
+			taskFinishedAt.append(-1)
+		return MetricsSnapshot(
+			taskIds,
+			taskParentIds,
+			taskCreatedAt,
+			taskFinishedAt,
+			*self.steps.GetWindow(),
+			*self.idles.GetWindow(),
+			droppedTasks=self.droppedTasks,
+			droppedSteps=self.droppedSteps,
+			droppedIdles=self.droppedIdles
+		)
+
+	def Print(self):
+		self.Snapshot().Print()
+
+# A set of preallocated columns written round robin
+class RingColumns:
+	def __init__(self, capacity, *names):
+		self.capacity = capacity
+		self.count = 0
+		self.names = names
+		for name in names:
+			setattr(self, name, array('q', bytes(8 * capacity)))
+		self.columns = [getattr(self, name) for name in names]
+
+	def GetDropped(self):
+		return max(0, self.count - self.capacity)
+
+	def Append(self, *values):
+		index = self.count % self.capacity
+		for column, value in zip(self.columns, values):
+			column[index] = value
+		self.count += 1
+
+	# Copies of the columns, oldest record first
+	def GetWindow(self):
+		if self.count <= self.capacity:
+			return [column[:self.count] for column in self.columns]
+		index = self.count % self.capacity
+		return [column[index:] + column[:index] for column in self.columns]
+
+def GetColumnBytes(owner):
+	return sum(
+		column.buffer_info()[1] * column.itemsize
+		for column in vars(owner).values()
+		if isinstance(column, array)
+	)
+
+class MetricsSnapshot:
+	def __init__(
+		self,
+		taskIds,
+		taskParentIds,
+		taskCreatedAt,
+		taskFinishedAt,
+		stepTaskIds,
+		stepIds,
+		stepCreatedAt,
+		stepStartedAt,
+		stepFinishedAt,
+		idleStartedAt,
+		idleFinishedAt,
+		droppedTasks=0,
+		droppedSteps=0,
+		droppedIdles=0
+	):
+		self.taskIds = taskIds
+		self.taskParentIds = taskParentIds
+		self.taskCreatedAt = taskCreatedAt
+		self.taskFinishedAt = taskFinishedAt
+		self.stepTaskIds = stepTaskIds
+		self.stepIds = stepIds
+		self.stepCreatedAt = stepCreatedAt
+		self.stepStartedAt = stepStartedAt
+		self.stepFinishedAt = stepFinishedAt
+		self.idleStartedAt = idleStartedAt
+		self.idleFinishedAt = idleFinishedAt
+		self.droppedTasks = droppedTasks
+		self.droppedSteps = droppedSteps
+		self.droppedIdles = droppedIdles
+
+	# Tasks in task id order with the rows of their steps in step id order
+	def GetTasks(self):
+		rowsByTask = {taskId: [] for taskId in sorted(self.taskIds)}
+		for row, taskId in enumerate(self.stepTaskIds):
+			rows = rowsByTask.get(taskId)
+			if rows is not None:
+				rows.append(row)
+		stepIds = self.stepIds
+		taskRows = {taskId: row for row, taskId in enumerate(self.taskIds)}
+		tasks = []
+		for taskId, rows in rowsByTask.items():
+			rows.sort(key=lambda row: stepIds[row])
+			tasks.append(TaskMetrics(self, taskRows[taskId], rows))
+		return tasks
+
+	def GetIdles(self):
+		return [IdleMetrics(self, row) for row in range(len(self.idleStartedAt))]
+
+	# The same (kind, a, b, c, d, e) records that the exporters write
+	def GetRecords(self):
+		for row in range(len(self.taskIds)):
+			yield (
+				MetricsExporter.taskRecord,
+				self.taskIds[row],
+				self.taskParentIds[row],
+				self.taskCreatedAt[row],
+				self.taskFinishedAt[row],
+				0
+			)
+		for row in range(len(self.stepIds)):
+			yield (
+				MetricsExporter.stepRecord,
+				self.stepTaskIds[row],
+				self.stepIds[row],
+				self.stepCreatedAt[row],
+				self.stepStartedAt[row],
+				self.stepFinishedAt[row]
+			)
+		for row in range(len(self.idleStartedAt)):
+			yield (
+				MetricsExporter.idleRecord,
+				self.idleStartedAt[row],
+				self.idleFinishedAt[row],
+				0,
+				0,
+				0
+			)
+
+	def Print(self):
+		for task in self.GetTasks():
+			task.Print()
+		if not self.idleStartedAt:
+			print("Loop was never idle")
+		else:
+			for idle in self.GetIdles():
+				idle.Print()
+		if self.droppedTasks or self.droppedSteps or self.droppedIdles:
+			print(f"dropped tasks={self.droppedTasks}, " \
+				f"steps={self.droppedSteps}, " \
+				f"idles={self.droppedIdles}")
+
+class IdleMetrics:
+	__slots__ = ('snapshot', 'row')
+
+	def __init__(self, snapshot, row):
+		self.snapshot = snapshot
+		self.row = row
+
+	@property
+	def startedAt(self):
+		return self.snapshot.idleStartedAt[self.row]
+
+	@property
+	def finishedAt(self):
+		return self.snapshot.idleFinishedAt[self.row]
+
+	def Print(self):
+		print(f"idle from {self.startedAt} to {self.finishedAt}")
+
+class StepMetrics:
+	__slots__ = ('snapshot', 'row')
+
+	def __init__(self, snapshot, row):
+		self.snapshot = snapshot
+		self.row = row
+
+	@property
+	def stepId(self):
+		return self.snapshot.stepIds[self.row]
+
+	@property
+	def createdAt(self):
+		return self.snapshot.stepCreatedAt[self.row]
+
+	@property
+	def startedAt(self):
+		return self.snapshot.stepStartedAt[self.row]
+
+	@property
+	def finishedAt(self):
+		return self.snapshot.stepFinishedAt[self.row]
+
+	def Print(self):
+		print(f"  stepId={self.stepId}, " \
+			f"createdAt={self.createdAt}, " \
+			f"startedAt={self.startedAt}, " \
+			f"finishedAt={self.finishedAt}")
+
+class TaskMetrics:
+	__slots__ = ('snapshot', 'row', 'stepRows')
+
+	def __init__(self, snapshot, row, stepRows):
+		self.snapshot = snapshot
+		self.row = row
+		self.stepRows = stepRows
+
+	@property
+	def taskId(self):
+		return self.snapshot.taskIds[self.row]
+
+	@property
+	def parentTaskId(self):
+		parentTaskId = self.snapshot.taskParentIds[self.row]
+		return None if parentTaskId < 0 else parentTaskId
+
+	@property
+	def createdAt(self):
+		return self.snapshot.taskCreatedAt[self.row]
+
+	@property
+	def finishedAt(self):
+		finishedAt = self.snapshot.taskFinishedAt[self.row]
+		return None if finishedAt < 0 else finishedAt
+
+	@property
+	def steps(self):
+		return [StepMetrics(self.snapshot, row) for row in self.stepRows]
+
+	def Print(self):
+		print(f"taskId={self.taskId}, " \
+			f"parent={self.parentTaskId}, " \
+			f"createdAt={self.createdAt}")
+		for step in self.steps:
+			step.Print()
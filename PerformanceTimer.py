@@ -33,14 +33,16 @@ class PerformanceTimer:
 	def __repr__(self):
 		if self.start is None:
 			return "Timer not started"
-		durationNs = self.GetDurationNs()
-		if durationNs < 1000:
-			return f"{durationNs}ns"
-		durationUs = durationNs / 1000
-		if durationUs < 1000:
-			return f"{durationUs:.2f}us"
-		durationMs = durationUs / 1000
-		if durationMs < 1000:
-			return f"{durationMs:.2f}ms"
-		durationS = durationMs / 1000
-		return f"{durationS:.2f}s"
+		return FormatDurationNs(self.GetDurationNs())
+
+def FormatDurationNs(durationNs):
+	if durationNs < 1000:
+		return f"{durationNs}ns"
+	durationUs = durationNs / 1000
+	if durationUs < 1000:
+		return f"{durationUs:.2f}us"
+	durationMs = durationUs / 1000
+	if durationMs < 1000:
+		return f"{durationMs:.2f}ms"
+	durationS = durationMs / 1000
+	return f"{durationS:.2f}s"
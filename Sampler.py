@@ -0,0 +1,31 @@
+import time
+
+"""
+Decides, as each task is created, whether the InstrumentedEventLoop records
+it in full.  CountSampler samples every Nth task and TimeSampler samples at
+most one task per interval (the first task created once the interval has
+passed), so the sampled share drops as the load goes up.
+"""
+class CountSampler:
+	def __init__(self, every):
+		self.every = every
+		self.count = 0
+
+	def IsSampled(self):
+		self.count += 1
+		if self.count >= self.every:
+			self.count = 0
+			return True
+		return False
+
+class TimeSampler:
+	def __init__(self, interval):
+		self.intervalNs = int(interval * 1e9)
+		self.nextSampleAt = 0
+
+	def IsSampled(self):
+		now = time.perf_counter_ns()
+		if now < self.nextSampleAt:
+			return False
+		self.nextSampleAt = now + self.intervalNs
+		return True
@@ -0,0 +1,391 @@
+import asyncio
+import bisect
+import collections
+import contextvars
+import heapq
+import math
+import time
+from LogHistogram import LogHistogram
+from PerformanceTimer import FormatDurationNs
+from SlowStep import GetHandleTask
+
+"""
+Ready queue policies for the CustomEventLoop.  A ready queue is anything with
+the deque methods the loop uses (append, extend, popleft and __len__): the
+loop appends handles as they become ready and every tick pops as many as were
+queued at its start.  A policy only changes the order they come out in.  If
+the queue has a FinishBatch method the loop calls it after every tick's batch.
+
+The priority, fair share group and deadline of a handle come from the context
+it runs in, so they are set per task (with the loop's create_task or with
+CreateTask) and inherited by every callback and child task scheduled from it.
+"""
+# Lower runs first, 0 when not set
+priorityVar = contextvars.ContextVar('priority')
+# None in the context of a root task (created outside of any task)
+shareGroupVar = contextvars.ContextVar('shareGroup')
+# Absolute loop.time() by which the task should be done
+deadlineVar = contextvars.ContextVar('deadline')
+# TaskBudget shared by a task and everything it schedules
+budgetVar = contextvars.ContextVar('budget')
+
+# Top-level unit of work that a FairShareScheduler shares the loop between
+class ShareGroup:
+	__slots__ = ('weight', 'stride', 'passValue', 'handles')
+
+	def __init__(self, weight=1):
+		self.weight = weight
+		self.stride = 1 / weight
+		self.passValue = 0.0
+		self.handles = collections.deque()
+
+"""
+Sets the priority, fair share group and deadline (absolute loop.time(), never
+later than the inherited one) of a new task in the context it will run in (a
+copy of the current context if None).  A task created outside of any
+task is a root task (like the main task of asyncio.run) and has no group.
+The tasks a root task creates are the top-level tasks: each of them gets a
+new group, and the tasks they create share it.  A weight always starts a new
+group with that weight.  The loop's create_task only calls this when it is
+given a priority, weight or deadline or when its ready queue isGroupingTasks, so other
+queues do not pay for a group per task.
+"""
+def ScheduleTask(context, priority=None, weight=None, deadline=None):
+	if context is None:
+		context = contextvars.copy_context()
+	if priority is not None:
+		context.run(priorityVar.set, priority)
+	if deadline is not None:
+		inherited = context.get(deadlineVar, None)
+		if inherited is None or deadline < inherited:
+			context.run(deadlineVar.set, deadline)
+	if weight is not None:
+		context.run(shareGroupVar.set, ShareGroup(weight))
+	elif shareGroupVar not in context:
+		context.run(shareGroupVar.set, None)
+	elif context[shareGroupVar] is None:
+		context.run(shareGroupVar.set, ShareGroup())
+	return context
+
+# Creates a task with the given priority and fair share weight (see
+# ScheduleTask), with a deadline timeout seconds from now and/or with a CPU
+# budget (seconds per window seconds).  Child tasks inherit all of them, and a
+# task never gets a later deadline than the one it inherited.
+def CreateTask(
+	coro,
+	*,
+	priority=None,
+	weight=None,
+	timeout=None,
+	budget=None,
+	window=0.1,
+	name=None
+):
+	loop = asyncio.get_running_loop()
+	context = contextvars.copy_context()
+	if budget is not None:
+		context.run(budgetVar.set, TaskBudget(budget, window, name))
+	return loop.create_task(
+		coro,
+		name=name,
+		context=context,
+		priority=priority,
+		weight=weight,
+		deadline=None if timeout is None else loop.time() + timeout
+	)
+
+# The ready queue the loop has always had
+class FifoScheduler(collections.deque):
+	pass
+
+# Strict priority: a handle only runs when no handle with a lower priority
+# value is ready.  Equal priorities are FIFO.
+class PriorityScheduler:
+	def __init__(self):
+		# priority: deque of handles
+		self.queues = {}
+		# Sorted priorities that have a queue
+		self.priorities = []
+		self.count = 0
+
+	def append(self, handle):
+		context = handle._context
+		priority = 0 if context is None else context.get(priorityVar, 0)
+		queue = self.queues.get(priority)
+		if queue is None:
+			queue = self.queues[priority] = collections.deque()
+			bisect.insort(self.priorities, priority)
+		queue.append(handle)
+		self.count += 1
+
+	def extend(self, handles):
+		for handle in handles:
+			self.append(handle)
+
+	def popleft(self):
+		if not self.count:
+			raise IndexError("pop from an empty PriorityScheduler")
+		for priority in self.priorities:
+			queue = self.queues[priority]
+			if queue:
+				self.count -= 1
+				return queue.popleft()
+
+	def __len__(self):
+		return self.count
+
+"""
+Weighted fair queuing between share groups (stride scheduling): every group
+with ready handles has a pass value that advances by 1/weight for each handle
+it runs and the group with the lowest pass runs next.  A group that was idle
+restarts at the current virtual time so it cannot bank credit.  Every
+top-level task is a group of its own (see ScheduleTask) and the handles that
+belong to no group (root tasks and callbacks scheduled outside of any task)
+share the default group.  Fairness is by handle count, not by the CPU each
+step takes.
+"""
+class FairShareScheduler:
+	isGroupingTasks = True
+
+	def __init__(self):
+		self.defaultGroup = ShareGroup()
+		# (passValue, sequence, group) for every group with ready handles
+		self.activeGroups = []
+		self.sequence = 0
+		self.virtualTime = 0.0
+		self.count = 0
+
+	def append(self, handle):
+		context = handle._context
+		group = None if context is None else context.get(shareGroupVar, None)
+		if group is None:
+			group = self.defaultGroup
+		if not group.handles:
+			if group.passValue < self.virtualTime:
+				group.passValue = self.virtualTime
+			self.sequence += 1
+			heapq.heappush(self.activeGroups, (group.passValue, self.sequence, group))
+		group.handles.append(handle)
+		self.count += 1
+
+	def extend(self, handles):
+		for handle in handles:
+			self.append(handle)
+
+	def popleft(self):
+		if not self.count:
+			raise IndexError("pop from an empty FairShareScheduler")
+		passValue, _, group = heapq.heappop(self.activeGroups)
+		self.virtualTime = passValue
+		handle = group.handles.popleft()
+		group.passValue = passValue + group.stride
+		if group.handles:
+			self.sequence += 1
+			heapq.heappush(self.activeGroups, (group.passValue, self.sequence, group))
+		self.count -= 1
+		return handle
+
+	def __len__(self):
+		return self.count
+
+"""
+Earliest deadline first: handles run in the order of their task's deadline
+and handles without a deadline run after them (FIFO).  A step that starts
+after its deadline is a miss and its lateness is recorded.  With shed=True a
+task that has missed its deadline is cancelled instead, so the step that was
+about to run raises CancelledError into the task rather than doing more work
+that is already too late.  Every miss is also passed to the loop's
+RecordDeadlineMiss, which the InstrumentedEventLoop adds to its TaskStatistics
+and LoopHistograms.
+"""
+class EdfScheduler:
+	def __init__(self, shed=False):
+		self.shed = shed
+		# (deadline, sequence, handle)
+		self.handles = []
+		self.sequence = 0
+		self.missedSteps = 0
+		self.shedTasks = 0
+		self.lateness = LogHistogram()
+
+	def append(self, handle):
+		context = handle._context
+		deadline = math.inf if context is None else context.get(deadlineVar, math.inf)
+		self.sequence += 1
+		heapq.heappush(self.handles, (deadline, self.sequence, handle))
+
+	def extend(self, handles):
+		for handle in handles:
+			self.append(handle)
+
+	def popleft(self):
+		deadline, _, handle = heapq.heappop(self.handles)
+		if deadline != math.inf:
+			now = time.monotonic()
+			if now > deadline:
+				self.Miss(handle, now - deadline)
+		return handle
+
+	def Miss(self, handle, lateness):
+		latenessNs = int(lateness * 1e9)
+		self.missedSteps += 1
+		self.lateness.Record(latenessNs)
+		isShed = False
+		if self.shed:
+			task = GetHandleTask(handle)
+			if task is not None and not task.done() and not task.cancelling():
+				task.cancel("deadline missed")
+				self.shedTasks += 1
+				isShed = True
+		handle._loop.RecordDeadlineMiss(handle, latenessNs, isShed)
+
+	def __len__(self):
+		return len(self.handles)
+
+	def Print(self):
+		print(f"missed steps={self.missedSteps}, shed tasks={self.shedTasks}")
+		self.lateness.Print("lateness")
+
+"""
+CPU time a task (with its callbacks and child tasks) may use per window.  The
+BudgetScheduler charges it for every step and marks it exhausted once it has
+used more than its budget, until the window is over.
+"""
+class TaskBudget:
+	__slots__ = (
+		'name',
+		'budgetNs',
+		'windowNs',
+		'windowStartedAt',
+		'usedNs',
+		'stepStartedAt',
+		'isExhausted',
+		'exhaustedCount',
+		'usedTotalNs'
+	)
+
+	def __init__(self, budget, window, name=None):
+		self.name = name
+		self.budgetNs = int(budget * 1e9)
+		self.windowNs = int(window * 1e9)
+		self.windowStartedAt = 0
+		self.usedNs = 0
+		self.stepStartedAt = 0
+		self.isExhausted = False
+		self.exhaustedCount = 0
+		self.usedTotalNs = 0
+
+	def StartStep(self, now):
+		if now - self.windowStartedAt >= self.windowNs:
+			self.StartWindow(now)
+		self.stepStartedAt = now
+
+	def StartWindow(self, startedAt):
+		self.windowStartedAt = startedAt
+		self.usedNs = 0
+		self.isExhausted = False
+
+	# Returns True when this step used up the budget
+	def FinishStep(self, now):
+		durationNs = now - self.stepStartedAt
+		self.usedTotalNs += durationNs
+		windowEnd = self.windowStartedAt + self.windowNs
+		if now >= windowEnd:
+			# The window ran out during the step, only the rest counts in the
+			# next one
+			self.StartWindow(windowEnd)
+			durationNs = now - windowEnd
+		self.usedNs += durationNs
+		if self.isExhausted or self.usedNs <= self.budgetNs:
+			return False
+		self.isExhausted = True
+		self.exhaustedCount += 1
+		return True
+
+	def IsThrottled(self, now):
+		return self.isExhausted and now - self.windowStartedAt < self.windowNs
+
+	# Whether the step that is running now has used up the budget
+	def IsSpent(self, now):
+		windowEnd = self.windowStartedAt + self.windowNs
+		if now >= windowEnd:
+			return now - windowEnd > self.budgetNs
+		return self.usedNs + now - self.stepStartedAt > self.budgetNs
+
+def PrintExhausted(budget):
+	print(f"Task budget exhausted: {budget.name}, " \
+		f"used={FormatDurationNs(budget.usedNs)} of {FormatDurationNs(budget.budgetNs)} " \
+		f"per {FormatDurationNs(budget.windowNs)}")
+
+"""
+Deprioritizes tasks that have used up their TaskBudget.  Handles of throttled
+tasks wait in their own queue and only run when nothing else is ready (or as
+every throttledShare-th handle, so they are slowed down but never starved).
+Everything else goes through the inner policy (FIFO by default).
+
+A step is charged from the time it is popped until the next pop, or until the
+loop calls FinishBatch after running the batch of handles the step was in, so
+no wrapper around the coroutine is needed.
+"""
+class BudgetScheduler:
+	def __init__(self, inner=None, throttledShare=8, handler=PrintExhausted):
+		self.inner = collections.deque() if inner is None else inner
+		self.isGroupingTasks = getattr(self.inner, 'isGroupingTasks', False)
+		self.throttled = collections.deque()
+		self.throttledShare = throttledShare
+		self.handler = handler
+		self.popCount = 0
+		self.currentBudget = None
+
+	def append(self, handle):
+		context = handle._context
+		budget = None if context is None else context.get(budgetVar, None)
+		if budget is not None and budget.IsThrottled(time.perf_counter_ns()):
+			self.throttled.append(handle)
+		else:
+			self.inner.append(handle)
+
+	def extend(self, handles):
+		for handle in handles:
+			self.append(handle)
+
+	def popleft(self):
+		now = time.perf_counter_ns()
+		self.FinishStep(now)
+		self.popCount += 1
+		if self.throttled and (not self.inner or self.popCount % self.throttledShare == 0):
+			handle = self.throttled.popleft()
+		else:
+			handle = self.inner.popleft()
+		context = handle._context
+		budget = None if context is None else context.get(budgetVar, None)
+		if budget is not None:
+			budget.StartStep(now)
+			self.currentBudget = budget
+		return handle
+
+	def FinishStep(self, now):
+		budget = self.currentBudget
+		if budget is None:
+			return
+		self.currentBudget = None
+		if budget.FinishStep(now) and self.handler is not None:
+			self.handler(budget)
+
+	# Called by the loop after every batch
+	def FinishBatch(self):
+		self.FinishStep(time.perf_counter_ns())
+
+	def __len__(self):
+		return len(self.inner) + len(self.throttled)
+
+# Gives control back to the loop only if the current task has used up its
+# budget (a cheaper yield point than SuspendAlways for CPU heavy loops).
+# Tasks without a budget never yield here.
+class YieldIfExhausted:
+	__slots__ = ()
+
+	def __await__(self):
+		budget = budgetVar.get(None)
+		if budget is not None and budget.IsSpent(time.perf_counter_ns()):
+			yield
@@ -0,0 +1,55 @@
+import asyncio
+from PerformanceTimer import FormatDurationNs
+
+"""
+A step that ran for longer than the loop's slow step threshold.  It is only
+created when a step is slow, so the per-step cost of the detector is one
+comparison.  The task and its await chain are captured right after the step,
+while the task is suspended at the point where it gave control back.
+"""
+class SlowStep:
+	def __init__(self, taskId, stepId, startedAt, finishedAt, task):
+		self.taskId = taskId
+		self.stepId = stepId
+		self.startedAt = startedAt
+		self.finishedAt = finishedAt
+		self.task = task
+		self.taskName = None if task is None else task.get_name()
+		coro = None if task is None else task.get_coro()
+		self.coroName = getattr(coro, '__name__', None)
+		self.coroQualname = getattr(coro, '__qualname__', None)
+		self.awaitChain = GetAwaitChain(coro)
+
+	@property
+	def duration(self):
+		return self.finishedAt - self.startedAt
+
+	def Print(self):
+		print(f"Slow step: taskId={self.taskId}, stepId={self.stepId}, " \
+			f"duration={FormatDurationNs(self.duration)}, task={self.taskName}, " \
+			f"coro={self.coroName} ({self.coroQualname})")
+		for link in self.awaitChain:
+			print(f"  at {link}")
+
+# Follows cr_await (and gi_yieldfrom for generator based awaitables) from the
+# task's coroutine down to the innermost awaitable, describing each link by its
+# qualname and suspended line.
+def GetAwaitChain(coro):
+	chain = []
+	while coro is not None:
+		frame = getattr(coro, 'cr_frame', None) or getattr(coro, 'gi_frame', None)
+		if frame is None:
+			chain.append(repr(coro))
+			break
+		qualname = getattr(coro, '__qualname__', type(coro).__qualname__)
+		chain.append(f"{qualname} ({frame.f_code.co_filename}:{frame.f_lineno})")
+		if hasattr(coro, 'cr_await'):
+			coro = coro.cr_await
+		else:
+			coro = getattr(coro, 'gi_yieldfrom', None)
+	return chain
+
+# The task a step handle runs (Task.__step and Task.__wakeup are bound to it)
+def GetHandleTask(handle):
+	task = getattr(handle._callback, '__self__', None)
+	return task if isinstance(task, asyncio.Task) else None
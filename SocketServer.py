@@ -0,0 +1,95 @@
+import asyncio
+from SocketTransport import SocketTransport
+
+"""
+The asyncio.AbstractServer returned from CustomEventLoop.create_server.  Each
+listening socket has an add_reader callback that accepts as many pending
+connections as it can (up to the backlog) and wraps each one in a
+SocketTransport with a new protocol.
+"""
+class SocketServer(asyncio.AbstractServer):
+	def __init__(self, loop, sockets, protocolFactory, backlog):
+		self.loop = loop
+		self.listeners = sockets
+		self.protocolFactory = protocolFactory
+		self.backlog = backlog
+		self.isServing = False
+		self.closedWaiters = []
+
+	def __repr__(self):
+		return f"<SocketServer sockets={self.sockets!r}>"
+
+	def get_loop(self):
+		return self.loop
+
+	@property
+	def sockets(self):
+		if self.listeners is None:
+			return ()
+		return tuple(self.listeners)
+
+	def is_serving(self):
+		return self.isServing
+
+	def StartServing(self):
+		if self.isServing or self.listeners is None:
+			return
+		self.isServing = True
+		for sock in self.listeners:
+			sock.listen(self.backlog)
+			self.loop.add_reader(sock.fileno(), self.Accept, sock)
+
+	def Accept(self, sock):
+		for _ in range(self.backlog):
+			try:
+				conn, address = sock.accept()
+			except (BlockingIOError, InterruptedError, ConnectionAbortedError):
+				return
+			except OSError as exception:
+				self.loop.call_exception_handler({
+					'message': "socket.accept() out of system resource",
+					'exception': exception,
+					'socket': sock,
+				})
+				return
+			conn.setblocking(False)
+			SocketTransport(
+				self.loop,
+				conn,
+				self.protocolFactory(),
+				extra={'peername': address}
+			)
+
+	async def start_serving(self):
+		self.StartServing()
+
+	async def serve_forever(self):
+		self.StartServing()
+		waiter = self.loop.create_future()
+		self.closedWaiters.append(waiter)
+		try:
+			await waiter
+		finally:
+			self.close()
+
+	def close(self):
+		if self.listeners is None:
+			return
+		listeners = self.listeners
+		self.listeners = None
+		for sock in listeners:
+			self.loop.remove_reader(sock.fileno())
+		self.isServing = False
+		for sock in listeners:
+			sock.close()
+		for waiter in self.closedWaiters:
+			if not waiter.done():
+				waiter.set_result(None)
+		self.closedWaiters = []
+
+	async def wait_closed(self):
+		if self.listeners is None:
+			return
+		waiter = self.loop.create_future()
+		self.closedWaiters.append(waiter)
+		await waiter
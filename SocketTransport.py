@@ -0,0 +1,221 @@
+import asyncio
+import socket
+
+"""
+A stream socket asyncio.Transport for the CustomEventLoop.  Reads are driven
+by an add_reader callback and writes are attempted immediately, with whatever
+the socket does not accept buffered and flushed from an add_writer callback.
+The protocol is paused/resumed around the write buffer high/low water marks
+(which is what StreamWriter.drain waits on).
+"""
+class SocketTransport(asyncio.Transport):
+	maxReadSize = 256 * 1024
+
+	def __init__(self, loop, sock, protocol, waiter=None, extra=None):
+		super().__init__(extra)
+		self._extra['socket'] = sock
+		try:
+			self._extra['sockname'] = sock.getsockname()
+		except OSError:
+			self._extra['sockname'] = None
+		if 'peername' not in self._extra:
+			try:
+				self._extra['peername'] = sock.getpeername()
+			except OSError:
+				self._extra['peername'] = None
+		self.loop = loop
+		self.sock = sock
+		self.fd = sock.fileno()
+		self.protocol = protocol
+		self.buffer = bytearray()
+		self.isClosing = False
+		self.isReading = True
+		self.isEofRequested = False
+		self.isProtocolPaused = False
+		self.highWater = 64 * 1024
+		self.lowWater = 16 * 1024
+		if sock.family in (socket.AF_INET, socket.AF_INET6):
+			sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+		loop.call_soon(protocol.connection_made, self)
+		loop.call_soon(self.StartReading)
+		if waiter is not None:
+			loop.call_soon(SetResultUnlessCancelled, waiter, None)
+
+	def __repr__(self):
+		return f"<SocketTransport fd={self.fd} closing={self.isClosing}>"
+
+	def get_protocol(self):
+		return self.protocol
+
+	def set_protocol(self, protocol):
+		self.protocol = protocol
+
+	def is_closing(self):
+		return self.isClosing
+
+	def is_reading(self):
+		return self.isReading and not self.isClosing
+
+	def pause_reading(self):
+		if not self.is_reading():
+			return
+		self.isReading = False
+		self.loop.remove_reader(self.fd)
+
+	def resume_reading(self):
+		if self.isClosing or self.isReading:
+			return
+		self.isReading = True
+		self.loop.add_reader(self.fd, self.ReadReady)
+
+	# Runs after connection_made, which may have paused reading or closed the
+	# transport already
+	def StartReading(self):
+		if self.is_reading():
+			self.loop.add_reader(self.fd, self.ReadReady)
+
+	def ReadReady(self):
+		try:
+			data = self.sock.recv(self.maxReadSize)
+		except (BlockingIOError, InterruptedError):
+			return
+		except (SystemExit, KeyboardInterrupt):
+			raise
+		except BaseException as exception:
+			self.FatalError(exception, "Fatal read error on socket transport")
+			return
+		if data:
+			self.protocol.data_received(data)
+			return
+		# The peer closed its end
+		self.loop.remove_reader(self.fd)
+		keepOpen = self.protocol.eof_received()
+		if not keepOpen:
+			self.close()
+
+	def write(self, data):
+		if self.isEofRequested:
+			raise RuntimeError("Cannot call write() after write_eof()")
+		if not data or self.isClosing:
+			return
+		if not self.buffer:
+			try:
+				sent = self.sock.send(data)
+			except (BlockingIOError, InterruptedError):
+				sent = 0
+			except (SystemExit, KeyboardInterrupt):
+				raise
+			except BaseException as exception:
+				self.FatalError(exception, "Fatal write error on socket transport")
+				return
+			if sent == len(data):
+				return
+			data = memoryview(data)[sent:]
+			self.loop.add_writer(self.fd, self.WriteReady)
+		self.buffer.extend(data)
+		self.MaybePauseProtocol()
+
+	def WriteReady(self):
+		try:
+			sent = self.sock.send(self.buffer)
+		except (BlockingIOError, InterruptedError):
+			return
+		except (SystemExit, KeyboardInterrupt):
+			raise
+		except BaseException as exception:
+			self.loop.remove_writer(self.fd)
+			self.buffer.clear()
+			self.FatalError(exception, "Fatal write error on socket transport")
+			return
+		del self.buffer[:sent]
+		self.MaybeResumeProtocol()
+		if self.buffer:
+			return
+		self.loop.remove_writer(self.fd)
+		if self.isClosing:
+			self.CallConnectionLost(None)
+		elif self.isEofRequested:
+			self.sock.shutdown(socket.SHUT_WR)
+
+	def MaybePauseProtocol(self):
+		if self.isProtocolPaused or len(self.buffer) <= self.highWater:
+			return
+		self.isProtocolPaused = True
+		self.protocol.pause_writing()
+
+	def MaybeResumeProtocol(self):
+		if not self.isProtocolPaused or len(self.buffer) > self.lowWater:
+			return
+		self.isProtocolPaused = False
+		self.protocol.resume_writing()
+
+	def get_write_buffer_size(self):
+		return len(self.buffer)
+
+	def get_write_buffer_limits(self):
+		return (self.lowWater, self.highWater)
+
+	def set_write_buffer_limits(self, high=None, low=None):
+		if high is None:
+			high = 64 * 1024 if low is None else 4 * low
+		if low is None:
+			low = high // 4
+		if not high >= low >= 0:
+			raise ValueError(f"high ({high!r}) must be >= low ({low!r}) must be >= 0")
+		self.highWater = high
+		self.lowWater = low
+		self.MaybePauseProtocol()
+
+	def can_write_eof(self):
+		return True
+
+	def write_eof(self):
+		if self.isClosing or self.isEofRequested:
+			return
+		self.isEofRequested = True
+		if not self.buffer:
+			self.sock.shutdown(socket.SHUT_WR)
+
+	def close(self):
+		if self.isClosing:
+			return
+		self.isClosing = True
+		self.loop.remove_reader(self.fd)
+		if not self.buffer:
+			self.loop.call_soon(self.CallConnectionLost, None)
+
+	def abort(self):
+		self.ForceClose(None)
+
+	def FatalError(self, exception, message):
+		if not isinstance(exception, OSError):
+			self.loop.call_exception_handler({
+				'message': message,
+				'exception': exception,
+				'transport': self,
+				'protocol': self.protocol,
+			})
+		self.ForceClose(exception)
+
+	def ForceClose(self, exception):
+		if self.buffer:
+			self.buffer.clear()
+			self.loop.remove_writer(self.fd)
+		if not self.isClosing:
+			self.isClosing = True
+			self.loop.remove_reader(self.fd)
+		self.loop.call_soon(self.CallConnectionLost, exception)
+
+	def CallConnectionLost(self, exception):
+		if self.sock is None:
+			return
+		try:
+			self.protocol.connection_lost(exception)
+		finally:
+			self.sock.close()
+			self.sock = None
+			self.protocol = None
+
+def SetResultUnlessCancelled(future, result):
+	if not future.cancelled():
+		future.set_result(result)
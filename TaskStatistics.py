@@ -0,0 +1,191 @@
+import heapq
+import time
+from operator import attrgetter
+from PerformanceTimer import FormatDurationNs
+
+"""
+Live per-task aggregates, updated as every step finishes instead of by
+scanning the step records afterwards.  Each task's own totals (steps, CPU,
+longest step, queue wait, executor calls and the time spent waiting on them,
+deadline misses) are also added to every ancestor's inclusive totals, so a
+request handler's inclusive cost covers the subtasks it spawned while
+they are still running.  Work that a detached task does after its parent has
+finished keeps being added to the finished parent.
+"""
+class TaskAggregate:
+	__slots__ = (
+		'taskId',
+		'parent',
+		'createdAt',
+		'finishedAt',
+		'childCount',
+		'steps',
+		'cpuNs',
+		'maxStepNs',
+		'queueWaitNs',
+		'totalSteps',
+		'totalCpuNs',
+		'totalMaxStepNs',
+		'totalQueueWaitNs',
+		'executorCalls',
+		'executorWaitNs',
+		'totalExecutorCalls',
+		'totalExecutorWaitNs',
+		'missedSteps',
+		'totalMissedSteps',
+		'isShed'
+	)
+
+	def __init__(self, taskId, parent, createdAt):
+		self.taskId = taskId
+		self.parent = parent
+		self.createdAt = createdAt
+		self.finishedAt = None
+		self.childCount = 0
+		self.steps = 0
+		self.cpuNs = 0
+		self.maxStepNs = 0
+		self.queueWaitNs = 0
+		self.totalSteps = 0
+		self.totalCpuNs = 0
+		self.totalMaxStepNs = 0
+		self.totalQueueWaitNs = 0
+		self.executorCalls = 0
+		self.executorWaitNs = 0
+		self.totalExecutorCalls = 0
+		self.totalExecutorWaitNs = 0
+		self.missedSteps = 0
+		self.totalMissedSteps = 0
+		self.isShed = False
+
+	@property
+	def parentTaskId(self):
+		return None if self.parent is None else self.parent.taskId
+
+	def GetWallNs(self):
+		finishedAt = time.perf_counter_ns() if self.finishedAt is None else self.finishedAt
+		return finishedAt - self.createdAt
+
+	def Print(self):
+		print(f"taskId={self.taskId}, parent={self.parentTaskId}, " \
+			f"children={self.childCount}, wall={FormatDurationNs(self.GetWallNs())}, " \
+			f"steps={self.steps}/{self.totalSteps}, " \
+			f"cpu={FormatDurationNs(self.cpuNs)}/{FormatDurationNs(self.totalCpuNs)}, " \
+			f"max step={FormatDurationNs(self.maxStepNs)}/{FormatDurationNs(self.totalMaxStepNs)}, " \
+			f"queue wait={FormatDurationNs(self.queueWaitNs)}/{FormatDurationNs(self.totalQueueWaitNs)}" \
+			+ self.GetExecutorText() \
+			+ self.GetDeadlineText())
+
+	def GetExecutorText(self):
+		if not self.totalExecutorCalls:
+			return ""
+		return f", executor calls={self.executorCalls}/{self.totalExecutorCalls}, " \
+			f"executor wait={FormatDurationNs(self.executorWaitNs)}/" \
+			f"{FormatDurationNs(self.totalExecutorWaitNs)}"
+
+	def GetDeadlineText(self):
+		if not self.totalMissedSteps:
+			return ""
+		return f", missed steps={self.missedSteps}/{self.totalMissedSteps}" \
+			+ (", shed" if self.isShed else "")
+
+"""
+Keeps a TaskAggregate for every running task and for the most recently
+finished ones (up to finishedCapacity), all looked up by task id.  The
+topCount finished tasks with the most inclusive CPU are kept in a min-heap as
+they finish, so GetTopTasks only has to look at those and the running tasks.
+"""
+class TaskStatistics:
+	def __init__(self, finishedCapacity=65536, topCount=100):
+		self.finishedCapacity = finishedCapacity
+		self.topCount = topCount
+		# taskId: TaskAggregate
+		self.activeTasks = {}
+		# taskId: TaskAggregate in the order the tasks finished
+		self.finishedTasks = {}
+		# (totalCpuNs, taskId, TaskAggregate)
+		self.topFinished = []
+
+	def CreateTask(self, taskId, parentTaskId, createdAt):
+		parent = self.activeTasks.get(parentTaskId)
+		if parent is not None:
+			parent.childCount += 1
+		self.activeTasks[taskId] = TaskAggregate(taskId, parent, createdAt)
+
+	def RecordStep(self, taskId, createdAt, startedAt, finishedAt):
+		aggregate = self.activeTasks.get(taskId)
+		if aggregate is None:
+			return
+		cpuNs = finishedAt - startedAt
+		queueWaitNs = startedAt - createdAt
+		aggregate.steps += 1
+		aggregate.cpuNs += cpuNs
+		aggregate.queueWaitNs += queueWaitNs
+		if cpuNs > aggregate.maxStepNs:
+			aggregate.maxStepNs = cpuNs
+		while aggregate is not None:
+			aggregate.totalSteps += 1
+			aggregate.totalCpuNs += cpuNs
+			aggregate.totalQueueWaitNs += queueWaitNs
+			if cpuNs > aggregate.totalMaxStepNs:
+				aggregate.totalMaxStepNs = cpuNs
+			aggregate = aggregate.parent
+
+	# waitNs is from the submit to the result being back on the loop
+	def RecordExecutorCall(self, taskId, waitNs):
+		aggregate = self.Get(taskId)
+		if aggregate is None:
+			return
+		aggregate.executorCalls += 1
+		aggregate.executorWaitNs += waitNs
+		while aggregate is not None:
+			aggregate.totalExecutorCalls += 1
+			aggregate.totalExecutorWaitNs += waitNs
+			aggregate = aggregate.parent
+
+	# A step that started after the task's deadline (see EdfScheduler), which
+	# cancelled the task if it was shed
+	def RecordDeadlineMiss(self, taskId, isShed):
+		aggregate = self.Get(taskId)
+		if aggregate is None:
+			return
+		aggregate.missedSteps += 1
+		if isShed:
+			aggregate.isShed = True
+		while aggregate is not None:
+			aggregate.totalMissedSteps += 1
+			aggregate = aggregate.parent
+
+	def FinishTask(self, taskId, finishedAt):
+		aggregate = self.activeTasks.pop(taskId, None)
+		if aggregate is None:
+			return
+		aggregate.finishedAt = finishedAt
+		finishedTasks = self.finishedTasks
+		finishedTasks[taskId] = aggregate
+		if len(finishedTasks) > self.finishedCapacity:
+			del finishedTasks[next(iter(finishedTasks))]
+		entry = (aggregate.totalCpuNs, taskId, aggregate)
+		if len(self.topFinished) < self.topCount:
+			heapq.heappush(self.topFinished, entry)
+		elif entry > self.topFinished[0]:
+			heapq.heapreplace(self.topFinished, entry)
+
+	def Get(self, taskId):
+		aggregate = self.activeTasks.get(taskId)
+		if aggregate is None:
+			aggregate = self.finishedTasks.get(taskId)
+		return aggregate
+
+	def GetActiveCount(self):
+		return len(self.activeTasks)
+
+	# The n tasks (running or finished) with the most inclusive CPU
+	def GetTopTasks(self, n=10):
+		candidates = list(self.activeTasks.values())
+		candidates.extend(entry[2] for entry in self.topFinished)
+		return heapq.nlargest(n, candidates, key=attrgetter('totalCpuNs'))
+
+	def Print(self, n=10):
+		for aggregate in self.GetTopTasks(n):
+			aggregate.Print()
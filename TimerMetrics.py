@@ -0,0 +1,49 @@
+import heapq
+from LogHistogram import LogHistogram
+from PerformanceTimer import FormatDurationNs
+
+"""
+The trade-off of the timer slack.  A wakeup is saved when ApplySlack moves a
+timer's when onto the end of a slack window that another pending timer was
+already rounded to, so the timer fires on that timer's tick instead of on
+its own (cancelled timers still count as occupying their window).  Timers
+that share a tick without any slack are not counted.  The lateness added is
+how far each timer was pushed back to line up with its slack window (on top
+of the usual lateness of the loop).  Every tick that fires timers counts as
+one timer wakeup.
+"""
+class TimerMetrics:
+	def __init__(self, significantBits=8):
+		self.firedCount = 0
+		self.wakeupCount = 0
+		self.savedCount = 0
+		self.addedLateness = LogHistogram(significantBits)
+		# The ends of the pending slack windows that a timer was rounded to
+		self.windows = set()
+		# The same window ends in a heap to drop them once they have passed
+		self.windowWhens = []
+
+	def RecordSlack(self, when, slackWhen):
+		self.addedLateness.Record(int((slackWhen - when) * 1e9))
+		if slackWhen not in self.windows:
+			self.windows.add(slackWhen)
+			heapq.heappush(self.windowWhens, slackWhen)
+		elif slackWhen != when:
+			self.savedCount += 1
+
+	def RecordFired(self, count, now):
+		self.firedCount += count
+		self.wakeupCount += 1
+		windowWhens = self.windowWhens
+		while windowWhens and windowWhens[0] < now:
+			self.windows.discard(heapq.heappop(windowWhens))
+
+	def GetWakeupsSaved(self):
+		return self.savedCount
+
+	def Print(self):
+		print(f"timers fired={self.firedCount}, timer wakeups={self.wakeupCount}, " \
+			f"wakeups saved={self.GetWakeupsSaved()}, " \
+			f"slacked timers={self.addedLateness.count}, " \
+			f"mean added lateness={FormatDurationNs(int(self.addedLateness.GetMean()))}, " \
+			f"max added lateness={FormatDurationNs(self.addedLateness.max or 0)}")
@@ -0,0 +1,75 @@
+import heapq
+
+"""
+A binary heap of asyncio.TimerHandle objects ordered on when() (TimerHandle
+already implements __lt__ on the _when value).  Only the expired timers are
+popped off of the top of the heap on each tick instead of rescanning every
+pending timer.
+
+Cancelled timers are not searched for and removed when they are cancelled.
+They are left in the heap and dropped when they reach the top (lazy removal).
+If cancelled timers make up more than half of the heap then the heap is
+rebuilt without them on the next tick so that a workload of mostly cancelled
+timeouts does not hold onto the memory.
+"""
+class TimerQueue:
+	__slots__ = ('heap', 'cancelledCount')
+
+	minCompactSize = 100
+
+	def __init__(self):
+		self.heap = []
+		self.cancelledCount = 0
+
+	def __len__(self):
+		return len(self.heap) - self.cancelledCount
+
+	def Push(self, timer):
+		heapq.heappush(self.heap, timer)
+		timer._scheduled = True
+
+	# Called from the loop's _timer_handle_cancelled.  Timers that have already
+	# been popped are no longer scheduled and are not counted.  Note that the
+	# timer is not flagged as _cancelled until after this returns so the heap is
+	# not compacted here.
+	def Cancel(self, timer):
+		if timer._scheduled:
+			self.cancelledCount += 1
+
+	def Compact(self):
+		heap = []
+		for timer in self.heap:
+			if timer._cancelled:
+				timer._scheduled = False
+			else:
+				heap.append(timer)
+		heapq.heapify(heap)
+		self.heap = heap
+		self.cancelledCount = 0
+
+	# Returns the when() of the next timer that has not been cancelled or None
+	# if there are no pending timers.
+	def GetNextWhen(self):
+		heap = self.heap
+		while heap and heap[0]._cancelled:
+			heapq.heappop(heap)._scheduled = False
+			self.cancelledCount -= 1
+		return heap[0]._when if heap else None
+
+	# Pop every timer that expires before now and append the ones that were not
+	# cancelled to ready (in the order they expire).  Returns how many there were.
+	def PopExpired(self, now, ready):
+		if self.cancelledCount > self.minCompactSize and \
+			self.cancelledCount * 2 > len(self.heap):
+			self.Compact()
+		heap = self.heap
+		firedCount = 0
+		while heap and heap[0]._when < now:
+			timer = heapq.heappop(heap)
+			timer._scheduled = False
+			if timer._cancelled:
+				self.cancelledCount -= 1
+			else:
+				ready.append(timer)
+				firedCount += 1
+		return firedCount
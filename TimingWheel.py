@@ -0,0 +1,190 @@
+import math
+import time
+
+"""
+A hierarchical timing wheel with the same interface as the TimerQueue heap.
+Time is divided into ticks of a fixed resolution and each timer is appended
+to a slot by the tick it expires on (rounded up so it never fires early).
+Level 0 has one slot per tick for the current block of 256 ticks, level 1 one
+slot per 256 ticks for the current block of 65536 ticks and so on.  When the
+current tick crosses a block boundary the next slot of the level above is
+cascaded down into the lower levels.  Timers past the last level are kept in
+an overflow slot that is re-inserted on every top level cascade.
+
+Inserting a timer is a list append and cancelling one only counts it (like
+the heap, cancelled timers are dropped when their slot is fired or cascaded).
+If cancelled timers make up more than half of the wheel then every slot is
+filtered on the next tick so mostly cancelled timeouts do not hold memory.
+Timers that expire within the same tick fire in the order they were added and
+a timer that is already due fires on the next tick (up to one resolution
+late).
+"""
+class TimingWheel:
+	__slots__ = (
+		'resolution',
+		'levels',
+		'levelCounts',
+		'overflow',
+		'count',
+		'cancelledCount',
+		'currentTick'
+	)
+
+	slotBits = 8
+	slotCount = 1 << slotBits
+	slotMask = slotCount - 1
+	levelCount = 4
+	minCompactSize = 100
+
+	def __init__(self, resolution=0.001, now=None):
+		self.resolution = resolution
+		self.levels = [[None] * self.slotCount for _ in range(self.levelCount)]
+		self.levelCounts = [0] * self.levelCount
+		self.overflow = []
+		self.count = 0
+		self.cancelledCount = 0
+		# The next tick to be processed (every tick before it has expired)
+		self.currentTick = math.floor(
+			(time.monotonic() if now is None else now) / resolution
+		)
+
+	def __len__(self):
+		return self.count - self.cancelledCount
+
+	def Push(self, timer):
+		self.Insert(timer)
+		self.count += 1
+		timer._scheduled = True
+
+	def Insert(self, timer):
+		tick = math.ceil(timer._when / self.resolution)
+		currentTick = self.currentTick
+		if tick < currentTick:
+			tick = currentTick
+		# Place the timer on the lowest level where the tick only differs from
+		# the current tick by the bits of that level.
+		bits = self.slotBits
+		difference = (tick ^ currentTick) >> bits
+		level = 0
+		while difference:
+			difference >>= bits
+			level += 1
+		if level >= self.levelCount:
+			self.overflow.append(timer)
+			return
+		slots = self.levels[level]
+		index = (tick >> (bits * level)) & self.slotMask
+		slot = slots[index]
+		if slot is None:
+			slots[index] = [timer]
+		else:
+			slot.append(timer)
+		self.levelCounts[level] += 1
+
+	# Called from the loop's _timer_handle_cancelled.  Timers that have already
+	# fired are no longer scheduled and are not counted.
+	def Cancel(self, timer):
+		if timer._scheduled:
+			self.cancelledCount += 1
+
+	def Compact(self):
+		for level, slots in enumerate(self.levels):
+			for index, slot in enumerate(slots):
+				if slot:
+					slots[index] = self.Filter(slot) or None
+			self.levelCounts[level] = sum(len(slot) for slot in slots if slot)
+		self.overflow = self.Filter(self.overflow)
+		self.count -= self.cancelledCount
+		self.cancelledCount = 0
+
+	def Filter(self, slot):
+		timers = []
+		for timer in slot:
+			if timer._cancelled:
+				timer._scheduled = False
+			else:
+				timers.append(timer)
+		return timers
+
+	# Move the timers from the slot the current tick just reached on each level
+	# above 0 down to the lower levels (top level first).
+	def Cascade(self):
+		bits = self.slotBits
+		tick = self.currentTick
+		level = 1
+		while level < self.levelCount - 1 and \
+			(tick >> (bits * level)) & self.slotMask == 0:
+			level += 1
+		while level > 0:
+			index = (tick >> (bits * level)) & self.slotMask
+			slot = self.levels[level][index]
+			if slot:
+				self.levels[level][index] = None
+				self.levelCounts[level] -= len(slot)
+				self.Reinsert(slot)
+			if level == self.levelCount - 1 and index == 0 and self.overflow:
+				overflow = self.overflow
+				self.overflow = []
+				self.Reinsert(overflow)
+			level -= 1
+
+	def Reinsert(self, slot):
+		for timer in slot:
+			if timer._cancelled:
+				timer._scheduled = False
+				self.count -= 1
+				self.cancelledCount -= 1
+			else:
+				self.Insert(timer)
+
+	# Returns the start of the next tick that has a timer on level 0, or the
+	# next block boundary (when a cascade is due) if level 0 is empty.  The
+	# loop may wake up early (even for a cancelled timer) but never late.
+	def GetNextWhen(self):
+		if self.count == self.cancelledCount:
+			return None
+		tick = self.currentTick
+		# The current tick is a block boundary whose cascade has not run yet, so
+		# the levels above may hold timers for any tick of this block
+		if tick & self.slotMask == 0:
+			return tick * self.resolution
+		if self.levelCounts[0]:
+			slots = self.levels[0]
+			for index in range(tick & self.slotMask, self.slotCount):
+				if slots[index]:
+					return (tick - (tick & self.slotMask) + index) * self.resolution
+		return ((tick | self.slotMask) + 1) * self.resolution
+
+	def PopExpired(self, now, ready):
+		if self.cancelledCount > self.minCompactSize and \
+			self.cancelledCount * 2 > self.count:
+			self.Compact()
+		nowTick = math.floor(now / self.resolution)
+		slots = self.levels[0]
+		firedCount = 0
+		while self.currentTick <= nowTick:
+			if not self.count:
+				self.currentTick = nowTick + 1
+				return firedCount
+			tick = self.currentTick
+			index = tick & self.slotMask
+			if index == 0:
+				self.Cascade()
+			elif not self.levelCounts[0]:
+				# Nothing left on level 0 so skip ahead to the next cascade
+				self.currentTick = min(nowTick + 1, (tick | self.slotMask) + 1)
+				continue
+			slot = slots[index]
+			if slot:
+				slots[index] = None
+				self.levelCounts[0] -= len(slot)
+				self.count -= len(slot)
+				for timer in slot:
+					timer._scheduled = False
+					if timer._cancelled:
+						self.cancelledCount -= 1
+					else:
+						ready.append(timer)
+						firedCount += 1
+			self.currentTick = tick + 1
+		return firedCount
@@ -0,0 +1,120 @@
+import sys
+from MetricsExporter import MetricsExporter
+from MetricsReader import ReadRecords
+
+"""
+Converts task/step/idle records (as streamed by MetricsReader.ReadRecords or
+MetricsSnapshot.GetRecords) into the Chrome Trace Event JSON format, which
+chrome://tracing and ui.perfetto.dev both open.  Every task is a track
+(thread) named after the task id, every step is a complete ("X") slice on its
+task's track and idle periods are slices on their own track.  A flow arrow
+goes from the parent step that created a task to the first step of the task.
+
+Events are written as the records come in (buffered into chunks), so the
+memory used does not depend on the length of the trace.  Timestamps are
+converted from perf_counter_ns nanoseconds to the microseconds the format
+expects.
+"""
+class ChromeTraceWriter:
+	processId = 1
+	idleThreadId = 0
+	chunkSize = 4096
+
+	def __init__(self, file):
+		self.file = file
+		self.events = []
+		self.eventCount = 0
+		self.file.write('{"displayTimeUnit":"ns","traceEvents":[\n')
+		self.WriteEvent(
+			f'{{"ph":"M","name":"process_name","pid":{self.processId},' \
+			f'"args":{{"name":"event loop"}}}}'
+		)
+		self.WriteEvent(
+			f'{{"ph":"M","name":"thread_name","pid":{self.processId},' \
+			f'"tid":{self.idleThreadId},"args":{{"name":"idle"}}}}'
+		)
+
+	def WriteEvent(self, event):
+		events = self.events
+		events.append(event)
+		if len(events) >= self.chunkSize:
+			self.WriteEvents()
+
+	def WriteEvents(self):
+		if not self.events:
+			return
+		if self.eventCount:
+			self.file.write(',\n')
+		self.file.write(',\n'.join(self.events))
+		self.eventCount += len(self.events)
+		self.events = []
+
+	def WriteRecord(self, kind, a, b, c, d, e):
+		if kind == MetricsExporter.stepRecord:
+			self.WriteStep(a, b, c, d, e)
+		elif kind == MetricsExporter.taskRecord:
+			self.WriteTask(a, b, c, d)
+		else:
+			self.WriteIdle(a, b)
+
+	# Task ids start at 0, so their tracks are shifted by one past the idle track
+	def WriteStep(self, taskId, stepId, createdAt, startedAt, finishedAt):
+		self.WriteEvent(
+			f'{{"ph":"X","name":"step {stepId}","cat":"step",' \
+			f'"pid":{self.processId},"tid":{taskId + 1},' \
+			f'"ts":{startedAt / 1000:.3f},"dur":{(finishedAt - startedAt) / 1000:.3f},' \
+			f'"args":{{"queueDelayNs":{startedAt - createdAt}}}}}'
+		)
+
+	# The flow start binds to the parent step that encloses the creation time and
+	# the flow end to the next slice on the child's track (its first step).
+	def WriteTask(self, taskId, parentTaskId, createdAt, finishedAt):
+		self.WriteEvent(
+			f'{{"ph":"M","name":"thread_name","pid":{self.processId},' \
+			f'"tid":{taskId + 1},"args":{{"name":"task {taskId}"}}}}'
+		)
+		self.WriteEvent(
+			f'{{"ph":"M","name":"thread_sort_index","pid":{self.processId},' \
+			f'"tid":{taskId + 1},"args":{{"sort_index":{taskId + 1}}}}}'
+		)
+		if parentTaskId < 0:
+			return
+		createdAtUs = f'{createdAt / 1000:.3f}'
+		self.WriteEvent(
+			f'{{"ph":"s","name":"create_task","cat":"task","id":{taskId},' \
+			f'"pid":{self.processId},"tid":{parentTaskId + 1},"ts":{createdAtUs}}}'
+		)
+		self.WriteEvent(
+			f'{{"ph":"f","name":"create_task","cat":"task","id":{taskId},' \
+			f'"pid":{self.processId},"tid":{taskId + 1},"ts":{createdAtUs}}}'
+		)
+
+	def WriteIdle(self, startedAt, finishedAt):
+		self.WriteEvent(
+			f'{{"ph":"X","name":"idle","cat":"idle",' \
+			f'"pid":{self.processId},"tid":{self.idleThreadId},' \
+			f'"ts":{startedAt / 1000:.3f},"dur":{(finishedAt - startedAt) / 1000:.3f}}}'
+		)
+
+	def Close(self):
+		self.WriteEvents()
+		self.file.write('\n]}\n')
+
+def WriteChromeTrace(records, path):
+	with open(path, 'w') as file:
+		writer = ChromeTraceWriter(file)
+		for record in records:
+			writer.WriteRecord(*record)
+		writer.Close()
+		return writer.eventCount
+
+def Main(args):
+	if len(args) != 2:
+		print("python TraceExporter.py metrics.bin trace.json")
+		return 1
+	eventCount = WriteChromeTrace(ReadRecords(args[0]), args[1])
+	print(f"Wrote {eventCount} trace events to {args[1]}")
+	return 0
+
+if __name__ == '__main__':
+	sys.exit(Main(sys.argv[1:]))
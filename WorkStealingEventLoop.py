@@ -0,0 +1,290 @@
+import asyncio
+import collections
+import contextvars
+import os
+import sys
+import threading
+from CustomEventLoop import CustomEventLoop
+from LightTask import LightTask
+
+# The TaskOwner of the task whose context a callback runs in
+ownerVar = contextvars.ContextVar('taskOwner')
+# The index of the worker running on the current thread
+current = threading.local()
+
+"""
+The pending handles of one task.  The owner is in at most one worker queue
+(isQueued) or being run by one worker at a time, so the callbacks of a task
+always run one after the other and in the order they were scheduled, even
+when the task moves to another worker.  workerIndex is the worker it last ran
+on, where its new handles are queued.
+"""
+class TaskOwner:
+	__slots__ = ('workerIndex', 'handles', 'isQueued', 'lock')
+
+	def __init__(self, workerIndex):
+		self.workerIndex = workerIndex
+		self.handles = collections.deque()
+		self.isQueued = False
+		self.lock = threading.Lock()
+
+# Before 3.14 asyncio keeps one current task per loop instead of one per
+# thread, so the steps that run on several workers at once cannot be the
+# current task there
+class WorkerTask(LightTask):
+	isCurrentTask = sys.version_info >= (3, 14)
+
+# Stands in for the ready deque: everything appended to it (by call_soon,
+# LightTask, the timers, the selector or call_soon_threadsafe) is routed to the
+# worker that owns the handle's task.
+class ReadyRouter:
+	def __init__(self, loop):
+		self.schedule = loop.Schedule
+
+	def append(self, handle):
+		self.schedule(handle)
+
+	def extend(self, handles):
+		for handle in handles:
+			self.schedule(handle)
+
+	def __len__(self):
+		return 0
+
+"""
+An experimental multi-threaded mode of the CustomEventLoop for free-threaded
+CPython builds.  The thread that calls run_forever is worker 0: it waits on
+the selector, pops the expired timers and runs tasks like the others.  Every
+worker has a local deque of runnable TaskOwners and runs its own queue first
+(oldest first).  An idle worker steals the most recently queued task from
+another worker, and the task then stays on the thief.  New tasks start on the
+worker that created them.
+
+Tasks are LightTasks because asyncio.Task only lets one task per loop be the
+current task at a time.  Before 3.14 they are not the current task at all, so
+asyncio.timeout and wait_for need 3.14 with more than one thread.  Callbacks that do not belong to a task (transport
+callbacks scheduled outside any task for example) are never stolen and run
+on worker 0, one at a time like on the single-threaded loop.  Awaiting a
+future that another task resolves is only safe where asyncio.Future itself is
+thread-safe.
+
+Under the GIL the threads cannot run Python code in parallel, so threadCount
+falls back to 1 (a plain CustomEventLoop with asyncio.Tasks) unless
+forceThreads is set.
+"""
+class WorkStealingEventLoop(CustomEventLoop):
+	def __init__(self, threadCount=None, timers=None, forceThreads=False, timerSlack=0):
+		super().__init__(timers, timerSlack=timerSlack)
+		isGilEnabled = getattr(sys, '_is_gil_enabled', lambda: True)()
+		if threadCount is None:
+			threadCount = 1 if isGilEnabled else os.cpu_count() or 1
+		if isGilEnabled and not forceThreads:
+			threadCount = 1
+		self.threadCount = threadCount
+		if threadCount == 1:
+			return
+		self.ready = ReadyRouter(self)
+		self.queues = [collections.deque() for _ in range(threadCount)]
+		# Callbacks outside of any task, only run by worker 0
+		self.loopOwner = TaskOwner(0)
+		self.timersLock = threading.Lock()
+		self.condition = threading.Condition()
+		self.idleCount = 0
+		self.isPolling = False
+		self.runCounts = [0] * threadCount
+		self.stealCounts = [0] * threadCount
+
+	# The workers have no ready queue policy, so priority, weight and deadline
+	# only apply with a single thread
+	def create_task(
+		self,
+		coro,
+		*,
+		name=None,
+		context=None,
+		priority=None,
+		weight=None,
+		deadline=None
+	):
+		if self.threadCount == 1:
+			return super().create_task(
+				coro,
+				name=name,
+				context=context,
+				priority=priority,
+				weight=weight,
+				deadline=deadline
+			)
+		if context is None:
+			context = contextvars.copy_context()
+		else:
+			context = context.copy()
+		context.run(ownerVar.set, TaskOwner(getattr(current, 'workerIndex', 0)))
+		return WorkerTask(coro, loop=self, context=context)
+
+	def Schedule(self, handle):
+		context = handle._context
+		owner = None if context is None else context.get(ownerVar)
+		if owner is None:
+			owner = self.loopOwner
+		with owner.lock:
+			owner.handles.append(handle)
+			if owner.isQueued:
+				return
+			owner.isQueued = True
+		if owner is self.loopOwner:
+			if self.isPolling:
+				self.Wakeup()
+			return
+		self.queues[owner.workerIndex].append(owner)
+		if self.idleCount:
+			with self.condition:
+				self.condition.notify()
+
+	# Runs the handles queued for the owner so far and queues it again if more
+	# came in meanwhile
+	def RunOwner(self, owner, workerIndex):
+		owner.workerIndex = workerIndex
+		handles = owner.handles
+		for _ in range(len(handles)):
+			handle = handles.popleft()
+			if not handle._cancelled:
+				handle._run()
+		self.runCounts[workerIndex] += 1
+		with owner.lock:
+			if not handles:
+				owner.isQueued = False
+				return
+		if owner is not self.loopOwner:
+			self.queues[workerIndex].append(owner)
+
+	# The oldest owner on the worker's own queue or else one stolen from the
+	# back of another worker's queue
+	def TakeOwner(self, workerIndex):
+		try:
+			return self.queues[workerIndex].popleft()
+		except IndexError:
+			pass
+		for offset in range(1, self.threadCount):
+			try:
+				owner = self.queues[(workerIndex + offset) % self.threadCount].pop()
+			except IndexError:
+				continue
+			self.stealCounts[workerIndex] += 1
+			return owner
+		return None
+
+	def HasWork(self):
+		return any(self.queues)
+
+	def RunWorker(self, workerIndex):
+		current.workerIndex = workerIndex
+		asyncio._set_running_loop(self)
+		while self.isRunning:
+			owner = self.TakeOwner(workerIndex)
+			if owner is not None:
+				self.RunOwner(owner, workerIndex)
+				continue
+			with self.condition:
+				self.idleCount += 1
+				if self.isRunning and not self.HasWork():
+					# Timed out waits cover a notify that raced with the check
+					self.condition.wait(0.01)
+				self.idleCount -= 1
+		asyncio._set_running_loop(None)
+
+	def run_forever(self):
+		if self.threadCount == 1:
+			return super().run_forever()
+		asyncio._set_running_loop(self)
+		current.workerIndex = 0
+		self.isRunning = True
+		threads = [
+			threading.Thread(
+				target=self.RunWorker,
+				args=(workerIndex,),
+				name=f"WorkStealingEventLoop {workerIndex}",
+				daemon=True
+			)
+			for workerIndex in range(1, self.threadCount)
+		]
+		for thread in threads:
+			thread.start()
+		try:
+			while self.isRunning:
+				self.run_once()
+		finally:
+			self.stop()
+			for thread in threads:
+				thread.join()
+			asyncio._set_running_loop(None)
+
+	def stop(self):
+		super().stop()
+		if self.threadCount == 1:
+			return
+		self.Wakeup()
+		with self.condition:
+			self.condition.notify_all()
+
+	def GetTimeout(self):
+		if self.threadCount == 1:
+			return super().GetTimeout()
+		if self.loopOwner.isQueued or self.HasWork():
+			return 0
+		return super().GetTimeout()
+
+	"""
+	Worker 0 waits for I/O and timers, routes what is ready to the owning
+	workers, runs the callbacks that belong to no task and then its own
+	queue (or a stolen owner if it is empty).
+	"""
+	def run_once(self):
+		if self.threadCount == 1:
+			return super().run_once()
+		timeout = self.GetTimeout()
+		if timeout != 0 or len(self.selector.get_map()) > 1:
+			self.isPolling = timeout != 0
+			events = self.Wait(timeout)
+			self.isPolling = False
+			self.ProcessEvents(events)
+		self.DrainInbound(self.ready)
+		expired = []
+		now = self.GetNow()
+		with self.timersLock:
+			self.timers.PopExpired(now, expired)
+			if expired:
+				self.timerMetrics.RecordFired(len(expired), now)
+		self.ready.extend(expired)
+		if self.loopOwner.isQueued:
+			self.RunOwner(self.loopOwner, 0)
+		for _ in range(max(1, len(self.queues[0]))):
+			owner = self.TakeOwner(0)
+			if owner is None:
+				break
+			self.RunOwner(owner, 0)
+
+	def call_at(self, when, callback, *args, context=None, slack=None):
+		if self.threadCount == 1:
+			return super().call_at(when, callback, *args, context=context, slack=slack)
+		# The timer metrics are only updated under the lock too
+		with self.timersLock:
+			when = self.ApplySlack(when, slack)
+			timer = asyncio.TimerHandle(when, callback, args, loop=self, context=context)
+			self.timers.Push(timer)
+		if self.isPolling:
+			self.Wakeup()
+		return timer
+
+	def _timer_handle_cancelled(self, handle):
+		if self.threadCount == 1:
+			return super()._timer_handle_cancelled(handle)
+		with self.timersLock:
+			self.timers.Cancel(handle)
+
+	def Print(self):
+		if self.threadCount == 1:
+			print("threads=1")
+			return
+		print(f"threads={self.threadCount}, owner runs per worker={self.runCounts}, " \
+			f"steals per worker={self.stealCounts}")
@@ -0,0 +1,88 @@
+import asyncio
+from CustomEventLoop import CustomEventLoop
+from PerformanceTimer import PerformanceTimer, FormatDurationNs
+
+# The run_once from test-006.py which rescans every pending timer on each tick.
+class RescanEventLoop(CustomEventLoop):
+	def __init__(self):
+		super().__init__()
+		self.timers = []
+		self.ready = []
+
+	def run_once(self):
+		now = self.GetNow()
+		elapsed_timers = [timer for timer in self.timers if timer.when() < now]
+		for timer in elapsed_timers:
+			timer._scheduled = False
+		self.timers = [timer for timer in self.timers if timer.when() >= now]
+		ready = self.ready + elapsed_timers
+		self.ready = []
+		for handle in ready:
+			if not handle._cancelled:
+				handle._run()
+
+	def call_at(self, when, callback, *args, context=None):
+		timer = asyncio.TimerHandle(when, callback, args, loop=self, context=context)
+		self.timers.append(timer)
+		timer._scheduled = True
+		return timer
+
+	def _timer_handle_cancelled(self, handle):
+		pass
+
+def Callback():
+	pass
+
+# Average cost of a single tick with timerCount timers pending (none of which
+# expire) and one ready callback.
+def MeasureTick(loopType, timerCount, tickCount):
+	loop = loopType()
+	for index in range(timerCount):
+		loop.call_later(3600 + index, Callback)
+	timer = PerformanceTimer(autoStart=True)
+	for _ in range(tickCount):
+		loop.call_soon(Callback)
+		loop.run_once()
+	timer.Stop()
+	loop.close()
+	return timer.GetDurationNs() // tickCount
+
+def Benchmark():
+	print("timers   rescan      heap")
+	for timerCount in [10, 100, 1000, 10000, 100000]:
+		tickCount = max(10, 1000000 // max(timerCount, 1000))
+		rescanNs = MeasureTick(RescanEventLoop, timerCount, tickCount)
+		heapNs = MeasureTick(CustomEventLoop, timerCount, tickCount)
+		print(f"{timerCount:<8} " \
+			f"{FormatDurationNs(rescanNs):<11} " \
+			f"{FormatDurationNs(heapNs)}")
+
+# Most request timeouts are cancelled before they expire.  They stay in the heap
+# until they reach the top or until the heap is compacted (the 25 left over are
+# below the minimum compaction size).
+async def RequestAsync(index):
+	try:
+		await asyncio.wait_for(asyncio.sleep(0.01 if index % 20 == 0 else 0), 5)
+	except TimeoutError:
+		print("Timeout")
+
+async def MainAsync():
+	loop = asyncio.get_running_loop()
+	await asyncio.gather(*[RequestAsync(index) for index in range(10000)])
+	print(f"Pending timers={len(loop.timers)}, heap size={len(loop.timers.heap)}")
+	await asyncio.sleep(0.1)
+	print(f"Pending timers={len(loop.timers)}, heap size={len(loop.timers.heap)}")
+
+asyncio.run(MainAsync(), loop_factory=CustomEventLoop)
+Benchmark()
+
+"""
+Pending timers=0, heap size=25
+Pending timers=0, heap size=25
+timers   rescan      heap
+10       3.44us      1.86us
+100      12.46us     1.71us
+1000     104.13us    2.02us
+10000    1.12ms      2.67us
+100000   15.75ms     5.96us
+"""
@@ -0,0 +1,83 @@
+import asyncio
+import threading
+import time
+from CustomEventLoop import CustomEventLoop
+from PerformanceTimer import FormatDurationNs
+
+class IdleMetrics:
+	__slots__ = ('startedAt', 'finishedAt')
+
+	def __init__(self):
+		self.startedAt = time.perf_counter_ns()
+
+	def Finish(self):
+		self.finishedAt = time.perf_counter_ns()
+
+	def GetDurationNs(self):
+		return self.finishedAt - self.startedAt
+
+# Idle time is now the time spent blocked in the selector (polls for events
+# while there is work to do are not idle).
+class IdleEventLoop(CustomEventLoop):
+	def __init__(self):
+		super().__init__()
+		self.idles = []
+
+	def Wait(self, timeout):
+		if timeout == 0:
+			return super().Wait(timeout)
+		idle = IdleMetrics()
+		events = super().Wait(timeout)
+		idle.Finish()
+		self.idles.append(idle)
+		return events
+
+	def close(self):
+		idleNs = sum(idle.GetDurationNs() for idle in self.idles)
+		print(f"Idle {len(self.idles)} times for {FormatDurationNs(idleNs)}")
+		super().close()
+
+# The previous behavior: never block, just keep polling
+class SpinningEventLoop(IdleEventLoop):
+	def GetTimeout(self):
+		return 0
+
+def Wakeup(loop, future):
+	time.sleep(0.5)
+	print("Thread-call_soon_threadsafe")
+	loop.call_soon_threadsafe(future.set_result, "woken")
+
+async def MainAsync():
+	print("MainAsync-Enter")
+	cpuStart = time.process_time()
+	wallStart = time.monotonic()
+	await asyncio.sleep(1)
+	print(f"sleep(1) wall={time.monotonic() - wallStart:.2f}s, " \
+		f"cpu={time.process_time() - cpuStart:.2f}s")
+
+	# Another thread can interrupt the blocking wait (the timeout here is 10s)
+	loop = asyncio.get_running_loop()
+	future = loop.create_future()
+	threading.Thread(target=Wakeup, args=(loop, future)).start()
+	wallStart = time.monotonic()
+	result = await asyncio.wait_for(future, 10)
+	print(f"Result={result} after {time.monotonic() - wallStart:.2f}s")
+	print("MainAsync-Exit")
+
+asyncio.run(MainAsync(), loop_factory=IdleEventLoop)
+asyncio.run(MainAsync(), loop_factory=SpinningEventLoop)
+
+"""
+MainAsync-Enter
+sleep(1) wall=1.00s, cpu=0.00s
+Thread-call_soon_threadsafe
+Result=woken after 0.50s
+MainAsync-Exit
+Idle 2 times for 1.50s
+MainAsync-Enter
+sleep(1) wall=1.00s, cpu=0.97s
+Thread-call_soon_threadsafe
+Result=woken after 0.50s
+MainAsync-Exit
+Idle 0 times for 0ns
+"""
@@ -0,0 +1,127 @@
+import asyncio
+import socket
+import time
+from CustomEventLoop import CustomEventLoop
+from PerformanceTimer import FormatDurationNs
+
+try:
+	import uvloop
+except ImportError:
+	uvloop = None
+
+async def EchoAsync(reader, writer):
+	while data := await reader.read(65536):
+		writer.write(data)
+		await writer.drain()
+	writer.close()
+	await writer.wait_closed()
+
+# Round trips of a small message on a single connection
+async def LatencyAsync(port, count):
+	reader, writer = await asyncio.open_connection('127.0.0.1', port)
+	message = b'x' * 64
+	latencies = []
+	for _ in range(count):
+		startedAt = time.perf_counter_ns()
+		writer.write(message)
+		await reader.readexactly(len(message))
+		latencies.append(time.perf_counter_ns() - startedAt)
+	writer.close()
+	await writer.wait_closed()
+	latencies.sort()
+	return latencies[len(latencies) // 2], latencies[len(latencies) * 99 // 100]
+
+# Several connections pushing larger messages through the server at once
+async def ThroughputClientAsync(port, size, count):
+	reader, writer = await asyncio.open_connection('127.0.0.1', port)
+	message = b'x' * size
+	for _ in range(count):
+		writer.write(message)
+		await writer.drain()
+		await reader.readexactly(size)
+	writer.close()
+	await writer.wait_closed()
+
+async def BenchmarkAsync():
+	server = await asyncio.start_server(EchoAsync, '127.0.0.1', 0)
+	port = server.sockets[0].getsockname()[1]
+	p50, p99 = await LatencyAsync(port, 10000)
+	clientCount, size, count = 10, 16 * 1024, 500
+	startedAt = time.perf_counter()
+	await asyncio.gather(*[
+		ThroughputClientAsync(port, size, count)
+		for _ in range(clientCount)
+	])
+	duration = time.perf_counter() - startedAt
+	megabytes = clientCount * size * count / 1024 / 1024
+	server.close()
+	await server.wait_closed()
+	return p50, p99, megabytes / duration
+
+# Pauses reading or closes the transport as soon as it is connected
+class EarlyProtocol(asyncio.Protocol):
+	def __init__(self, received, isClosing):
+		self.received = received
+		self.isClosing = isClosing
+
+	def connection_made(self, transport):
+		if self.isClosing:
+			transport.close()
+		else:
+			transport.pause_reading()
+
+	def data_received(self, data):
+		self.received.append(data)
+
+async def ConnectionMadeAsync():
+	loop = asyncio.get_running_loop()
+	# The socket closed in connection_made frees its fd number for the next
+	# socket, which must still get its read events
+	sock, closedPeer = socket.socketpair()
+	await loop.create_connection(lambda: EarlyProtocol([], True), sock=sock)
+	await asyncio.sleep(0.01)
+	sock, peer = socket.socketpair()
+	sock.setblocking(False)
+	loop.call_later(0.01, peer.send, b'x')
+	try:
+		data = await asyncio.wait_for(loop.sock_recv(sock, 1), 1)
+	except TimeoutError:
+		data = "timed out"
+	sock.close()
+	peer.close()
+	closedPeer.close()
+	received = []
+	sock, peer = socket.socketpair()
+	transport, _ = await loop.create_connection(lambda: EarlyProtocol(received, False), sock=sock)
+	peer.send(b'x')
+	await asyncio.sleep(0.01)
+	transport.close()
+	peer.close()
+	return received, data
+
+def Benchmark(name, loopFactory):
+	p50, p99, throughput = asyncio.run(BenchmarkAsync(), loop_factory=loopFactory)
+	print(f"{name:<16} " \
+		f"p50={FormatDurationNs(p50):<10} " \
+		f"p99={FormatDurationNs(p99):<10} " \
+		f"throughput={throughput:.1f}MB/s")
+
+for name, loopFactory in (("CustomEventLoop", CustomEventLoop), ("asyncio", asyncio.new_event_loop)):
+	received, data = asyncio.run(ConnectionMadeAsync(), loop_factory=loopFactory)
+	print(f"{name:<16} paused in connection_made received={received}, " \
+		f"after a close in connection_made sock_recv={data}")
+
+Benchmark("CustomEventLoop", CustomEventLoop)
+Benchmark("asyncio", asyncio.new_event_loop)
+if uvloop is not None:
+	Benchmark("uvloop", uvloop.new_event_loop)
+else:
+	print("uvloop           not installed")
+
+"""
+CustomEventLoop  paused in connection_made received=[], after a close in connection_made sock_recv=b'x'
+asyncio          paused in connection_made received=[], after a close in connection_made sock_recv=b'x'
+CustomEventLoop  p50=44.88us    p99=112.78us   throughput=626.2MB/s
+asyncio          p50=35.28us    p99=62.51us    throughput=407.9MB/s
+uvloop           not installed
+"""
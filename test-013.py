@@ -0,0 +1,108 @@
+from CustomEventLoop import CustomEventLoop
+from PerformanceTimer import PerformanceTimer
+
+# The test-006.py run_once which builds a new "ready" list on every tick by
+# concatenating the ready handles with the elapsed timers.
+class ListReadyEventLoop(CustomEventLoop):
+	def __init__(self):
+		super().__init__()
+		self.ready = []
+
+	def run_once(self):
+		timeout = self.GetTimeout()
+		if timeout != 0 or len(self.selector.get_map()) > 1:
+			self.ProcessEvents(self.Wait(timeout))
+		elapsed_timers = []
+		self.timers.PopExpired(self.GetNow(), elapsed_timers)
+		ready = self.ready + elapsed_timers
+		self.ready = []
+		for handle in ready:
+			if not handle._cancelled:
+				handle._run()
+
+# call_soon routed through call_later(0) and the timers (test-008.py/test-009.py)
+class TimerReadyEventLoop(CustomEventLoop):
+	def call_soon(self, callback, *args, context=None):
+		return self.call_later(0, callback, *args, context=context)
+
+class Counter:
+	def __init__(self, loop, total):
+		self.loop = loop
+		self.remaining = total
+
+	# Each callback schedules the next one (a chain of one ready handle)
+	def Chain(self):
+		self.remaining -= 1
+		if self.remaining:
+			self.loop.call_soon(self.Chain)
+		else:
+			self.loop.stop()
+
+	# Many callbacks ready at once
+	def FanOut(self):
+		self.remaining -= 1
+		if not self.remaining:
+			self.loop.stop()
+
+def Callback():
+	pass
+
+def Measure(loopType, workload, total, timerCount):
+	loop = loopType()
+	for index in range(timerCount):
+		loop.call_later(3600 + index, Callback)
+	counter = Counter(loop, total)
+	timer = PerformanceTimer(autoStart=True)
+	if workload == "chain":
+		loop.call_soon(counter.Chain)
+	else:
+		for _ in range(total):
+			loop.call_soon(counter.FanOut)
+	loop.run_forever()
+	timer.Stop()
+	loop.close()
+	return total / (timer.GetDurationNs() / 1e9)
+
+# Callbacks per second for each ready queue with a number of (not expiring)
+# timers pending at the same time.
+def Benchmark():
+	total = 200000
+	print("workload timers deque       list        call_later(0)")
+	for workload in ["chain", "fanout"]:
+		for timerCount in [0, 10000]:
+			results = [
+				Measure(loopType, workload, total, timerCount)
+				for loopType in [CustomEventLoop, ListReadyEventLoop, TimerReadyEventLoop]
+			]
+			line = f"{workload:<8} {timerCount:<6} " + \
+				" ".join(f"{f'{result / 1e6:.2f}M/s':<11}" for result in results)
+			print(line.rstrip())
+
+# Callbacks scheduled during a tick run on the next tick
+def Ordering():
+	loop = CustomEventLoop()
+	def Callback(name):
+		print(f"tick-callback {name}")
+		if name == "first":
+			loop.call_soon(Callback, "scheduled-by-first")
+	loop.call_soon(Callback, "first")
+	loop.call_soon(Callback, "second")
+	loop.run_once()
+	print("end of tick")
+	loop.run_once()
+	loop.close()
+
+Ordering()
+Benchmark()
+
+"""
+tick-callback first
+tick-callback second
+end of tick
+tick-callback scheduled-by-first
+workload timers deque       list        call_later(0)
+chain    0      0.30M/s     0.31M/s     0.15M/s
+chain    10000  0.33M/s     0.30M/s     0.11M/s
+fanout   0      0.35M/s     0.34M/s     0.11M/s
+fanout   10000  0.27M/s     0.25M/s     0.12M/s
+"""
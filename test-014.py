@@ -0,0 +1,107 @@
+import asyncio
+import random
+from CustomEventLoop import CustomEventLoop
+from PerformanceTimer import PerformanceTimer
+from TimerQueue import TimerQueue
+from TimingWheel import TimingWheel
+
+def Callback():
+	pass
+
+def CreateTimers(loop, whens):
+	return [asyncio.TimerHandle(when, Callback, (), loop=loop) for when in whens]
+
+def Measure(action):
+	timer = PerformanceTimer(autoStart=True)
+	result = action()
+	timer.Stop()
+	return timer, result
+
+# All of the timeouts are set up front, 95% are cancelled and then the clock
+# moves forward 1ms per tick until every timer has fired.
+def Phased(name, timers, count):
+	random.seed(1)
+	loop = CustomEventLoop(timers)
+	handles = CreateTimers(loop, [random.uniform(1, 30) for _ in range(count)])
+	cancels = random.sample(handles, count * 95 // 100)
+
+	def Push():
+		for handle in handles:
+			timers.Push(handle)
+	def Cancel():
+		for handle in cancels:
+			handle.cancel()
+	def Drain():
+		ready = []
+		for tick in range(31000):
+			timers.PopExpired(tick / 1000, ready)
+		return len(ready)
+
+	pushTimer, _ = Measure(Push)
+	cancelTimer, _ = Measure(Cancel)
+	# Both compact the cancelled timers on the next tick
+	timers.PopExpired(0, [])
+	retained = len(timers.heap) if isinstance(timers, TimerQueue) else timers.count
+	drainTimer, fired = Measure(Drain)
+	print(f"{name:<6} push={pushTimer}, cancel={cancelTimer}, " \
+		f"retained={retained}, drain={drainTimer}, fired={fired}")
+	loop.close()
+
+# A rolling window of requests: each one sets a 5s timeout that is cancelled
+# (95% of the time) 100 requests later while the clock moves 10us per request.
+def Churn(name, timers, count):
+	random.seed(1)
+	loop = CustomEventLoop(timers)
+	handles = CreateTimers(loop, [index / 100000 + 5 for index in range(count)])
+	cancels = [random.random() < 0.95 for _ in range(count)]
+
+	def Run():
+		ready = []
+		for index, handle in enumerate(handles):
+			timers.Push(handle)
+			if index >= 100 and cancels[index - 100]:
+				handles[index - 100].cancel()
+			timers.PopExpired(index / 100000, ready)
+		return len(ready)
+
+	runTimer, fired = Measure(Run)
+	print(f"{name:<6} churn={runTimer}, fired={fired}, pending={len(timers)}")
+	loop.close()
+
+async def SleepAsync(index):
+	await asyncio.sleep(index / 1000)
+	return index
+
+async def MainAsync():
+	results = await asyncio.gather(*[SleepAsync(index) for index in range(100)])
+	print(f"TimingWheel loop slept {len(results)} tasks, last={results[-1]}")
+
+asyncio.run(MainAsync(), loop_factory=lambda: CustomEventLoop(TimingWheel(0.001)))
+
+# Popping up to a block boundary leaves the timers of the next block on level 1
+# until the boundary tick cascades them, so the next wakeup is that tick and
+# not the next boundary (which would sleep past the timer)
+loop = CustomEventLoop()
+wheel = TimingWheel(0.001, now=0.255)
+wheel.Push(CreateTimers(loop, [0.300])[0])
+wheel.PopExpired(0.2555, [])
+nextWhen = wheel.GetNextWhen()
+fired = []
+wheel.PopExpired(0.300, fired)
+print(f"after a boundary: next when={nextWhen:.3f}, fired by 0.300={len(fired)}")
+loop.close()
+
+count = 1000000
+Phased("heap", TimerQueue(), count)
+Phased("wheel", TimingWheel(0.001, now=0), count)
+Churn("heap", TimerQueue(), count)
+Churn("wheel", TimingWheel(0.001, now=0), count)
+
+"""
+TimingWheel loop slept 100 tasks, last=99
+after a boundary: next when=0.256, fired by 0.300=1
+heap   push=430.18ms, cancel=613.77ms, retained=50000, drain=225.24ms, fired=50000
+wheel  push=719.30ms, cancel=541.30ms, retained=50000, drain=119.16ms, fired=50000
+heap   churn=1.82s, fired=25049, pending=25126
+wheel  churn=2.43s, fired=25044, pending=25131
+"""
@@ -0,0 +1,58 @@
+import asyncio
+import tracemalloc
+from InstrumentedEventLoop import InstrumentedEventLoop
+from MetricsRecorder import RingMetricsRecorder
+from utility import SuspendAlways
+
+async def RequestAsync():
+	for _ in range(3):
+		await SuspendAlways()
+
+# A long running task that stays pinned while thousands of short requests
+# finish around it.
+async def BackgroundAsync(stop):
+	await stop
+
+async def MainAsync():
+	loop = asyncio.get_running_loop()
+	stop = loop.create_future()
+	background = asyncio.create_task(BackgroundAsync(stop))
+	tracemalloc.start()
+	for batch in range(5):
+		await asyncio.gather(*[RequestAsync() for _ in range(20000)])
+		metrics = loop.metrics
+		print(f"batch={batch}, tasks={metrics.GetTaskCount()}, " \
+			f"steps={metrics.GetStepCount()}, " \
+			f"dropped tasks={metrics.droppedTasks}, " \
+			f"dropped steps={metrics.droppedSteps}, " \
+			f"traced memory={tracemalloc.get_traced_memory()[0] // 1024}KB")
+	tracemalloc.stop()
+
+	# The recent window can be read while the loop keeps running
+	snapshot = loop.metrics.Snapshot()
+	tasks = snapshot.GetTasks()
+	running = [task for task in tasks if task.finishedAt is None]
+	print(f"snapshot tasks={len(tasks)}, running={[task.taskId for task in running]}, " \
+		f"steps={len(snapshot.stepIds)}")
+	for task in tasks[-2:]:
+		task.Print()
+	stop.set_result(None)
+	await background
+
+loop = InstrumentedEventLoop(metrics=RingMetricsRecorder(capacity=4096))
+asyncio.run(MainAsync(), loop_factory=lambda: loop)
+print(f"Ring memory={loop.metrics.GetMemoryBytes() // 1024}KB")
+
+"""
+batch=0, tasks=20002, steps=100002, dropped tasks=15904, dropped steps=95906, traced memory=14767KB
+batch=1, tasks=40002, steps=200003, dropped tasks=35904, dropped steps=195907, traced memory=14776KB
+batch=2, tasks=60002, steps=300004, dropped tasks=55904, dropped steps=295908, traced memory=14784KB
+batch=3, tasks=80002, steps=400005, dropped tasks=75904, dropped steps=395909, traced memory=14784KB
+batch=4, tasks=100002, steps=500006, dropped tasks=95904, dropped steps=495910, traced memory=14784KB
+snapshot tasks=4098, running=[0, 1], steps=4096
+taskId=100000, parent=80001, createdAt=1337607664100
+  stepId=4, createdAt=1339898527822, startedAt=1340713288811, finishedAt=1340713293962
+taskId=100001, parent=80001, createdAt=1337607685127
+  stepId=4, createdAt=1339898556121, startedAt=1340713322832, finishedAt=1340722785064
+Ring memory=352KB
+"""
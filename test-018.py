@@ -0,0 +1,88 @@
+import asyncio
+import itertools
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from InstrumentedEventLoop import InstrumentedEventLoop
+from MetricsExporter import BinaryMetricsExporter
+from MetricsReader import ReadRecords
+from MetricsRecorder import RingMetricsRecorder
+from TraceExporter import WriteChromeTrace
+from utility import SuspendAlways
+
+async def ChildAsync():
+	for _ in range(3):
+		await SuspendAlways()
+
+async def RequestAsync():
+	await asyncio.create_task(ChildAsync())
+	await asyncio.sleep(0.002)
+
+async def MainAsync():
+	for _ in range(10):
+		await asyncio.gather(*[RequestAsync() for _ in range(10000)])
+		await asyncio.sleep(0.01)
+
+directory = tempfile.mkdtemp()
+binaryPath = os.path.join(directory, 'metrics.bin')
+tracePath = os.path.join(directory, 'trace.json')
+
+# Small recordings straight from a snapshot
+async def SmallAsync():
+	await asyncio.gather(*[RequestAsync() for _ in range(2)])
+	return asyncio.get_running_loop().metrics.Snapshot()
+
+loop = InstrumentedEventLoop()
+snapshot = asyncio.run(SmallAsync(), loop_factory=lambda: loop)
+smallPath = os.path.join(directory, 'small.json')
+WriteChromeTrace(snapshot.GetRecords(), smallPath)
+with open(smallPath) as file:
+	events = json.load(file)['traceEvents']
+print(f"small trace events={len(events)}, phases={sorted(set(event['ph'] for event in events))}")
+for event in events:
+	if event['ph'] in 'sf':
+		print(event)
+
+# Large recordings from the binary export
+loop = InstrumentedEventLoop(metrics=RingMetricsRecorder(
+	capacity=4096,
+	exporter=BinaryMetricsExporter(binaryPath)
+))
+asyncio.run(MainAsync(), loop_factory=lambda: loop)
+print(f"records={sum(1 for _ in ReadRecords(binaryPath))}")
+
+startedAt = time.perf_counter()
+eventCount = WriteChromeTrace(ReadRecords(binaryPath), tracePath)
+print(f"events={eventCount}, {time.perf_counter() - startedAt:.2f}s, " \
+	f"trace={os.path.getsize(tracePath) // (1024 * 1024)}MB")
+
+# The peak memory stays the same however many records are converted
+for recordCount in (100000, 1000000):
+	tracemalloc.start()
+	WriteChromeTrace(itertools.islice(ReadRecords(binaryPath), recordCount), tracePath)
+	print(f"records={recordCount}, peak traced memory={tracemalloc.get_traced_memory()[1] // 1024}KB")
+	tracemalloc.stop()
+WriteChromeTrace(ReadRecords(binaryPath), tracePath)
+
+with open(tracePath) as file:
+	events = json.load(file)['traceEvents']
+print(f"parsed events={len(events)}")
+
+"""
+small trace events=42, phases=['M', 'X', 'f', 's']
+{'ph': 's', 'name': 'create_task', 'cat': 'task', 'id': 2, 'pid': 1, 'tid': 2, 'ts': 6819268284.083}
+{'ph': 'f', 'name': 'create_task', 'cat': 'task', 'id': 2, 'pid': 1, 'tid': 3, 'ts': 6819268284.083}
+{'ph': 's', 'name': 'create_task', 'cat': 'task', 'id': 3, 'pid': 1, 'tid': 2, 'ts': 6819268320.045}
+{'ph': 'f', 'name': 'create_task', 'cat': 'task', 'id': 3, 'pid': 1, 'tid': 4, 'ts': 6819268320.045}
+{'ph': 's', 'name': 'create_task', 'cat': 'task', 'id': 4, 'pid': 1, 'tid': 3, 'ts': 6819268374.201}
+{'ph': 'f', 'name': 'create_task', 'cat': 'task', 'id': 4, 'pid': 1, 'tid': 5, 'ts': 6819268374.201}
+{'ph': 's', 'name': 'create_task', 'cat': 'task', 'id': 5, 'pid': 1, 'tid': 4, 'ts': 6819268394.971}
+{'ph': 'f', 'name': 'create_task', 'cat': 'task', 'id': 5, 'pid': 1, 'tid': 6, 'ts': 6819268394.971}
+records=1100049
+events=1700054, 3.70s, trace=178MB
+records=100000, peak traced memory=2119KB
+records=1000000, peak traced memory=2133KB
+parsed events=1700054
+"""
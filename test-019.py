@@ -0,0 +1,71 @@
+import asyncio
+import time
+from InstrumentedEventLoop import InstrumentedEventLoop
+from MetricsRecorder import RingMetricsRecorder
+from utility import SuspendAlways
+
+# Blocks the loop while awaiting from two coroutines down
+async def ParseAsync():
+	time.sleep(0.02)
+	await asyncio.sleep(0)
+
+async def HandleRequestAsync():
+	await ParseAsync()
+
+async def FastAsync():
+	for _ in range(5):
+		await SuspendAlways()
+
+async def MainAsync():
+	await asyncio.gather(
+		asyncio.create_task(HandleRequestAsync(), name="request"),
+		FastAsync()
+	)
+
+slowSteps = []
+loop = InstrumentedEventLoop(slowStepThreshold=0.01, slowStepHandler=slowSteps.append)
+asyncio.run(MainAsync(), loop_factory=lambda: loop)
+print(f"slow steps={len(slowSteps)}")
+for slowStep in slowSteps:
+	slowStep.Print()
+
+# The default handler prints
+loop = InstrumentedEventLoop(slowStepThreshold=0.01)
+asyncio.run(MainAsync(), loop_factory=lambda: loop)
+
+# Cost on the fast path
+async def ThroughputAsync():
+	await asyncio.gather(*[FastAsync() for _ in range(50000)])
+
+for threshold in (None, 0.01, None, 0.01):
+	loop = InstrumentedEventLoop(
+		metrics=RingMetricsRecorder(capacity=4096),
+		slowStepThreshold=threshold
+	)
+	startedAt = time.perf_counter()
+	asyncio.run(ThroughputAsync(), loop_factory=lambda: loop)
+	print(f"threshold={threshold}: {time.perf_counter() - startedAt:.2f}s")
+
+"""
+slow steps=1
+Slow step: taskId=1, stepId=0, duration=20.15ms, task=request, coro=HandleRequestAsync (HandleRequestAsync)
+  at HandleRequestAsync (/root/package/test-019.py:13)
+  at ParseAsync (/root/package/test-019.py:10)
+  at sleep (/root/.pyenv/versions/3.12.1/lib/python3.12/asyncio/tasks.py:656)
+  at __sleep0 (/root/.pyenv/versions/3.12.1/lib/python3.12/asyncio/tasks.py:650)
+Slow step: taskId=1, stepId=0, duration=20.15ms, task=request, coro=HandleRequestAsync (HandleRequestAsync)
+  at HandleRequestAsync (/root/package/test-019.py:13)
+  at ParseAsync (/root/package/test-019.py:10)
+  at sleep (/root/.pyenv/versions/3.12.1/lib/python3.12/asyncio/tasks.py:656)
+  at __sleep0 (/root/.pyenv/versions/3.12.1/lib/python3.12/asyncio/tasks.py:650)
+threshold=None: 2.38s
+Slow step: taskId=0, stepId=0, duration=461.47ms, task=Task-50014, coro=ThroughputAsync (ThroughputAsync)
+  at ThroughputAsync (/root/package/test-019.py:38)
+  at <_asyncio.FutureIter object at 0x7fc27839a350>
+threshold=0.01: 2.09s
+threshold=None: 2.50s
+Slow step: taskId=0, stepId=0, duration=479.98ms, task=Task-150020, coro=ThroughputAsync (ThroughputAsync)
+  at ThroughputAsync (/root/package/test-019.py:38)
+  at <_asyncio.FutureIter object at 0x7fc27839a350>
+threshold=0.01: 2.41s
+"""
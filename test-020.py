@@ -0,0 +1,64 @@
+import asyncio
+import contextvars
+import threading
+from InstrumentedEventLoop import InstrumentedEventLoop
+
+nameVar = contextvars.ContextVar('name')
+
+def Callback(name):
+	print(f"{name} ran")
+
+async def ChildAsync(future):
+	# A done callback runs in the context it was added from
+	future.add_done_callback(lambda _: asyncio.get_running_loop().call_later(0, Callback, "timer from done callback"))
+	await future
+
+async def SetNameAsync(name):
+	nameVar.set(name)
+
+async def MainAsync():
+	loop = asyncio.get_running_loop()
+	future = loop.create_future()
+	child = asyncio.create_task(ChildAsync(future))
+	await asyncio.sleep(0)
+
+	# Work from another thread belongs to no task
+	thread = threading.Thread(
+		target=loop.call_soon_threadsafe,
+		args=(loop.call_soon, Callback, "callback from threadsafe callback")
+	)
+	thread.start()
+	thread.join()
+	await asyncio.sleep(0.01)
+
+	future.set_result(None)
+	await child
+
+	# A context passed to create_task is used as is (like asyncio does), so
+	# the task's writes show up in it
+	context = contextvars.copy_context()
+	await loop.create_task(SetNameAsync("set by the task"), context=context)
+	print(f"shared context: {context.get(nameVar)}")
+
+loop = InstrumentedEventLoop()
+# Scheduled before any task exists (test-009.py raised RuntimeError here)
+loop.call_soon(Callback, "callback before run")
+asyncio.run(MainAsync(), loop_factory=lambda: loop)
+
+snapshot = loop.metrics.Snapshot()
+for task in snapshot.GetTasks():
+	label = "overhead" if task.taskId == loop.overheadTaskId else f"task {task.taskId}"
+	print(f"{label}: parent={task.parentTaskId}, steps={len(task.steps)}")
+
+"""
+callback before run ran
+callback from threadsafe callback ran
+timer from done callback ran
+shared context: set by the task
+overhead: parent=None, steps=5
+task 1: parent=None, steps=6
+task 2: parent=1, steps=4
+task 3: parent=1, steps=1
+task 4: parent=None, steps=1
+task 5: parent=None, steps=1
+"""
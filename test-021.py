@@ -0,0 +1,71 @@
+import asyncio
+import time
+from InstrumentedEventLoop import InstrumentedEventLoop
+from TaskStatistics import TaskStatistics
+from utility import SuspendAlways
+
+def Burn(durationS):
+	end = time.perf_counter() + durationS
+	while time.perf_counter() < end:
+		pass
+
+async def QueryAsync(durationS):
+	for _ in range(4):
+		Burn(durationS / 4)
+		await SuspendAlways()
+
+# The handler itself is cheap, the subtasks it spawns are not
+async def HandlerAsync(durationS):
+	await asyncio.gather(
+		asyncio.create_task(QueryAsync(durationS)),
+		asyncio.create_task(QueryAsync(durationS))
+	)
+
+async def MainAsync():
+	loop = asyncio.get_running_loop()
+	statistics = loop.statistics
+	handlers = [asyncio.create_task(HandlerAsync(0.002 * index)) for index in range(1, 6)]
+	await asyncio.sleep(0)
+	await asyncio.sleep(0)
+	# Queried while the handlers are still running
+	aggregate = statistics.Get(loop.taskIds[handlers[-1]])
+	print(f"running: handler cpu={aggregate.cpuNs // 1000}us, " \
+		f"inclusive cpu={aggregate.totalCpuNs // 1000}us, steps={aggregate.totalSteps}")
+	await asyncio.gather(*handlers)
+	print("top 5:")
+	statistics.Print(5)
+	aggregate = statistics.Get(loop.taskIds[asyncio.current_task()])
+	print(f"main inclusive steps={aggregate.totalSteps}")
+
+statistics = TaskStatistics()
+loop = InstrumentedEventLoop(statistics=statistics)
+asyncio.run(MainAsync(), loop_factory=lambda: loop)
+
+# Cost per step with and without the aggregates
+async def FanOutAsync(depth):
+	if depth:
+		await asyncio.gather(*[asyncio.create_task(FanOutAsync(depth - 1)) for _ in range(6)])
+	for _ in range(5):
+		await SuspendAlways()
+
+for statistics in (None, TaskStatistics(), None, TaskStatistics()):
+	loop = InstrumentedEventLoop(statistics=statistics)
+	startedAt = time.perf_counter()
+	asyncio.run(FanOutAsync(6), loop_factory=lambda: loop)
+	print(f"statistics={statistics is not None}: {time.perf_counter() - startedAt:.2f}s, " \
+		f"steps={loop.metrics.GetStepCount()}")
+
+"""
+running: handler cpu=106us, inclusive cpu=5135us, steps=3
+top 5:
+taskId=1, parent=None, children=5, wall=62.26ms, steps=8/78, cpu=207.82us/61.47ms, max step=118.46us/2.56ms, queue wait=15.76ms/572.95ms
+taskId=6, parent=1, children=2, wall=61.97ms, steps=4/14, cpu=119.31us/20.40ms, max step=106.69us/2.56ms, queue wait=478.99us/103.31ms
+taskId=5, parent=1, children=2, wall=61.97ms, steps=4/14, cpu=26.84us/16.25ms, max step=14.51us/2.03ms, queue wait=478.10us/107.44ms
+taskId=4, parent=1, children=2, wall=61.97ms, steps=4/14, cpu=30.45us/12.24ms, max step=16.86us/1.54ms, queue wait=479.73us/111.45ms
+taskId=16, parent=6, children=0, wall=61.62ms, steps=5/5, cpu=10.15ms/10.15ms, max step=2.56ms/2.56ms, queue wait=51.36ms/51.36ms
+main inclusive steps=78
+statistics=False: 3.65s, steps=401244
+statistics=True: 5.32s, steps=401244
+statistics=False: 3.78s, steps=401244
+statistics=True: 5.98s, steps=401244
+"""
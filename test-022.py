@@ -0,0 +1,82 @@
+import asyncio
+import math
+import time
+from InstrumentedEventLoop import InstrumentedEventLoop
+from LogHistogram import LoopHistograms
+from MetricsRecorder import RingMetricsRecorder
+from utility import SuspendAlways
+
+async def RequestAsync():
+	for _ in range(3):
+		await SuspendAlways()
+	await asyncio.sleep(0.001)
+
+# Bursts of requests queue up behind each other
+async def MainAsync(burstSize):
+	for _ in range(20):
+		await asyncio.gather(*[RequestAsync() for _ in range(burstSize)])
+		await asyncio.sleep(0.005)
+
+def GetExactPercentile(values, percentile):
+	values = sorted(values)
+	return values[max(0, math.ceil(len(values) * percentile / 100) - 1)]
+
+# The histogram percentiles against the exact ones from every stored step
+merged = LoopHistograms()
+for burstSize in (100, 2000):
+	histograms = LoopHistograms()
+	loop = InstrumentedEventLoop(histograms=histograms)
+	asyncio.run(MainAsync(burstSize), loop_factory=lambda: loop)
+	print(f"burst={burstSize}")
+	histograms.Print()
+	metrics = loop.metrics
+	delays = [started - created for started, created in zip(metrics.stepStartedAt, metrics.stepCreatedAt)]
+	for percentile in (50, 99, 99.9):
+		exact = GetExactPercentile(delays, percentile)
+		estimate = histograms.queueDelay.GetPercentile(percentile)
+		print(f"  queue delay p{percentile}: exact={exact}ns, histogram={estimate}ns, " \
+			f"error={(estimate - exact) / exact:.3%}")
+	merged.Merge(histograms)
+
+print("merged")
+merged.Print()
+print(f"histogram memory={merged.GetMemoryBytes() // 1024}KB")
+
+# Cost per step (with the ring recorder so that only the histograms grow work)
+async def ThroughputAsync():
+	await asyncio.gather(*[RequestAsync() for _ in range(50000)])
+
+for histograms in (None, LoopHistograms(), None, LoopHistograms()):
+	loop = InstrumentedEventLoop(
+		metrics=RingMetricsRecorder(capacity=4096),
+		histograms=histograms
+	)
+	startedAt = time.perf_counter()
+	asyncio.run(ThroughputAsync(), loop_factory=lambda: loop)
+	print(f"histograms={histograms is not None}: {time.perf_counter() - startedAt:.2f}s")
+
+"""
+burst=100
+queue delay: count=14066, mean=911.79us, p50=864.25us, p99=2.21ms, p99.9=5.28ms, max=8.29ms
+step duration: count=14066, mean=6.93us, p50=4.38us, p99=20.22us, p99.9=1.16ms, max=2.15ms
+idle duration: count=20, mean=5.28ms, p50=5.14ms, p99=8.14ms, p99.9=8.14ms, max=8.14ms
+  queue delay p50: exact=861872ns, histogram=864255ns, error=0.276%
+  queue delay p99: exact=2200447ns, histogram=2211839ns, error=0.518%
+  queue delay p99.9: exact=5256220ns, histogram=5275647ns, error=0.370%
+burst=2000
+queue delay: count=280066, mean=18.28ms, p50=17.43ms, p99=35.39ms, p99.9=43.78ms, max=46.84ms
+step duration: count=280066, mean=6.58us, p50=4.19us, p99=11.13us, p99.9=141.31us, max=34.43ms
+idle duration: count=20, mean=3.88ms, p50=4.13ms, p99=4.18ms, p99.9=4.18ms, max=4.18ms
+  queue delay p50: exact=17314445ns, histogram=17432575ns, error=0.682%
+  queue delay p99: exact=35199237ns, histogram=35389439ns, error=0.540%
+  queue delay p99.9: exact=43609557ns, histogram=43778047ns, error=0.386%
+merged
+queue delay: count=294132, mean=17.45ms, p50=17.17ms, p99=35.13ms, p99.9=43.78ms, max=46.84ms
+step duration: count=294132, mean=6.60us, p50=4.22us, p99=11.39us, p99.9=144.38us, max=34.43ms
+idle duration: count=40, mean=4.58ms, p50=4.19ms, p99=8.14ms, p99.9=8.14ms, max=8.14ms
+histogram memory=228KB
+histograms=False: 4.72s
+histograms=True: 5.45s
+histograms=False: 4.74s
+histograms=True: 5.58s
+"""
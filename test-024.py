@@ -0,0 +1,84 @@
+import asyncio
+import math
+import time
+from CustomEventLoop import CustomEventLoop
+from Scheduler import CreateTask, FairShareScheduler, FifoScheduler, PriorityScheduler
+from utility import SuspendAlways
+
+def Burn(durationS):
+	end = time.perf_counter() + durationS
+	while time.perf_counter() < end:
+		pass
+
+# Background batch job: many subtasks that always have a step ready
+async def ChattyWorkerAsync(stop, counter):
+	while not stop.done():
+		Burn(0.00002)
+		counter[0] += 1
+		await SuspendAlways()
+
+async def BatchAsync(stop, counter):
+	await asyncio.gather(*[ChattyWorkerAsync(stop, counter) for _ in range(200)])
+
+# Latency sensitive request: three short steps
+async def RequestAsync(latencies):
+	startedAt = time.perf_counter()
+	for _ in range(3):
+		await SuspendAlways()
+	latencies.append(time.perf_counter() - startedAt)
+
+async def MainAsync(latencies, counter):
+	loop = asyncio.get_running_loop()
+	stop = loop.create_future()
+	# Top-level tasks get a fair share group of their own without a weight
+	batch = loop.create_task(BatchAsync(stop, counter), priority=1)
+	requests = []
+	for _ in range(200):
+		requests.append(asyncio.create_task(RequestAsync(latencies)))
+		await asyncio.sleep(0.005)
+	await asyncio.gather(*requests)
+	stop.set_result(None)
+	await batch
+
+def GetPercentile(values, percentile):
+	values = sorted(values)
+	return values[max(0, math.ceil(len(values) * percentile / 100) - 1)]
+
+for name, readyFactory in (
+	("fifo", FifoScheduler),
+	("priority", PriorityScheduler),
+	("fair share", FairShareScheduler)
+):
+	latencies = []
+	counter = [0]
+	loop = CustomEventLoop(ready=readyFactory())
+	startedAt = time.perf_counter()
+	asyncio.run(MainAsync(latencies, counter), loop_factory=lambda: loop)
+	elapsed = time.perf_counter() - startedAt
+	print(f"{name}: batch steps/s={counter[0] / elapsed:.0f}, " \
+		f"request p50={GetPercentile(latencies, 50) * 1000:.2f}ms, " \
+		f"p99={GetPercentile(latencies, 99) * 1000:.2f}ms, " \
+		f"max={max(latencies) * 1000:.2f}ms")
+
+# Raw call_soon throughput of each queue
+async def ThroughputAsync():
+	await asyncio.gather(*[CreateTask(RequestAsync([]), priority=index % 4, weight=1 + index % 3) for index in range(50000)])
+
+for name, readyFactory in (
+	("fifo", FifoScheduler),
+	("priority", PriorityScheduler),
+	("fair share", FairShareScheduler)
+):
+	loop = CustomEventLoop(ready=readyFactory())
+	startedAt = time.perf_counter()
+	asyncio.run(ThroughputAsync(), loop_factory=lambda: loop)
+	print(f"{name}: 50000 tasks x 4 steps in {time.perf_counter() - startedAt:.2f}s")
+
+"""
+fifo: batch steps/s=41314, request p50=14.33ms, p99=19.54ms, max=23.56ms
+priority: batch steps/s=40241, request p50=0.01ms, p99=0.03ms, max=0.04ms
+fair share: batch steps/s=40239, request p50=0.09ms, p99=0.12ms, max=0.26ms
+fifo: 50000 tasks x 4 steps in 1.62s
+priority: 50000 tasks x 4 steps in 1.73s
+fair share: 50000 tasks x 4 steps in 2.82s
+"""
@@ -0,0 +1,103 @@
+import asyncio
+import time
+from CustomEventLoop import CustomEventLoop
+from InstrumentedEventLoop import InstrumentedEventLoop
+from LogHistogram import LoopHistograms
+from Scheduler import CreateTask, EdfScheduler, FifoScheduler, deadlineVar
+from TaskStatistics import TaskStatistics
+
+def Burn(durationS):
+	end = time.perf_counter() + durationS
+	while time.perf_counter() < end:
+		pass
+
+async def StepAsync():
+	Burn(0.0002)
+	await asyncio.sleep(0)
+
+# Each request does its work in child tasks (which inherit the deadline)
+async def RequestAsync():
+	for _ in range(5):
+		await asyncio.create_task(StepAsync())
+	return asyncio.get_running_loop().time() <= deadlineVar.get()
+
+# Bursts that need more CPU than there is, with mixed deadlines
+async def MainAsync():
+	requests = []
+	for burst in range(20):
+		for index in range(60):
+			timeout = 0.01 if index % 4 == 0 else 0.2
+			requests.append(CreateTask(RequestAsync(), timeout=timeout))
+		await asyncio.sleep(0.03)
+	results = {'on time': 0, 'late': 0, 'shed': 0}
+	for onTime in await asyncio.gather(*requests, return_exceptions=True):
+		if isinstance(onTime, asyncio.CancelledError):
+			results['shed'] += 1
+		else:
+			results['on time' if onTime else 'late'] += 1
+	return results
+
+for name, readyFactory in (
+	("fifo", FifoScheduler),
+	("edf", EdfScheduler),
+	("edf + shed", lambda: EdfScheduler(shed=True))
+):
+	ready = readyFactory()
+	loop = CustomEventLoop(ready=ready)
+	startedAt = time.perf_counter()
+	results = asyncio.run(MainAsync(), loop_factory=lambda: loop)
+	print(f"{name}: {time.perf_counter() - startedAt:.2f}s, {results}")
+	if isinstance(ready, EdfScheduler):
+		ready.Print()
+
+# The misses also show up in the instrumented loop's metrics: per task (rolled
+# up to the main task) and as a lateness histogram
+statistics = TaskStatistics()
+loop = InstrumentedEventLoop(
+	ready=EdfScheduler(shed=True),
+	statistics=statistics,
+	histograms=LoopHistograms()
+)
+results = asyncio.run(MainAsync(), loop_factory=lambda: loop)
+print(f"instrumented edf + shed: {results}")
+statistics.GetTopTasks(1)[0].Print()
+print(f"shed tasks={sum(aggregate.isShed for aggregate in statistics.finishedTasks.values())}")
+loop.histograms.deadlineLateness.Print("deadline lateness")
+
+# The loop's create_task takes an absolute deadline too, and a child task never
+# gets a later one than its parent
+async def DeadlineAsync(startedAt):
+	return round(deadlineVar.get() - startedAt, 3)
+
+async def ParentAsync(startedAt):
+	loop = asyncio.get_running_loop()
+	return [
+		await DeadlineAsync(startedAt),
+		await loop.create_task(DeadlineAsync(startedAt), deadline=startedAt + 1),
+		await loop.create_task(DeadlineAsync(startedAt), deadline=startedAt + 0.2)
+	]
+
+async def CreateTaskDeadlinesAsync():
+	loop = asyncio.get_running_loop()
+	startedAt = loop.time()
+	return await loop.create_task(ParentAsync(startedAt), deadline=startedAt + 0.5)
+
+for name, loopFactory in (("custom", CustomEventLoop), ("instrumented", InstrumentedEventLoop)):
+	deadlines = asyncio.run(CreateTaskDeadlinesAsync(), loop_factory=loopFactory)
+	print(f"{name} create_task deadlines: parent, child asking for 1, child asking for 0.2={deadlines}")
+
+"""
+fifo: 1.32s, {'on time': 765, 'late': 435, 'shed': 0}
+edf: 1.36s, {'on time': 1067, 'late': 133, 'shed': 0}
+missed steps=1947, shed tasks=0
+lateness: count=1947, mean=3.33ms, p50=3.34ms, p99=6.75ms, p99.9=8.26ms, max=8.27ms
+edf + shed: 1.23s, {'on time': 1060, 'late': 0, 'shed': 140}
+missed steps=174, shed tasks=174
+lateness: count=174, mean=118.28us, p50=114.17us, p99=385.02us, p99.9=391.75us, max=391.75us
+instrumented edf + shed: {'on time': 1034, 'late': 0, 'shed': 166}
+taskId=1, parent=None, children=1200, wall=1.42s, steps=41/16973, cpu=23.50ms/1.26s, max step=3.37ms/3.37ms, queue wait=1.40s/39.58s, missed steps=0/250
+shed tasks=207
+deadline lateness: count=250, mean=167.85us, p50=100.35us, p99=1.80ms, p99.9=1.84ms, max=1.84ms
+custom create_task deadlines: parent, child asking for 1, child asking for 0.2=[0.5, 0.5, 0.2]
+instrumented create_task deadlines: parent, child asking for 1, child asking for 0.2=[0.5, 0.5, 0.2]
+"""
@@ -0,0 +1,89 @@
+import asyncio
+import math
+import time
+from CustomEventLoop import CustomEventLoop
+from Scheduler import BudgetScheduler, CreateTask, YieldIfExhausted
+from utility import SuspendAlways
+
+def Burn(durationS):
+	end = time.perf_counter() + durationS
+	while time.perf_counter() < end:
+		pass
+
+# Counts how often an awaitable really gives control back to the loop
+class CountYields:
+	def __init__(self, awaitable, counter):
+		self.awaitable = awaitable
+		self.counter = counter
+
+	def __await__(self):
+		for value in self.awaitable.__await__():
+			self.counter[0] += 1
+			yield value
+
+# 40ms of compute in 0.1ms chunks with a possible yield point between chunks
+async def HeavyAsync(yieldPoint, counter):
+	for _ in range(400):
+		Burn(0.0001)
+		if yieldPoint is not None:
+			await CountYields(yieldPoint(), counter)
+
+# Latency is measured from when the request was due to arrive, so time spent
+# blocked before it could even be created counts too.
+async def RequestAsync(arrivedAt, latencies):
+	for _ in range(3):
+		await SuspendAlways()
+	latencies.append(time.perf_counter() - arrivedAt)
+
+async def MainAsync(yieldPoint, budget):
+	latencies = []
+	counter = [0]
+	heavy = [
+		CreateTask(HeavyAsync(yieldPoint, counter), budget=budget, window=0.05, name=f"heavy {index}")
+		for index in range(4)
+	]
+	requests = []
+	startedAt = time.perf_counter()
+	for index in range(100):
+		arrivedAt = startedAt + index * 0.002
+		await asyncio.sleep(max(0, arrivedAt - time.perf_counter()))
+		requests.append(asyncio.create_task(RequestAsync(arrivedAt, latencies)))
+	await asyncio.gather(*heavy, *requests)
+	return latencies, counter[0]
+
+def GetPercentile(values, percentile):
+	values = sorted(values)
+	return values[max(0, math.ceil(len(values) * percentile / 100) - 1)]
+
+exhausted = []
+for name, yieldPoint, budget, ready in (
+	("no yield points", None, None, None),
+	("SuspendAlways every chunk", SuspendAlways, None, None),
+	("YieldIfExhausted, no budget", YieldIfExhausted, None, BudgetScheduler(handler=exhausted.append)),
+	("YieldIfExhausted, 2ms/50ms budget", YieldIfExhausted, 0.002, BudgetScheduler(handler=exhausted.append)),
+	("YieldIfExhausted, 0.5ms/50ms budget", YieldIfExhausted, 0.0005, BudgetScheduler(handler=exhausted.append)),
+):
+	exhausted.clear()
+	loop = CustomEventLoop(ready=ready)
+	startedAt = time.perf_counter()
+	latencies, yieldCount = asyncio.run(MainAsync(yieldPoint, budget), loop_factory=lambda: loop)
+	print(f"{name}: {time.perf_counter() - startedAt:.2f}s, yields={yieldCount}, " \
+		f"requests={len(latencies)}, p50={GetPercentile(latencies, 50) * 1000:.2f}ms, " \
+		f"p99={GetPercentile(latencies, 99) * 1000:.2f}ms, max={max(latencies) * 1000:.2f}ms, " \
+		f"exhausted={len(exhausted)}")
+
+# The default handler logs
+async def LoggedAsync():
+	await CreateTask(HeavyAsync(YieldIfExhausted, [0]), budget=0.01, window=0.05, name="logged")
+
+loop = CustomEventLoop(ready=BudgetScheduler())
+asyncio.run(LoggedAsync(), loop_factory=lambda: loop)
+
+"""
+no yield points: 0.20s, yields=0, requests=100, p50=68.17ms, p99=165.11ms, max=167.08ms, exhausted=0
+SuspendAlways every chunk: 0.20s, yields=1600, requests=100, p50=2.81ms, p99=5.46ms, max=5.67ms, exhausted=0
+YieldIfExhausted, no budget: 0.21s, yields=0, requests=100, p50=65.08ms, p99=161.98ms, max=163.95ms, exhausted=0
+YieldIfExhausted, 2ms/50ms budget: 0.21s, yields=1267, requests=100, p50=0.48ms, p99=14.40ms, max=16.26ms, exhausted=16
+YieldIfExhausted, 0.5ms/50ms budget: 0.20s, yields=1530, requests=100, p50=0.40ms, p99=3.70ms, max=3.82ms, exhausted=16
+Task budget exhausted: logged, used=10.08ms of 10.00ms per 50.00ms
+"""
@@ -0,0 +1,64 @@
+import asyncio
+import random
+import time
+from CustomEventLoop import CustomEventLoop
+from InstrumentedEventLoop import InstrumentedEventLoop
+from MetricsRecorder import RingMetricsRecorder
+from utility import SuspendAlways
+
+# Most lookups are answered from the cache without suspending
+async def LookupAsync(key, cache):
+	value = cache.get(key)
+	if value is None:
+		await SuspendAlways()
+		value = cache[key] = key * 2
+	return value
+
+async def MainAsync(keys):
+	cache = {key: key * 2 for key in range(9000)}
+	results = []
+	for batch in range(0, len(keys), 1000):
+		results.extend(await asyncio.gather(*[
+			asyncio.create_task(LookupAsync(key, cache))
+			for key in keys[batch:batch + 1000]
+		]))
+	return results
+
+random.seed(1)
+# 90% of the keys are cached
+keys = [random.randrange(10000) for _ in range(100000)]
+
+async def EagerCheckAsync():
+	task = asyncio.create_task(LookupAsync(1, {1: 2}))
+	return task.done()
+
+for name, loopFactory in (
+	("custom", lambda: CustomEventLoop()),
+	("custom eager", lambda: CustomEventLoop(eagerTasks=True)),
+	("instrumented", lambda: InstrumentedEventLoop(metrics=RingMetricsRecorder())),
+	("instrumented eager", lambda: InstrumentedEventLoop(metrics=RingMetricsRecorder(), eagerTasks=True)),
+):
+	loop = loopFactory()
+	print(f"{name}: done inside create_task={asyncio.run(EagerCheckAsync(), loop_factory=lambda: loop)}")
+	best = None
+	for _ in range(3):
+		loop = loopFactory()
+		startedAt = time.perf_counter()
+		results = asyncio.run(MainAsync(keys), loop_factory=lambda: loop)
+		elapsed = time.perf_counter() - startedAt
+		best = elapsed if best is None else min(best, elapsed)
+	details = ""
+	if isinstance(loop, InstrumentedEventLoop):
+		details = f", callbacks scheduled={loop.callbackCount}, steps={loop.metrics.GetStepCount()}"
+	print(f"{name}: {len(results)} lookups in {best:.2f}s{details}")
+
+"""
+custom: done inside create_task=False
+custom: 100000 lookups in 0.96s
+custom eager: done inside create_task=True
+custom eager: 100000 lookups in 0.38s
+instrumented: done inside create_task=False
+instrumented: 100000 lookups in 2.41s, callbacks scheduled=201144, steps=201144
+instrumented eager: done inside create_task=True
+instrumented eager: 100000 lookups in 1.16s, callbacks scheduled=2133, steps=102133
+"""
@@ -0,0 +1,78 @@
+import asyncio
+import time
+from CustomEventLoop import CustomEventLoop
+from LightTask import LightTask
+from Scheduler import PriorityScheduler
+from utility import SuspendAlways
+
+async def StepsAsync(stepCount):
+	for _ in range(stepCount):
+		await SuspendAlways()
+	return stepCount
+
+# Each step waits on a future resolved by the other side
+async def PingAsync(count, inbox, outbox):
+	loop = asyncio.get_running_loop()
+	for _ in range(count):
+		future = loop.create_future()
+		outbox.append(future)
+		while not inbox:
+			await SuspendAlways()
+		inbox.pop().set_result(None)
+		await future
+
+async def MainAsync(taskType, workload):
+	if workload == "bare yields":
+		results = await asyncio.gather(*[taskType(StepsAsync(1000)) for _ in range(1000)])
+		return sum(results)
+	left, right = [], []
+	await asyncio.gather(taskType(PingAsync(50000, left, right)), taskType(PingAsync(50000, right, left)))
+	return 100000
+
+for workload in ("bare yields", "futures"):
+	for name, taskType in (
+		("asyncio.Task", lambda coro: asyncio.get_running_loop().create_task(coro)),
+		("LightTask", LightTask),
+	):
+		loop = CustomEventLoop()
+		startedAt = time.perf_counter()
+		steps = asyncio.run(MainAsync(taskType, workload), loop_factory=lambda: loop)
+		elapsed = time.perf_counter() - startedAt
+		print(f"{workload}, {name}: {steps} awaits in {elapsed:.2f}s ({steps / elapsed:.0f}/s)")
+
+# Also runs on the other ready queue policies
+async def PolicyAsync():
+	return await asyncio.gather(LightTask(StepsAsync(3)), StepsAsync(2), asyncio.sleep(0.001, 1))
+
+loop = CustomEventLoop(ready=PriorityScheduler())
+print(f"PriorityScheduler: {asyncio.run(PolicyAsync(), loop_factory=lambda: loop)}")
+
+# A LightTask is the current task, so timeouts work inside it
+async def TimeoutsAsync():
+	results = [asyncio.current_task() is not None, await asyncio.wait_for(StepsAsync(3), 1)]
+	try:
+		await asyncio.wait_for(asyncio.sleep(1), 0.01)
+	except TimeoutError:
+		results.append("wait_for timed out")
+	async with asyncio.timeout(0.01):
+		await asyncio.sleep(0)
+	try:
+		async with asyncio.timeout(0.01):
+			await asyncio.sleep(1)
+	except TimeoutError:
+		results.append("timeout timed out")
+	return results
+
+async def LightTimeoutsAsync():
+	return await LightTask(TimeoutsAsync())
+
+print(f"LightTask timeouts: {asyncio.run(LightTimeoutsAsync(), loop_factory=CustomEventLoop)}")
+
+"""
+bare yields, asyncio.Task: 1000000 awaits in 2.51s (398814/s)
+bare yields, LightTask: 1000000 awaits in 1.72s (581723/s)
+futures, asyncio.Task: 100000 awaits in 0.46s (218715/s)
+futures, LightTask: 100000 awaits in 0.46s (216839/s)
+PriorityScheduler: [3, 2, 1]
+LightTask timeouts: [True, 3, 'wait_for timed out', 'timeout timed out']
+"""
@@ -0,0 +1,74 @@
+import asyncio
+import time
+import tracemalloc
+from CustomEventLoop import CustomEventLoop
+from InstrumentedEventLoop import InstrumentedEventLoop
+from MetricsRecorder import RingMetricsRecorder
+from utility import SuspendAlways
+
+async def StepsAsync(stepCount):
+	for _ in range(stepCount):
+		await SuspendAlways()
+
+async def SleepsAsync(count):
+	for _ in range(count):
+		await asyncio.sleep(0)
+		await asyncio.sleep(0.0001)
+
+async def MainAsync():
+	await asyncio.gather(*[StepsAsync(100) for _ in range(5000)])
+	await asyncio.gather(*[SleepsAsync(20) for _ in range(1000)])
+
+# Handles that user code keeps are never reused
+async def SafetyAsync():
+	loop = asyncio.get_running_loop()
+	kept = []
+	ran = []
+	for index in range(100):
+		kept.append(loop.call_soon(ran.append, index))
+		loop.call_soon(ran.append, -1)
+	await asyncio.sleep(0)
+	await asyncio.sleep(0)
+	fresh = [loop.call_soon(ran.append, -2) for _ in range(200)]
+	await asyncio.sleep(0)
+	reused = {id(handle) for handle in kept} & {id(handle) for handle in fresh}
+	return len(reused), sorted(index for index in ran if index >= 0) == list(range(100))
+
+loop = CustomEventLoop(poolHandles=True)
+reusedCount, allRan = asyncio.run(SafetyAsync(), loop_factory=lambda: loop)
+print(f"kept handles reused={reusedCount}, kept handles ran={allRan}")
+loop.handlePool.Print()
+
+for name, loopFactory in (
+	("custom", lambda: CustomEventLoop()),
+	("custom pooled", lambda: CustomEventLoop(poolHandles=True)),
+	("instrumented", lambda: InstrumentedEventLoop(metrics=RingMetricsRecorder())),
+	("instrumented pooled", lambda: InstrumentedEventLoop(metrics=RingMetricsRecorder(), poolHandles=True)),
+):
+	best = None
+	for _ in range(3):
+		loop = loopFactory()
+		startedAt = time.perf_counter()
+		asyncio.run(MainAsync(), loop_factory=lambda: loop)
+		elapsed = time.perf_counter() - startedAt
+		best = elapsed if best is None else min(best, elapsed)
+	# Allocated blocks while running (tracemalloc counts every allocation)
+	loop = loopFactory()
+	tracemalloc.start()
+	asyncio.run(MainAsync(), loop_factory=lambda: loop)
+	peakKb = tracemalloc.get_traced_memory()[1] // 1024
+	tracemalloc.stop()
+	print(f"{name}: {best:.2f}s, peak traced memory={peakKb}KB")
+	if loop.handlePool is not None:
+		loop.handlePool.Print()
+
+"""
+kept handles reused=0, kept handles ran=True
+handles allocated=302, reused=107, recycled=109, still referenced=300
+custom: 1.41s, peak traced memory=5322KB
+custom pooled: 1.55s, peak traced memory=5322KB
+handles allocated=25001, reused=547007, recycled=548031, still referenced=20000
+instrumented: 3.93s, peak traced memory=7160KB
+instrumented pooled: 4.47s, peak traced memory=7182KB
+handles allocated=25001, reused=547007, recycled=548031, still referenced=20000
+"""
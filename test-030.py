@@ -0,0 +1,136 @@
+import asyncio
+import concurrent.futures
+import json
+import os
+import tempfile
+import time
+import warnings
+from CustomEventLoop import CustomEventLoop
+from InstrumentedEventLoop import InstrumentedEventLoop
+from TaskStatistics import TaskStatistics
+
+# A blocking read of a file followed by CPU heavy parsing
+def LoadRecords(path):
+	time.sleep(0.02)
+	with open(path) as file:
+		return [json.loads(line) for line in file]
+
+def ParseNumbers(count):
+	return sum(int(str(number)) for number in range(count))
+
+# How late a 5ms heartbeat gets while the requests run
+async def HeartbeatAsync(stop, lateness):
+	while not stop.done():
+		expected = time.monotonic() + 0.005
+		await asyncio.sleep(0.005)
+		lateness.append(time.monotonic() - expected)
+
+async def RequestAsync(path, offload):
+	loop = asyncio.get_running_loop()
+	if offload:
+		records = await loop.run_in_executor(None, LoadRecords, path)
+	else:
+		records = LoadRecords(path)
+	return len(records)
+
+async def MainAsync(path, offload):
+	loop = asyncio.get_running_loop()
+	stop = loop.create_future()
+	lateness = []
+	heartbeat = asyncio.create_task(HeartbeatAsync(stop, lateness))
+	startedAt = time.perf_counter()
+	counts = await asyncio.gather(*[RequestAsync(path, offload) for _ in range(40)])
+	elapsed = time.perf_counter() - startedAt
+	stop.set_result(None)
+	await heartbeat
+	print(f"offload={offload}: records={sum(counts)}, elapsed={elapsed:.2f}s, " \
+		f"heartbeats={len(lateness)}, max heartbeat lateness={max(lateness) * 1000:.1f}ms")
+
+async def ProcessPoolAsync():
+	loop = asyncio.get_running_loop()
+	with concurrent.futures.ProcessPoolExecutor(max_workers=2) as executor:
+		results = await asyncio.gather(*[
+			loop.run_in_executor(executor, ParseNumbers, 200000) for _ in range(4)
+		])
+	print(f"process pool results={results}")
+
+async def ResolveAsync():
+	loop = asyncio.get_running_loop()
+	infos = await loop.getaddrinfo('localhost', 80, type=0)
+	print(f"getaddrinfo localhost addresses={sorted({info[4][0] for info in infos})}")
+	name = await loop.getnameinfo(('127.0.0.1', 80))
+	print(f"getnameinfo 127.0.0.1 port={name[1]}")
+
+# Calls still queued when the shutdown times out are cancelled
+async def ShutdownAsync():
+	loop = asyncio.get_running_loop()
+	loop.set_default_executor(concurrent.futures.ThreadPoolExecutor(max_workers=1))
+	calls = [loop.run_in_executor(None, time.sleep, 0.5) for _ in range(3)]
+	await asyncio.sleep(0.01)
+	startedAt = time.perf_counter()
+	with warnings.catch_warnings(record=True) as caught:
+		warnings.simplefilter('always')
+		await loop.shutdown_default_executor(timeout=0.1)
+	print(f"shutdown took {time.perf_counter() - startedAt:.2f}s, " \
+		f"warnings={[str(warning.message) for warning in caught]}")
+	results = await asyncio.gather(*calls, return_exceptions=True)
+	print(f"calls={[type(result).__name__ for result in results]}")
+	try:
+		loop.run_in_executor(None, time.sleep, 0)
+	except RuntimeError as exception:
+		print(f"after shutdown: {exception}")
+
+if __name__ == '__main__':
+	with tempfile.NamedTemporaryFile('w', suffix='.ndjson', delete=False) as file:
+		for index in range(20000):
+			file.write(json.dumps({'id': index, 'name': f"record {index}"}) + '\n')
+	try:
+		for offload in (False, True):
+			loop = CustomEventLoop()
+			asyncio.run(MainAsync(file.name, offload), loop_factory=lambda: loop)
+			loop.executorMetrics.Print()
+
+		statistics = TaskStatistics()
+		loop = InstrumentedEventLoop(statistics=statistics)
+		asyncio.run(MainAsync(file.name, True), loop_factory=lambda: loop)
+		print("slowest tasks")
+		statistics.Print(2)
+		print("first request")
+		statistics.Get(3).Print()
+	finally:
+		os.unlink(file.name)
+
+	loop = CustomEventLoop()
+	asyncio.run(ProcessPoolAsync(), loop_factory=lambda: loop)
+	loop.executorMetrics.Print()
+	asyncio.run(ResolveAsync(), loop_factory=CustomEventLoop)
+	asyncio.run(ShutdownAsync(), loop_factory=CustomEventLoop)
+
+"""
+offload=False: records=800000, elapsed=3.48s, heartbeats=1, max heartbeat lateness=3473.0ms
+executor calls=0, queue depth=0, max queue depth=0
+executor queue wait: no values
+executor run time: no values
+executor latency: no values
+offload=True: records=800000, elapsed=2.87s, heartbeats=272, max heartbeat lateness=23.4ms
+executor calls=40, queue depth=0, max queue depth=40
+executor queue wait: count=40, mean=1.25s, p50=1.13s, p99=2.56s, p99.9=2.56s, max=2.56s
+executor run time: count=40, mean=349.06ms, p50=360.71ms, p99=429.79ms, p99.9=429.79ms, max=429.79ms
+executor latency: count=40, mean=1.60s, p50=1.52s, p99=2.87s, p99.9=2.87s, max=2.87s
+offload=True: records=800000, elapsed=2.98s, heartbeats=295, max heartbeat lateness=28.8ms
+slowest tasks
+taskId=1, parent=None, children=41, wall=2.98s, steps=43/754, cpu=850.95us/19.90ms, max step=458.82us/458.82us, queue wait=105.16ms/3.15s, executor calls=0/40, executor wait=0ns/65.69s
+taskId=2, parent=1, children=0, wall=2.98s, steps=591/591, cpu=16.82ms/16.82ms, max step=144.50us/144.50us, queue wait=2.96s/2.96s
+first request
+taskId=3, parent=1, children=0, wall=390.72ms, steps=3/3, cpu=288.82us/288.82us, max step=271.57us/271.57us, queue wait=561.02us/561.02us, executor calls=1/1, executor wait=384.66ms/384.66ms
+process pool results=[19999900000, 19999900000, 19999900000, 19999900000]
+executor calls=4, queue depth=0, max queue depth=4
+executor queue wait: no values
+executor run time: no values
+executor latency: count=4, mean=352.75ms, p50=249.56ms, p99=463.22ms, p99.9=463.22ms, max=463.22ms
+getaddrinfo localhost addresses=['127.0.0.1']
+getnameinfo 127.0.0.1 port=http
+shutdown took 0.10s, warnings=['The executor did not finish joining its threads within 0.1 seconds.']
+calls=['NoneType', 'CancelledError', 'CancelledError']
+after shutdown: Executor shutdown has been called
+"""
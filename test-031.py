@@ -0,0 +1,145 @@
+import asyncio
+import os
+import time
+from LoopRuntime import (
+	KeyAffinityDistribution,
+	LeastLoadedDistribution,
+	LoopRuntime,
+	RoundRobinDistribution
+)
+from LoopWorker import current
+
+def Compute(iterations):
+	total = 0
+	for number in range(iterations):
+		total += number * number % 7
+	return total
+
+# A request that waits on I/O (the sleeps) and parses what it got (the CPU)
+async def RequestAsync(iterations):
+	total = 0
+	for _ in range(3):
+		await asyncio.sleep(0.002)
+		total += Compute(iterations)
+	return total
+
+async def ExitAsync(code):
+	os._exit(code)
+
+async def WhereAsync(key):
+	await asyncio.sleep(0)
+	return key, current.worker.workerId
+
+def Benchmark(useProcesses, workerCount, distribution, sizes):
+	runtime = LoopRuntime(workerCount, useProcesses, distribution)
+	startedAt = time.perf_counter()
+	results = runtime.Map(RequestAsync, [(size,) for size in sizes])
+	elapsed = time.perf_counter() - startedAt
+	metrics = runtime.GetMetrics()
+	runtime.Close()
+	return elapsed, results, metrics
+
+def BenchmarkArrivals(distribution, sizes):
+	runtime = LoopRuntime(4, True, distribution)
+	latencies = []
+	futures = []
+	startedAt = time.perf_counter()
+	for size in sizes:
+		submittedAt = time.perf_counter()
+		future = runtime.Submit(RequestAsync, size)
+		future.add_done_callback(
+			lambda future, submittedAt=submittedAt: latencies.append(time.perf_counter() - submittedAt)
+		)
+		futures.append(future)
+		time.sleep(0.004)
+	for future in futures:
+		future.result()
+	elapsed = time.perf_counter() - startedAt
+	metrics = runtime.GetMetrics()
+	runtime.Close()
+	return elapsed, sorted(latencies), metrics
+
+if __name__ == '__main__':
+	print(f"cpu count={os.cpu_count()}")
+	sizes = [20000] * 400
+	expected = [asyncio.run(RequestAsync(size)) for size in sizes[:1]] * len(sizes)
+	baseline = None
+	for useProcesses in (True, False):
+		for workerCount in (1, 2, 4):
+			elapsed, results, metrics = Benchmark(useProcesses, workerCount, None, sizes)
+			baseline = elapsed if workerCount == 1 else baseline
+			print(f"{'processes' if useProcesses else 'threads'}={workerCount}: " \
+				f"{elapsed:.2f}s, speedup={baseline / elapsed:.2f}x, " \
+				f"correct={results == expected}, " \
+				f"per worker={[worker.completedCount for worker in metrics.workerMetrics]}")
+
+	# Requests arrive every 4ms and every 8th one is 20 times bigger, so round
+	# robin keeps piling the big ones onto the same worker
+	sizes = [100000 if index % 8 == 0 else 5000 for index in range(400)]
+	for distribution in (RoundRobinDistribution(), LeastLoadedDistribution()):
+		elapsed, latencies, metrics = BenchmarkArrivals(distribution, sizes)
+		busy = [worker.histograms.stepDuration.total / 1e9 for worker in metrics.workerMetrics]
+		print(f"{type(distribution).__name__}: {elapsed:.2f}s, " \
+			f"mean latency={sum(latencies) / len(latencies) * 1000:.1f}ms, " \
+			f"p99 latency={latencies[len(latencies) * 99 // 100] * 1000:.1f}ms, " \
+			f"busy per worker={[f'{seconds:.2f}s' for seconds in busy]}")
+	print("merged")
+	metrics.Print()
+
+	runtime = LoopRuntime(4, True, KeyAffinityDistribution())
+	keys = ['alice', 'bob', 'carol', 'dave', 'erin'] * 20
+	placements = runtime.Map(WhereAsync, [(key,) for key in keys], keys)
+	runtime.Close()
+	workersByKey = {}
+	for key, workerId in placements:
+		workersByKey.setdefault(key, set()).add(workerId)
+	print(f"key affinity workers per key={ {key: sorted(ids) for key, ids in workersByKey.items()} }")
+
+	runtime = LoopRuntime(2, True)
+	try:
+		runtime.Submit(RequestAsync, None).result()
+	except TypeError as exception:
+		print(f"worker error={exception!r}")
+	runtime.Close()
+
+	# Worker 0 exits with a call still in flight: both of its calls fail and
+	# the next calls only go to worker 1
+	runtime = LoopRuntime(2, True)
+	pending = runtime.Submit(asyncio.sleep, 1)
+	runtime.Submit(asyncio.sleep, 0)
+	crashed = runtime.Submit(ExitAsync, 3)
+	for future in (pending, crashed):
+		try:
+			future.result()
+		except RuntimeError as exception:
+			print(f"dead worker error={exception!r}")
+	print(f"after the crash={runtime.Map(WhereAsync, [('a',), ('b',), ('c',)])}")
+	runtime.Close()
+	print("closed")
+
+"""
+cpu count=1
+processes=1: 3.19s, speedup=1.00x, correct=True, per worker=[400]
+processes=2: 3.04s, speedup=1.05x, correct=True, per worker=[200, 200]
+processes=4: 2.67s, speedup=1.19x, correct=True, per worker=[100, 100, 100, 100]
+threads=1: 2.65s, speedup=1.00x, correct=True, per worker=[400]
+threads=2: 2.84s, speedup=0.93x, correct=True, per worker=[200, 200]
+threads=4: 2.63s, speedup=1.01x, correct=True, per worker=[100, 100, 100, 100]
+RoundRobinDistribution: 2.80s, mean latency=256.0ms, p99 latency=1417.9ms, busy per worker=['2.77s', '0.38s', '0.33s', '0.30s']
+LeastLoadedDistribution: 2.79s, mean latency=148.8ms, p99 latency=363.8ms, busy per worker=['2.63s', '2.57s', '2.50s', '2.60s']
+merged
+worker=0: completed=102, failed=0, busy=2.63s, idle=131.25ms
+worker=1: completed=105, failed=0, busy=2.57s, idle=172.54ms
+worker=2: completed=95, failed=0, busy=2.50s, idle=257.59ms
+worker=3: completed=98, failed=0, busy=2.60s, idle=161.32ms
+completed=400, failed=0
+queue delay: count=3204, mean=12.66ms, p50=2.61ms, p99=71.83ms, p99.9=123.73ms, max=133.58ms
+step duration: count=3204, mean=3.22ms, p50=28.29us, p99=56.10ms, p99.9=65.80ms, max=69.55ms
+idle duration: count=221, mean=3.27ms, p50=2.08ms, p99=15.07ms, p99.9=110.15ms, max=110.15ms
+key affinity workers per key={'alice': [3], 'bob': [0], 'carol': [3], 'dave': [0], 'erin': [3]}
+worker error=TypeError("'NoneType' object cannot be interpreted as an integer")
+dead worker error=RuntimeError('Worker 0 died with exit code 3')
+dead worker error=RuntimeError('Worker 0 died with exit code 3')
+after the crash=[('a', 1), ('b', 1), ('c', 1)]
+closed
+"""
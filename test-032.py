@@ -0,0 +1,71 @@
+import asyncio
+import sys
+import threading
+import time
+from WorkStealingEventLoop import WorkStealingEventLoop
+from utility import SuspendAlways
+
+def Compute(iterations):
+	total = 0
+	for number in range(iterations):
+		total += number * number % 7
+	return total
+
+# Each step notes the thread it ran on and checks that no other step of the
+# same task is running at the same time
+async def WorkerAsync(stepCount, iterations, state):
+	threads = set()
+	for step in range(stepCount):
+		if state.get('running'):
+			raise RuntimeError("Two steps of one task ran at the same time")
+		state['running'] = True
+		threads.add(threading.get_ident())
+		Compute(iterations)
+		state['running'] = False
+		if step % 10 == 9:
+			await asyncio.sleep(0)
+		else:
+			await SuspendAlways()
+	return len(threads)
+
+async def MainAsync(taskCount, stepCount, iterations):
+	results = await asyncio.gather(*[
+		WorkerAsync(stepCount, iterations, {}) for _ in range(taskCount)
+	])
+	await asyncio.sleep(0.001)
+	return max(results)
+
+gilText = "enabled" if getattr(sys, '_is_gil_enabled', lambda: True)() else "disabled"
+print(f"python={sys.version.split()[0]}, gil={gilText}")
+taskCount, stepCount, iterations = 200, 200, 200
+for forceThreads in (False, True):
+	baseline = None
+	for threadCount in (1, 2, 4):
+		loop = WorkStealingEventLoop(threadCount, forceThreads=forceThreads)
+		startedAt = time.perf_counter()
+		threadsPerTask = asyncio.run(
+			MainAsync(taskCount, stepCount, iterations),
+			loop_factory=lambda: loop
+		)
+		elapsed = time.perf_counter() - startedAt
+		baseline = elapsed if baseline is None else baseline
+		steps = taskCount * stepCount
+		print(f"force threads={forceThreads}, requested={threadCount}: {steps / elapsed:.0f} steps/s, " \
+			f"speedup={baseline / elapsed:.2f}x, most threads one task ran on={threadsPerTask}")
+		loop.Print()
+
+"""
+python=3.12.1, gil=enabled
+force threads=False, requested=1: 55030 steps/s, speedup=1.00x, most threads one task ran on=1
+threads=1
+force threads=False, requested=2: 55163 steps/s, speedup=1.00x, most threads one task ran on=1
+threads=1
+force threads=False, requested=4: 55986 steps/s, speedup=1.02x, most threads one task ran on=1
+threads=1
+force threads=True, requested=1: 55079 steps/s, speedup=1.00x, most threads one task ran on=1
+threads=1
+force threads=True, requested=2: 50278 steps/s, speedup=0.91x, most threads one task ran on=2
+threads=2, owner runs per worker=[19311, 21083], steals per worker=[186, 4]
+force threads=True, requested=4: 51944 steps/s, speedup=0.94x, most threads one task ran on=3
+threads=4, owner runs per worker=[9120, 11925, 10312, 8948], steals per worker=[68, 4, 73, 65]
+"""